@@ -0,0 +1,219 @@
+"""
+Tổng hợp dữ liệu swap/trade thô từ Cardano DEX thành nến OHLCV
+- Đọc file sự kiện (timestamp, price, amount) theo từng chunk, không nạp cả file vào RAM
+- Gộp tăng dần vào nến của nhiều khung thời gian cùng lúc
+- Mỗi khung chỉ giữ 1 nến đang mở + một bộ đệm nến đã đóng chờ ghi ra đĩa
+- Kết quả ghi vào data/{pair}_ohlcv_{tf}.csv (1D: data/{pair}_ohlcv.csv) như các engine đang đọc
+
+Yêu cầu: sự kiện được sắp xếp theo thời gian giữa các chunk (trong một chunk có thể lộn xộn).
+Sự kiện đến trễ thuộc về nến đã đóng sẽ bị bỏ qua và được đếm trong late_events.
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from ohlcv_schema import to_epoch_ns
+from ohlcv_store import DATA_DIR, ohlcv_filename, timeframe_to_ns
+
+DEFAULT_TIMEFRAMES = ['1H', '2H', '4H', '6H', '8H', '12H', '1D']
+DEFAULT_CHUNK_SIZE = 1_000_000
+FLUSH_ROWS = 50_000
+
+# Tên cột thường gặp trong các file dump sự kiện swap
+EVENT_COLUMN_ALIASES = {
+    'timestamp': ['timestamp', 'Timestamp', 'time', 'ts', 'block_time', 'date', 'Date'],
+    'price': ['price', 'Price', 'rate', 'execution_price'],
+    'amount': ['amount', 'Amount', 'qty', 'quantity', 'size', 'base_amount', 'volume'],
+}
+
+def resolve_event_columns(columns):
+    """Tìm tên cột thực tế cho timestamp/price/amount trong file sự kiện"""
+    resolved = {}
+    for target, aliases in EVENT_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in columns:
+                resolved[target] = alias
+                break
+        else:
+            raise ValueError(f"Không tìm thấy cột '{target}' trong file sự kiện (có: {list(columns)})")
+    return resolved
+
+class BarAggregator:
+    """Gộp sự kiện đã sắp xếp thành nến OHLCV cho một khung thời gian"""
+
+    def __init__(self, timeframe, output_path, flush_rows=FLUSH_ROWS):
+        self.timeframe = timeframe
+        self.bar_ns = timeframe_to_ns(timeframe)
+        self.output_path = output_path
+        self.flush_rows = flush_rows
+        self.open_bar = None  # Nến đang mở: [start, open, high, low, close, volume]
+        self.pending = []  # Các khối nến đã đóng chờ ghi
+        self.pending_rows = 0
+        self.bars_written = 0
+        self.late_events = 0
+        self._header_written = False
+
+    def update(self, ts, price, amount):
+        """Gộp một khối sự kiện (ts tăng dần) vào các nến"""
+        bar_start = ts - ts % self.bar_ns
+
+        # Bỏ qua sự kiện trễ thuộc về nến đã đóng
+        if self.open_bar is not None:
+            late = bar_start < self.open_bar[0]
+            if late.any():
+                self.late_events += int(late.sum())
+                keep = ~late
+                bar_start, price, amount = bar_start[keep], price[keep], amount[keep]
+
+        if len(bar_start) == 0:
+            return
+
+        # Ranh giới giữa các nến trong khối (vectorized, không vòng lặp Python)
+        boundaries = np.flatnonzero(np.diff(bar_start)) + 1
+        first = np.concatenate(([0], boundaries))
+        last = np.concatenate((boundaries, [len(bar_start)])) - 1
+
+        starts = bar_start[first]
+        opens = price[first]
+        highs = np.maximum.reduceat(price, first)
+        lows = np.minimum.reduceat(price, first)
+        closes = price[last]
+        volumes = np.add.reduceat(amount, first)
+
+        # Nối với nến đang mở từ chunk trước
+        if self.open_bar is not None:
+            if starts[0] == self.open_bar[0]:
+                opens[0] = self.open_bar[1]
+                highs[0] = max(highs[0], self.open_bar[2])
+                lows[0] = min(lows[0], self.open_bar[3])
+                volumes[0] += self.open_bar[5]
+            else:
+                self._append_closed(np.array([self.open_bar[0]]), *(np.array([v]) for v in self.open_bar[1:]))
+
+        # Nến cuối cùng có thể còn tiếp tục ở chunk sau
+        self.open_bar = [starts[-1], opens[-1], highs[-1], lows[-1], closes[-1], volumes[-1]]
+        if len(starts) > 1:
+            self._append_closed(starts[:-1], opens[:-1], highs[:-1], lows[:-1], closes[:-1], volumes[:-1])
+
+        if self.pending_rows >= self.flush_rows:
+            self.flush()
+
+    def _append_closed(self, starts, opens, highs, lows, closes, volumes):
+        self.pending.append((starts, opens, highs, lows, closes, volumes))
+        self.pending_rows += len(starts)
+
+    def flush(self):
+        """Ghi các nến đã đóng ra file CSV"""
+        if not self.pending:
+            return
+
+        columns = [np.concatenate(parts) for parts in zip(*self.pending)]
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(columns[0], unit='ns'),
+            'open': columns[1],
+            'high': columns[2],
+            'low': columns[3],
+            'close': columns[4],
+            'volume': columns[5]
+        })
+        df.to_csv(self.output_path, mode='a' if self._header_written else 'w',
+                  header=not self._header_written, index=False)
+        self._header_written = True
+        self.bars_written += len(df)
+        self.pending = []
+        self.pending_rows = 0
+
+    def close(self):
+        """Đóng nến cuối cùng và ghi toàn bộ phần còn lại"""
+        if self.open_bar is not None:
+            self._append_closed(np.array([self.open_bar[0]]), *(np.array([v]) for v in self.open_bar[1:]))
+            self.open_bar = None
+        self.flush()
+
+def aggregate_swap_events(input_path, pair, timeframes=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                          data_dir=DATA_DIR):
+    """
+    Đọc file sự kiện swap theo chunk và ghi nến OHLCV cho nhiều khung thời gian
+
+    Parameters:
+    - input_path: File CSV sự kiện (timestamp, price, amount)
+    - pair: Tên cặp token (ví dụ: 'ADAUSDM')
+    - timeframes: Danh sách khung thời gian (mặc định 1H → 1D)
+    - chunk_size: Số dòng đọc mỗi lần
+    - data_dir: Thư mục lưu dữ liệu
+
+    Returns: (dict {timeframe: {'file', 'bars', 'late_events'}}, tổng số sự kiện)
+    """
+    timeframes = timeframes or DEFAULT_TIMEFRAMES
+    os.makedirs(data_dir, exist_ok=True)
+
+    aggregators = [
+        BarAggregator(tf, ohlcv_filename(pair, tf, data_dir))
+        for tf in timeframes
+    ]
+
+    columns = None
+    epoch_unit = None
+    total_events = 0
+
+    for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+        if columns is None:
+            columns = resolve_event_columns(chunk.columns)
+
+        chunk = chunk[[columns['timestamp'], columns['price'], columns['amount']]].dropna()
+        if len(chunk) == 0:
+            continue
+
+        ts, epoch_unit = to_epoch_ns(chunk[columns['timestamp']], epoch_unit)
+        price = chunk[columns['price']].to_numpy(dtype='float64')
+        amount = chunk[columns['amount']].to_numpy(dtype='float64')
+
+        # Sắp xếp trong chunk (stable để giữ thứ tự các sự kiện cùng thời điểm)
+        order = np.argsort(ts, kind='stable')
+        ts, price, amount = ts[order], price[order], amount[order]
+
+        for aggregator in aggregators:
+            aggregator.update(ts, price, amount)
+
+        total_events += len(ts)
+
+    summary = {}
+    for aggregator in aggregators:
+        aggregator.close()
+        summary[aggregator.timeframe] = {
+            'file': aggregator.output_path,
+            'bars': aggregator.bars_written,
+            'late_events': aggregator.late_events
+        }
+
+    return summary, total_events
+
+def main():
+    """Tổng hợp file sự kiện swap thành nến OHLCV"""
+    parser = argparse.ArgumentParser(description='Tổng hợp sự kiện swap DEX thành nến OHLCV')
+    parser.add_argument('input', help='File CSV sự kiện (timestamp, price, amount)')
+    parser.add_argument('--pair', required=True, help='Tên cặp token, ví dụ ADAUSDM')
+    parser.add_argument('--timeframes', default=','.join(DEFAULT_TIMEFRAMES),
+                        help='Danh sách khung thời gian, phân cách bằng dấu phẩy')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    timeframes = [tf.strip() for tf in args.timeframes.split(',') if tf.strip()]
+
+    print("=" * 80)
+    print(f"TỔNG HỢP SỰ KIỆN SWAP → OHLCV: {args.pair}")
+    print("=" * 80)
+
+    summary, total_events = aggregate_swap_events(args.input, args.pair, timeframes,
+                                                  chunk_size=args.chunk_size, data_dir=args.data_dir)
+
+    print(f"✓ Đã xử lý {total_events:,} sự kiện")
+    for timeframe, info in summary.items():
+        print(f"  {timeframe:>4}: {info['bars']:,} nến → {info['file']}")
+        if info['late_events']:
+            print(f"        ⚠ Bỏ qua {info['late_events']:,} sự kiện đến trễ")
+
+if __name__ == "__main__":
+    main()
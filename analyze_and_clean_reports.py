@@ -3,12 +3,15 @@ Analyze backtest results and remove loss-making reports
 Then suggest improvements for profitable backtesting on real data
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from backtest_improved_strategy import ImprovedStrategyBacktestEngine, PAIRS
 import os
 import glob
+from columnar_export import read_table
+from ohlcv_schema import normalize_columns
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -18,6 +21,10 @@ MAX_TRADES = 100
 TAKE_PROFIT_PCT = 5.0
 STOP_LOSS_PCT = -2.5
 
+TIMEFRAMES = ['6H', '4H', '2H', '1H']
+# Columns read from an existing results export (optimizer / sweep output)
+RESULT_COLUMNS = ['pair', 'timeframe', 'total_profit_pct', 'win_rate', 'total_trades']
+
 def backtest_timeframe_quick(pair, timeframe='6H'):
     """Quick backtest to check profitability"""
     timeframe_map = {
@@ -39,14 +46,7 @@ def backtest_timeframe_quick(pair, timeframe='6H'):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -90,17 +90,35 @@ def analyze_all_reports():
     print("ANALYZING BACKTEST RESULTS")
     print("=" * 80)
     
-    timeframes = ['6H', '4H', '2H', '1H']
     results = []
     
     for pair in PAIRS:
-        for timeframe in timeframes:
+        for timeframe in TIMEFRAMES:
             result = backtest_timeframe_quick(pair, timeframe)
             if result:
                 results.append(result)
     
     return results
 
+def load_results(path):
+    """
+    Per pair/timeframe results from an existing export (CSV or Parquet) instead of re-running backtests
+
+    Only RESULT_COLUMNS are read (and only the TIMEFRAMES partitions of a Parquet dataset).
+    With several rows per pair/timeframe (one per parameter combination) the most profitable is kept.
+    """
+    df = read_table(path, columns=RESULT_COLUMNS, filters={'timeframe': TIMEFRAMES})
+    if df is None or df.empty:
+        return []
+    df = df.sort_values('total_profit_pct', ascending=False, kind='stable').drop_duplicates(['pair', 'timeframe'])
+    return [{
+        'pair': str(row.pair),
+        'timeframe': str(row.timeframe),
+        'profit_pct': float(row.total_profit_pct),
+        'win_rate': float(row.win_rate),
+        'total_trades': int(row.total_trades)
+    } for row in df.itertuples(index=False)]
+
 def remove_loss_reports(loss_reports):
     """Remove PNG reports that are making losses"""
     removed_count = 0
@@ -221,13 +239,23 @@ def suggest_improvements(loss_reports, profitable_reports):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Analyze backtest results and remove loss-making reports')
+    parser.add_argument('--results', default=None,
+                        help='Existing results export (CSV or Parquet, e.g. optimal_params_intraday_timeframes.csv '
+                             'or an optimizer dataset) instead of re-running the backtests')
+    args = parser.parse_args()
+
     print("=" * 80)
     print("ANALYZE AND CLEAN LOSS-MAKING REPORTS")
     print("=" * 80)
     
     # Analyze all reports
-    print("\n📊 Analyzing backtest results...")
-    all_results = analyze_all_reports()
+    if args.results:
+        print(f"\n📊 Reading results from {args.results}...")
+        all_results = load_results(args.results)
+    else:
+        print("\n📊 Analyzing backtest results...")
+        all_results = analyze_all_reports()
     
     if not all_results:
         print("✗ No results found")
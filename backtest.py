@@ -9,8 +9,10 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
-import matplotlib.pyplot as plt
 import warnings
+from ohlcv_schema import normalize_columns
+from downsample import downsample
+from columnar_export import export_table
 warnings.filterwarnings('ignore')
 
 # Danh sách các cặp token
@@ -364,20 +366,7 @@ def backtest_pair(pair, initial_capital=10000, position_size=0.05, take_profit=0
         df = pd.read_csv(filename)
         
         # Chuẩn hóa tên cột
-        column_mapping = {
-            'Timestamp': 'timestamp',
-            'Date': 'timestamp',
-            'time': 'timestamp',
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         # Đảm bảo timestamp là datetime
         if 'timestamp' in df.columns:
@@ -429,10 +418,15 @@ def backtest_pair(pair, initial_capital=10000, position_size=0.05, take_profit=0
     
     return results
 
-def plot_results(results_dict):
+def plot_results(results_dict, max_points=None):
     """
     Vẽ biểu đồ kết quả cho tất cả các cặp
+
+    Parameters:
+    - max_points: Ngân sách điểm mỗi biểu đồ equity (xem downsample.py; None = CHART_MAX_POINTS)
     """
+    import matplotlib.pyplot as plt
+
     if not results_dict:
         print("Không có dữ liệu để vẽ biểu đồ")
         return
@@ -448,9 +442,9 @@ def plot_results(results_dict):
             continue
         
         ax = axes[idx]
-        equity = results['equity_curve']
+        candles, equity = downsample(results['equity_curve'], max_points)
         
-        ax.plot(equity, label=f'{pair} Equity Curve', linewidth=2)
+        ax.plot(candles, equity, label=f'{pair} Equity Curve', linewidth=2)
         ax.axhline(y=results['initial_capital'], color='r', linestyle='--', 
                    label='Initial Capital', alpha=0.7)
         ax.set_title(f'{pair} - Final: ${results["final_capital"]:,.2f} '
@@ -465,9 +459,13 @@ def plot_results(results_dict):
     print(f"\n✓ Đã lưu biểu đồ vào backtest_results.png")
     plt.show()
 
-def generate_detailed_report(results_dict, output_file='backtest_detailed_report.csv'):
+def generate_detailed_report(results_dict, output_file='backtest_detailed_report.csv', fmt=None):
     """
     Tạo báo cáo chi tiết với tất cả các lệnh giao dịch
+
+    Parameters:
+    - output_file: File CSV (chế độ parquet ghi dataset chia partition theo pair, xem columnar_export)
+    - fmt: 'csv' hoặc 'parquet' (None = RESULTS_FORMAT)
     """
     all_trades = []
     
@@ -487,7 +485,7 @@ def generate_detailed_report(results_dict, output_file='backtest_detailed_report
             df_trades['timestamp'] = pd.to_datetime(df_trades['timestamp'])
             df_trades = df_trades.sort_values(['pair', 'timestamp']).reset_index(drop=True)
         
-        df_trades.to_csv(output_file, index=False)
+        output_file = export_table(df_trades, output_file, fmt, partition=['pair'])
         print(f"✓ Đã lưu báo cáo chi tiết vào {output_file}")
         return df_trades
     
@@ -579,8 +577,8 @@ def main():
         
         if summary_data:
             summary_df = pd.DataFrame(summary_data)
-            summary_df.to_csv('backtest_summary.csv', index=False)
-            print(f"\n✓ Đã lưu tổng hợp kết quả vào backtest_summary.csv")
+            output = export_table(summary_df, 'backtest_summary.csv')
+            print(f"\n✓ Đã lưu tổng hợp kết quả vào {output}")
             
             # Tạo báo cáo chi tiết với tất cả các lệnh
             generate_detailed_report(all_results, 'backtest_detailed_report.csv')
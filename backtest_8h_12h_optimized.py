@@ -8,6 +8,7 @@ import numpy as np
 from datetime import datetime
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+from ohlcv_schema import normalize_columns
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -53,14 +54,7 @@ def backtest_timeframe_optimized(pair, params, timeframe='8h', rsi_period=10):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
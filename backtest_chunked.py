@@ -0,0 +1,154 @@
+"""
+Chạy backtest out-of-core trên lịch sử rất dài (nến phút nhiều năm)
+- Đọc dữ liệu theo từng chunk cố định thay vì nạp cả DataFrame vào RAM
+- Giữ lại warm-up window (nến cuối của chunk trước) để chỉ báo rolling tính liền mạch
+- Nối tiếp EMA bằng giá trị EMA đã tính của chunk trước
+- Trạng thái engine (position, DCA, cash, ...) được giữ nguyên giữa các chunk
+Kết quả giao dịch giống hệt chạy trong bộ nhớ bằng engine.run(df)
+
+Hỗ trợ các engine có prepare_indicators/process_candle/close_at_end:
+FixedAmountBacktestEngine, ImprovedStrategyBacktestEngine
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from ohlcv_store import DATA_DIR, iter_ohlcv_chunks, read_ohlcv
+from backtest_fixed_amount import FixedAmountBacktestEngine
+from backtest_improved_strategy import ImprovedStrategyBacktestEngine
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+ENGINES = {
+    'fixed': FixedAmountBacktestEngine,
+    'improved': ImprovedStrategyBacktestEngine,
+}
+
+def run_chunked(engine, chunks, keep_equity_curve=True):
+    """
+    Chạy engine trên một chuỗi chunk DataFrame liên tiếp (đã sắp xếp theo timestamp)
+
+    Parameters:
+    - engine: Engine hỗ trợ chạy theo từng nến
+    - chunks: Iterable các DataFrame OHLCV liên tiếp
+    - keep_equity_curve: False để chỉ giữ max/min equity (bộ nhớ cố định)
+
+    Returns: dict kết quả giống engine.get_results()
+    """
+    for method in ('indicator_warmup', 'prepare_indicators', 'process_candle', 'close_at_end'):
+        if not hasattr(engine, method):
+            raise ValueError(f"{type(engine).__name__} không hỗ trợ chạy theo chunk (thiếu {method})")
+
+    engine.reset()
+    warmup = engine.indicator_warmup()
+
+    tail = None
+    offset = 0
+    last_row = None
+    last_index = None
+    last_timestamp = None
+    max_equity = -np.inf
+    min_equity = np.inf
+
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+
+        chunk = chunk.reset_index(drop=True)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+
+        if 'timestamp' in chunk.columns:
+            if not chunk['timestamp'].is_monotonic_increasing or (
+                    last_timestamp is not None and chunk['timestamp'].iloc[0] < last_timestamp):
+                raise ValueError("Dữ liệu chưa được sắp xếp theo timestamp, không thể chạy theo chunk")
+            last_timestamp = chunk['timestamp'].iloc[-1]
+
+        # Ghép warm-up window của chunk trước để chỉ báo rolling không bị NaN ở đầu chunk
+        if tail is None:
+            frame = chunk
+            engine.prepare_indicators(frame)
+        else:
+            frame = pd.concat([tail[chunk.columns], chunk])
+            engine.prepare_indicators(frame, seed_row=tail.iloc[0])
+
+        for idx, row in frame.iloc[len(frame) - len(chunk):].iterrows():
+            engine.process_candle(idx, row)
+
+        tail = frame.iloc[-warmup:].copy()
+        last_row = frame.iloc[-1]
+        last_index = frame.index[-1]
+        offset += len(chunk)
+
+        if not keep_equity_curve and engine.equity_curve:
+            max_equity = max(max_equity, max(engine.equity_curve))
+            min_equity = min(min_equity, min(engine.equity_curve))
+            engine.equity_curve = []
+
+    if last_row is not None and engine.in_position:
+        engine.close_at_end(last_row, last_index)
+
+    results = engine.get_results()
+    if results:
+        results['candles'] = offset
+        if not keep_equity_curve and np.isfinite(max_equity):
+            results['max_equity'] = max_equity
+            results['min_equity'] = min_equity
+
+    return results
+
+def run_backtest_chunked(engine, pair, timeframe='1D', chunk_size=DEFAULT_CHUNK_SIZE,
+                         keep_equity_curve=True, data_dir=DATA_DIR):
+    """Backtest một cặp/khung thời gian bằng cách stream file dữ liệu theo chunk"""
+    chunks = iter_ohlcv_chunks(pair, timeframe, chunk_size=chunk_size, data_dir=data_dir)
+    return run_chunked(engine, chunks, keep_equity_curve=keep_equity_curve)
+
+def compare_trades(trades_a, trades_b):
+    """So sánh hai danh sách lệnh, trả về index lệnh đầu tiên khác nhau (None nếu giống hệt)"""
+    for i, (a, b) in enumerate(zip(trades_a, trades_b)):
+        if (a['timestamp'] != b['timestamp'] or a['type'] != b['type']
+                or a['price'] != b['price'] or a.get('reason') != b.get('reason')):
+            return i
+    if len(trades_a) != len(trades_b):
+        return min(len(trades_a), len(trades_b))
+    return None
+
+def main():
+    """Chạy backtest theo chunk cho một cặp token"""
+    parser = argparse.ArgumentParser(description='Backtest out-of-core theo chunk')
+    parser.add_argument('--pair', required=True)
+    parser.add_argument('--timeframe', default='1D')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='fixed')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--verify', action='store_true',
+                        help='Chạy thêm trong bộ nhớ và so sánh danh sách lệnh')
+    args = parser.parse_args()
+
+    engine_cls = ENGINES[args.engine]
+
+    print("=" * 80)
+    print(f"BACKTEST THEO CHUNK: {args.pair} {args.timeframe} ({engine_cls.__name__})")
+    print("=" * 80)
+
+    results = run_backtest_chunked(engine_cls(), args.pair, args.timeframe,
+                                   chunk_size=args.chunk_size, keep_equity_curve=False,
+                                   data_dir=args.data_dir)
+    if not results:
+        print("✗ Không có giao dịch")
+        return
+
+    print(f"✓ {results['candles']:,} nến | {results['total_trades']} lệnh bán | "
+          f"Lợi nhuận: {results['total_profit_pct']:+.2f}% | Win Rate: {results['win_rate']:.2f}%")
+
+    if args.verify:
+        df = read_ohlcv(args.pair, args.timeframe, data_dir=args.data_dir)
+        engine = engine_cls()
+        engine.run(df)
+        mismatch = compare_trades(results['trades'], engine.trades)
+        if mismatch is None:
+            print(f"✓ Khớp hoàn toàn với chạy trong bộ nhớ ({len(engine.trades)} lệnh)")
+        else:
+            print(f"✗ Lệnh #{mismatch} khác với chạy trong bộ nhớ")
+
+if __name__ == "__main__":
+    main()
@@ -27,8 +27,14 @@ def calculate_rsi(prices, period=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
-def calculate_ema(prices, period=20):
-    """Tính toán EMA"""
+def calculate_ema(prices, period=20, seed=None):
+    """
+    Tính toán EMA
+    - seed: giá trị EMA đã biết tại phần tử đầu tiên (để tính nối tiếp giữa các chunk)
+    """
+    if seed is not None:
+        prices = prices.copy()
+        prices.iloc[0] = seed
     return prices.ewm(span=period, adjust=False).mean()
 
 def is_red_candle(row):
@@ -188,15 +194,18 @@ class FixedAmountBacktestEngine:
         profit = current_value - total_invested
         return (profit / total_invested) * 100
     
-    def run(self, df):
-        """Chạy backtest"""
-        self.reset()
-        
-        if 'timestamp' not in df.columns and df.index.name == 'timestamp':
-            df = df.reset_index()
-        
+    def indicator_warmup(self):
+        """Số nến lịch sử cần giữ giữa các chunk để chỉ báo rolling tính liền mạch"""
+        return max(self.rsi_period + 1, 20)
+    
+    def prepare_indicators(self, df, seed_row=None):
+        """
+        Tính các chỉ báo cần cho logic mua/bán
+        - seed_row: dòng đầu tiên đã có chỉ báo từ chunk trước (nối tiếp EMA)
+        """
         df['rsi14'] = calculate_rsi(df['close'], period=self.rsi_period)
-        df['ema20'] = calculate_ema(df['close'], period=20)
+        df['ema20'] = calculate_ema(df['close'], period=20,
+                                    seed=None if seed_row is None else seed_row['ema20'])
         df['is_red'] = df.apply(is_red_candle, axis=1)
         
         if 'volume' in df.columns:
@@ -205,97 +214,120 @@ class FixedAmountBacktestEngine:
             df['volume_ma'] = 1
             df['volume'] = 1
         
-        for idx, row in df.iterrows():
-            timestamp = row.get('timestamp', idx)
-            close_price = row['close']
-            rsi = row['rsi14']
-            is_red = row['is_red']
-            ema20 = row['ema20']
-            volume = row['volume']
-            volume_ma = row['volume_ma']
+        return df
+    
+    def process_candle(self, idx, row):
+        """Xử lý logic mua/bán cho một nến"""
+        timestamp = row.get('timestamp', idx)
+        close_price = row['close']
+        rsi = row['rsi14']
+        is_red = row['is_red']
+        ema20 = row['ema20']
+        volume = row['volume']
+        volume_ma = row['volume_ma']
+        
+        if pd.isna(rsi) or pd.isna(ema20):
+            self.equity_curve.append(self.get_current_value(close_price))
+            return
+        
+        # Logic bán
+        if self.in_position:
+            if close_price > self.highest_price:
+                self.highest_price = close_price
             
-            if pd.isna(rsi) or pd.isna(ema20):
+            trailing_stop_price = self.highest_price * (1 - 0.03)
+            if close_price < trailing_stop_price and close_price < self.get_average_entry_price():
+                self.sell(close_price, timestamp, rsi, 'TRAILING_STOP')
                 self.equity_curve.append(self.get_current_value(close_price))
-                continue
+                return
             
-            # Logic bán
-            if self.in_position:
-                if close_price > self.highest_price:
-                    self.highest_price = close_price
-                
-                trailing_stop_price = self.highest_price * (1 - 0.03)
-                if close_price < trailing_stop_price and close_price < self.get_average_entry_price():
-                    self.sell(close_price, timestamp, rsi, 'TRAILING_STOP')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                # Kiểm tra lợi nhuận/lỗ trước
-                profit_pct = self.get_current_profit_pct(close_price)
-                
-                # Cắt lỗ khi -2.5%
-                if profit_pct <= -2.5:
-                    self.sell(close_price, timestamp, rsi, 'STOP_LOSS_2.5%')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                # Chốt lãi khi +5%
-                if profit_pct >= 5.0:
-                    self.sell(close_price, timestamp, rsi, 'TAKE_PROFIT_5%')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                # Stop loss cũ (nếu có)
-                avg_entry = self.get_average_entry_price()
-                stop_loss_price = avg_entry * (1 - self.stop_loss)
-                if close_price <= stop_loss_price:
-                    self.sell(close_price, timestamp, rsi, 'STOP_LOSS')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                if rsi >= self.rsi_sell:
-                    self.sell(close_price, timestamp, rsi, 'RSI_SELL')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                # Take profit cũ (nếu có)
-                if profit_pct >= (self.take_profit * 100):
-                    self.sell(close_price, timestamp, rsi, 'TAKE_PROFIT')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
+            # Kiểm tra lợi nhuận/lỗ trước
+            profit_pct = self.get_current_profit_pct(close_price)
+            
+            # Cắt lỗ khi -2.5%
+            if profit_pct <= -2.5:
+                self.sell(close_price, timestamp, rsi, 'STOP_LOSS_2.5%')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
             
-            # Logic mua
-            can_buy = False
+            # Chốt lãi khi +5%
+            if profit_pct >= 5.0:
+                self.sell(close_price, timestamp, rsi, 'TAKE_PROFIT_5%')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
             
-            if rsi <= self.rsi_buy:
-                can_buy = True
-                
-                if self.use_trend_filter:
-                    if close_price < ema20 * 0.95:
-                        can_buy = False
-                
-                if self.use_volume_filter and can_buy:
-                    if volume < volume_ma * 0.8:
-                        can_buy = False
+            # Stop loss cũ (nếu có)
+            avg_entry = self.get_average_entry_price()
+            stop_loss_price = avg_entry * (1 - self.stop_loss)
+            if close_price <= stop_loss_price:
+                self.sell(close_price, timestamp, rsi, 'STOP_LOSS')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
             
-            if can_buy:
-                if not self.in_position:
-                    self.buy(close_price, timestamp, rsi, is_dca=False)
-                else:
-                    if is_red and self.dca_count < self.max_dca:
-                        avg_entry = self.get_average_entry_price()
-                        if close_price < avg_entry:
-                            self.buy(close_price, timestamp, rsi, is_dca=True)
+            if rsi >= self.rsi_sell:
+                self.sell(close_price, timestamp, rsi, 'RSI_SELL')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
             
-            self.equity_curve.append(self.get_current_value(close_price))
+            # Take profit cũ (nếu có)
+            if profit_pct >= (self.take_profit * 100):
+                self.sell(close_price, timestamp, rsi, 'TAKE_PROFIT')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
         
-        # Bán hết nếu còn position
+        # Logic mua
+        can_buy = False
+        
+        if rsi <= self.rsi_buy:
+            can_buy = True
+            
+            if self.use_trend_filter:
+                if close_price < ema20 * 0.95:
+                    can_buy = False
+            
+            if self.use_volume_filter and can_buy:
+                if volume < volume_ma * 0.8:
+                    can_buy = False
+        
+        if can_buy:
+            if not self.in_position:
+                self.buy(close_price, timestamp, rsi, is_dca=False)
+            else:
+                if is_red and self.dca_count < self.max_dca:
+                    avg_entry = self.get_average_entry_price()
+                    if close_price < avg_entry:
+                        self.buy(close_price, timestamp, rsi, is_dca=True)
+        
+        self.equity_curve.append(self.get_current_value(close_price))
+    
+    def close_at_end(self, last_row, last_index):
+        """Bán hết nếu còn position ở nến cuối cùng"""
         if self.in_position:
-            last_row = df.iloc[-1]
             last_price = last_row['close']
             last_rsi = last_row['rsi14']
-            last_timestamp = last_row.get('timestamp', df.index[-1])
+            last_timestamp = last_row.get('timestamp', last_index)
             self.sell(last_price, last_timestamp, last_rsi, 'END_OF_DATA')
     
+    def run(self, df, precomputed=False):
+        """
+        Chạy backtest
+        precomputed=True: df đã có cột chỉ báo (từ prepare_indicators với cùng rsi_period), không tính lại
+        """
+        self.reset()
+        
+        if 'timestamp' not in df.columns and df.index.name == 'timestamp':
+            df = df.reset_index()
+        
+        if not precomputed:
+            self.prepare_indicators(df)
+        
+        for idx, row in df.iterrows():
+            self.process_candle(idx, row)
+        
+        # Bán hết nếu còn position
+        if self.in_position:
+            self.close_at_end(df.iloc[-1], df.index[-1])
+    
     def get_results(self):
         """Tính toán kết quả"""
         if len(self.trades) == 0:
@@ -14,8 +14,9 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
-import matplotlib.pyplot as plt
 import warnings
+from ohlcv_schema import normalize_columns
+from columnar_export import export_table
 warnings.filterwarnings('ignore')
 
 # Danh sách các cặp token
@@ -45,6 +46,31 @@ def is_red_candle(row):
     """Kiểm tra xem nến có phải là nến đỏ không (close < open)"""
     return row['close'] < row['open']
 
+def add_indicators(df):
+    """Tính các chỉ báo mà engine sử dụng (ghi thêm cột vào df)"""
+    df['rsi14'] = calculate_rsi(df['close'], period=14)
+    df['ema20'] = calculate_ema(df['close'], period=20)
+    df['is_red'] = df.apply(is_red_candle, axis=1)
+    
+    # Tính volume trung bình (cho filter)
+    if 'volume' in df.columns:
+        df['volume_ma'] = df['volume'].rolling(window=20).mean()
+    else:
+        df['volume_ma'] = 1
+        df['volume'] = 1
+    return df
+
+def prepare_indicators(df):
+    """
+    Tính chỉ báo một lần cho toàn bộ chuỗi dữ liệu (trả về bản sao)
+    Có thể cắt theo từng đoạn rồi chạy engine.run(df_slice, precomputed=True)
+    Chỉ báo chỉ dùng dữ liệu quá khứ nên cắt ra không bị nhìn trước tương lai
+    """
+    df = df.copy()
+    if 'timestamp' not in df.columns and df.index.name == 'timestamp':
+        df = df.reset_index()
+    return add_indicators(df)
+
 class ImprovedBacktestEngine:
     def __init__(self, initial_capital=10000, position_size=0.05, 
                  take_profit=0.08, stop_loss=0.04, 
@@ -201,24 +227,19 @@ class ImprovedBacktestEngine:
         profit = current_value - total_invested
         return (profit / total_invested) * 100
     
-    def run(self, df):
-        """Chạy backtest trên DataFrame"""
+    def run(self, df, precomputed=False):
+        """
+        Chạy backtest trên DataFrame
+        precomputed=True: df đã có cột chỉ báo (từ prepare_indicators), không tính lại
+        """
         self.reset()
         
         if 'timestamp' not in df.columns and df.index.name == 'timestamp':
             df = df.reset_index()
         
         # Tính các chỉ báo
-        df['rsi14'] = calculate_rsi(df['close'], period=14)
-        df['ema20'] = calculate_ema(df['close'], period=20)
-        df['is_red'] = df.apply(is_red_candle, axis=1)
-        
-        # Tính volume trung bình (cho filter)
-        if 'volume' in df.columns:
-            df['volume_ma'] = df['volume'].rolling(window=20).mean()
-        else:
-            df['volume_ma'] = 1
-            df['volume'] = 1
+        if not precomputed:
+            add_indicators(df)
         
         # Vòng lặp qua từng nến
         for idx, row in df.iterrows():
@@ -391,14 +412,7 @@ def backtest_pair_improved(pair, initial_capital=10000, position_size=0.05,
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -547,8 +561,8 @@ def main():
         
         if summary_data:
             summary_df = pd.DataFrame(summary_data)
-            summary_df.to_csv('backtest_improved_summary.csv', index=False)
-            print(f"\n✓ Đã lưu tổng hợp kết quả vào backtest_improved_summary.csv")
+            output = export_table(summary_df, 'backtest_improved_summary.csv')
+            print(f"\n✓ Đã lưu tổng hợp kết quả vào {output}")
     except Exception as e:
         print(f"\n⚠ Không thể lưu kết quả: {e}")
 
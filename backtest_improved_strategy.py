@@ -31,8 +31,14 @@ def calculate_rsi(prices, period=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
-def calculate_ema(prices, period=20):
-    """Tính toán EMA"""
+def calculate_ema(prices, period=20, seed=None):
+    """
+    Tính toán EMA
+    - seed: giá trị EMA đã biết tại phần tử đầu tiên (để tính nối tiếp giữa các chunk)
+    """
+    if seed is not None:
+        prices = prices.copy()
+        prices.iloc[0] = seed
     return prices.ewm(span=period, adjust=False).mean()
 
 def is_red_candle(row):
@@ -211,17 +217,20 @@ class ImprovedStrategyBacktestEngine:
         profit = current_value - total_invested
         return (profit / total_invested) * 100
     
-    def run(self, df):
-        """Chạy backtest với chiến lược cải tiến"""
-        self.reset()
-        
-        if 'timestamp' not in df.columns and df.index.name == 'timestamp':
-            df = df.reset_index()
-        
-        # Tính các chỉ báo
+    def indicator_warmup(self):
+        """Số nến lịch sử cần giữ giữa các chunk để chỉ báo rolling tính liền mạch"""
+        return max(self.rsi_period + 1, 20)
+    
+    def prepare_indicators(self, df, seed_row=None):
+        """
+        Tính các chỉ báo cần cho logic mua/bán
+        - seed_row: dòng đầu tiên đã có chỉ báo từ chunk trước (nối tiếp EMA)
+        """
         df['rsi14'] = calculate_rsi(df['close'], period=self.rsi_period)
-        df['ema50'] = calculate_ema(df['close'], period=50)
-        df['ema200'] = calculate_ema(df['close'], period=200)
+        df['ema50'] = calculate_ema(df['close'], period=50,
+                                    seed=None if seed_row is None else seed_row['ema50'])
+        df['ema200'] = calculate_ema(df['close'], period=200,
+                                     seed=None if seed_row is None else seed_row['ema200'])
         df['is_red'] = df.apply(is_red_candle, axis=1)
         
         if 'volume' in df.columns:
@@ -230,90 +239,110 @@ class ImprovedStrategyBacktestEngine:
             df['volume_ma'] = 1
             df['volume'] = 1
         
-        for idx, row in df.iterrows():
-            timestamp = row.get('timestamp', idx)
-            close_price = row['close']
-            rsi = row['rsi14']
-            is_red = row['is_red']
-            ema50 = row['ema50']
-            ema200 = row['ema200']
-            volume = row['volume']
-            volume_ma = row['volume_ma']
+        return df
+    
+    def process_candle(self, idx, row):
+        """Xử lý logic mua/bán cho một nến"""
+        timestamp = row.get('timestamp', idx)
+        close_price = row['close']
+        rsi = row['rsi14']
+        is_red = row['is_red']
+        ema50 = row['ema50']
+        ema200 = row['ema200']
+        volume = row['volume']
+        volume_ma = row['volume_ma']
+        
+        if pd.isna(rsi) or pd.isna(ema50) or pd.isna(ema200):
+            self.equity_curve.append(self.get_current_value(close_price))
+            return
+        
+        # Strategy 1: Trend Filter - chỉ mua khi uptrend
+        is_uptrend = close_price > ema200 and ema50 > ema200
+        
+        # Logic bán
+        if self.in_position:
+            if close_price > self.highest_price:
+                self.highest_price = close_price
             
-            if pd.isna(rsi) or pd.isna(ema50) or pd.isna(ema200):
-                self.equity_curve.append(self.get_current_value(close_price))
-                continue
+            # Kiểm tra lợi nhuận/lỗ trước
+            profit_pct = self.get_current_profit_pct(close_price)
             
-            # Strategy 1: Trend Filter - chỉ mua khi uptrend
-            is_uptrend = close_price > ema200 and ema50 > ema200
+            # Cắt lỗ
+            if profit_pct <= -(self.stop_loss * 100):
+                self.sell(close_price, timestamp, rsi, f'STOP_LOSS_{self.stop_loss*100:.1f}%')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
             
-            # Logic bán
-            if self.in_position:
-                if close_price > self.highest_price:
-                    self.highest_price = close_price
-                
-                # Kiểm tra lợi nhuận/lỗ trước
-                profit_pct = self.get_current_profit_pct(close_price)
-                
-                # Cắt lỗ
-                if profit_pct <= -(self.stop_loss * 100):
-                    self.sell(close_price, timestamp, rsi, f'STOP_LOSS_{self.stop_loss*100:.1f}%')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                # Chốt lãi
-                if profit_pct >= (self.take_profit * 100):
-                    self.sell(close_price, timestamp, rsi, f'TAKE_PROFIT_{self.take_profit*100:.0f}%')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
-                
-                # Bán khi RSI quá cao
-                if rsi >= self.rsi_sell:
-                    self.sell(close_price, timestamp, rsi, 'RSI_SELL')
-                    self.equity_curve.append(self.get_current_value(close_price))
-                    continue
+            # Chốt lãi
+            if profit_pct >= (self.take_profit * 100):
+                self.sell(close_price, timestamp, rsi, f'TAKE_PROFIT_{self.take_profit*100:.0f}%')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
             
-            # Logic mua với chiến lược cải tiến
-            can_buy = False
+            # Bán khi RSI quá cao
+            if rsi >= self.rsi_sell:
+                self.sell(close_price, timestamp, rsi, 'RSI_SELL')
+                self.equity_curve.append(self.get_current_value(close_price))
+                return
+        
+        # Logic mua với chiến lược cải tiến
+        can_buy = False
+        
+        # Chỉ mua khi RSI thấp VÀ có uptrend (Strategy 1)
+        if rsi <= self.rsi_buy and is_uptrend:
+            can_buy = True
             
-            # Chỉ mua khi RSI thấp VÀ có uptrend (Strategy 1)
-            if rsi <= self.rsi_buy and is_uptrend:
-                can_buy = True
+            # Volume filter - chỉ mua khi volume đủ
+            if volume < volume_ma * 0.8:
+                can_buy = False
+        
+        if can_buy:
+            if not self.in_position:
+                # Mua lần đầu
+                self.buy(close_price, timestamp, rsi, is_dca=False)
+            else:
+                # Strategy 2: Giảm DCA frequency
+                # Chỉ DCA khi:
+                # 1. Chưa đạt max DCA
+                # 2. Giá giảm đáng kể so với entry (ít nhất 3%)
+                # 3. Chưa DCA gần đây (giá giảm ít nhất 2% so với lần DCA trước)
+                avg_entry = self.get_average_entry_price()
+                price_drop_from_entry = ((avg_entry - close_price) / avg_entry) * 100
+                price_drop_from_last_dca = ((self.last_dca_price - close_price) / self.last_dca_price) * 100 if self.last_dca_price > 0 else 0
                 
-                # Volume filter - chỉ mua khi volume đủ
-                if volume < volume_ma * 0.8:
-                    can_buy = False
-            
-            if can_buy:
-                if not self.in_position:
-                    # Mua lần đầu
-                    self.buy(close_price, timestamp, rsi, is_dca=False)
-                else:
-                    # Strategy 2: Giảm DCA frequency
-                    # Chỉ DCA khi:
-                    # 1. Chưa đạt max DCA
-                    # 2. Giá giảm đáng kể so với entry (ít nhất 3%)
-                    # 3. Chưa DCA gần đây (giá giảm ít nhất 2% so với lần DCA trước)
-                    avg_entry = self.get_average_entry_price()
-                    price_drop_from_entry = ((avg_entry - close_price) / avg_entry) * 100
-                    price_drop_from_last_dca = ((self.last_dca_price - close_price) / self.last_dca_price) * 100 if self.last_dca_price > 0 else 0
-                    
-                    if (self.dca_count < self.max_dca and 
-                        is_red and 
-                        price_drop_from_entry >= 3.0 and  # Giá giảm ít nhất 3% từ entry
-                        price_drop_from_last_dca >= 2.0):  # Giá giảm ít nhất 2% từ lần DCA trước
-                        self.buy(close_price, timestamp, rsi, is_dca=True)
-            
-            self.equity_curve.append(self.get_current_value(close_price))
+                if (self.dca_count < self.max_dca and 
+                    is_red and 
+                    price_drop_from_entry >= 3.0 and  # Giá giảm ít nhất 3% từ entry
+                    price_drop_from_last_dca >= 2.0):  # Giá giảm ít nhất 2% từ lần DCA trước
+                    self.buy(close_price, timestamp, rsi, is_dca=True)
         
-        # Bán hết nếu còn position
+        self.equity_curve.append(self.get_current_value(close_price))
+    
+    def close_at_end(self, last_row, last_index):
+        """Bán hết nếu còn position ở nến cuối cùng"""
         if self.in_position:
-            last_row = df.iloc[-1]
             last_price = last_row['close']
             last_rsi = last_row['rsi14']
-            last_timestamp = last_row.get('timestamp', df.index[-1])
+            last_timestamp = last_row.get('timestamp', last_index)
             self.sell(last_price, last_timestamp, last_rsi, 'END_OF_DATA')
     
+    def run(self, df):
+        """Chạy backtest với chiến lược cải tiến"""
+        self.reset()
+        
+        if 'timestamp' not in df.columns and df.index.name == 'timestamp':
+            df = df.reset_index()
+        
+        # Tính các chỉ báo
+        self.prepare_indicators(df)
+        
+        for idx, row in df.iterrows():
+            self.process_candle(idx, row)
+        
+        # Bán hết nếu còn position
+        if self.in_position:
+            self.close_at_end(df.iloc[-1], df.index[-1])
+    
     def get_results(self):
         """Tính toán kết quả"""
         if len(self.trades) == 0:
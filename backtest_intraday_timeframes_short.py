@@ -4,12 +4,13 @@ Short logic: RSI14 >= 80 triggers short entry, DCA $500 per add, TP +5%, SL -2.5
 """
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime
 from backtest_fixed_amount_short import FixedAmountShortBacktestEngine
 from backtest_fixed_amount import PAIRS
 import os
+from ohlcv_schema import normalize_columns
+from downsample import downsample
+import trade_log
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -37,72 +38,15 @@ def run_backtest_on_df(df, rsi_period):
     return engine.get_results()
 
 def select_trades_near_target(trades):
-    if not trades:
-        return None
-    trades_sorted = sorted(trades, key=lambda x: pd.to_datetime(x['timestamp']))
-    sell_trades = [t for t in trades_sorted if t['type'] == 'COVER']
-    if not sell_trades:
-        return None
-    for trade in sell_trades:
-        trade_time = pd.to_datetime(trade['timestamp'])
-        trade['days_from_target'] = abs((trade_time - TARGET_DATE).total_seconds() / 86400)
-        trade['is_before'] = trade_time <= TARGET_DATE
-    sell_trades_sorted = sorted(sell_trades, key=lambda x: (not x['is_before'], x['days_from_target']))
-    selected_sells = sell_trades_sorted[:MAX_TRADES]
-    selected_sell_times = [pd.to_datetime(t['timestamp']) for t in selected_sells]
-    if not selected_sell_times:
-        return None
-    min_time = min(selected_sell_times)
-    max_time = max(selected_sell_times)
-    buffer_before = timedelta(hours=48)
-    buffer_after = timedelta(hours=24)
-    time_start = min_time - buffer_before
-    time_end = max_time + buffer_after
-    selected_trades = [
-        t for t in trades_sorted
-        if time_start <= pd.to_datetime(t['timestamp']) <= time_end
-    ]
-    return {
-        'selected_trades': selected_trades,
-        'selected_sells': selected_sells,
-        'time_start': time_start,
-        'time_end': time_end
-    }
+    """Return trades & sells closest to TARGET_DATE (max MAX_TRADES)"""
+    return trade_log.select_trades_near_target(trades, TARGET_DATE, MAX_TRADES, exit_type='COVER')
 
 def summarize_results_with_selection(results, selection):
-    selected_trades = selection['selected_trades']
-    selected_sells = [t for t in selected_trades if t['type'] == 'COVER']
-    if not selected_sells:
+    """Update stats so report only reflects selected trades"""
+    results = trade_log.summarize_selection(results, selection, exit_type='COVER')
+    if not results:
         return None
-    total_profit = sum(s.get('profit', 0) for s in selected_sells)
-    total_profit_pct = (total_profit / results['initial_capital']) * 100 if results['initial_capital'] else 0
-    winning = len([s for s in selected_sells if s.get('profit', 0) > 0])
-    losing = len([s for s in selected_sells if s.get('profit', 0) < 0])
-    win_rate = (winning / len(selected_sells) * 100) if selected_sells else 0
-    avg_profit = total_profit / len(selected_sells) if selected_sells else 0
-    avg_profit_pct = (
-        sum(s.get('profit_pct', 0) for s in selected_sells) / len(selected_sells)
-        if selected_sells else 0
-    )
-    sell_reasons = {}
-    for sell in selected_sells:
-        reason = sell.get('reason', 'UNKNOWN')
-        sell_reasons[reason] = sell_reasons.get(reason, 0) + 1
-
-    results['trades'] = selected_trades
-    results['total_trades'] = len(selected_sells)
-    results['selected_trades_count'] = len(selected_trades)
-    results['winning_trades'] = winning
-    results['losing_trades'] = losing
-    results['win_rate'] = win_rate
-    results['total_profit'] = total_profit
-    results['total_profit_pct'] = total_profit_pct
-    results['avg_profit'] = avg_profit
-    results['avg_profit_pct'] = avg_profit_pct
-    results['final_capital'] = results['initial_capital'] + total_profit
-    results['sell_reasons'] = sell_reasons
-    results['start_date'] = selection['time_start']
-    results['end_date'] = selection['time_end']
+    results['final_capital'] = results['initial_capital'] + results['total_profit']
     results['days'] = (selection['time_end'] - selection['time_start']).days + 1
     results['target_date'] = TARGET_DATE.strftime('%Y-%m-%d')
     return results
@@ -122,13 +66,7 @@ def backtest_timeframe_short(pair, timeframe='6H'):
         return None
     try:
         df = pd.read_csv(filename)
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
             df = df.sort_values('timestamp').reset_index(drop=True)
@@ -162,7 +100,9 @@ def backtest_timeframe_short(pair, timeframe='6H'):
         print(f"Error short backtesting {pair} {timeframe}: {e}")
         return None
 
-def generate_png_report_short(pair, timeframe, results):
+def generate_png_report_short(pair, timeframe, results, max_points=None):
+    import matplotlib.pyplot as plt
+
     if not results or not results.get('trades'):
         return None
     fig = plt.figure(figsize=(24, 40))
@@ -274,8 +214,8 @@ def generate_png_report_short(pair, timeframe, results):
 
     if results.get('equity_curve'):
         ax_equity = fig.add_axes([0.05, y_pos - 0.12, 0.9, 0.12])
-        equity = results['equity_curve']
-        ax_equity.plot(equity, linewidth=2.5, color='#D32F2F', label='Equity Curve (Short)')
+        candles, equity = downsample(results['equity_curve'], max_points)
+        ax_equity.plot(candles, equity, linewidth=2.5, color='#D32F2F', label='Equity Curve (Short)')
         ax_equity.axhline(y=results['initial_capital'], color='gray', linestyle='--',
                          linewidth=2, label='Initial Capital', alpha=0.7)
         ax_equity.set_title(f'Equity Curve - {pair} ({timeframe})', fontsize=12, fontweight='bold')
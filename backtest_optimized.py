@@ -7,8 +7,9 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 from backtest_improved import ImprovedBacktestEngine, PAIRS
+from ohlcv_schema import normalize_columns
+from downsample import downsample
 
 def load_optimal_params():
     """Đọc tham số tối ưu từ file CSV"""
@@ -52,14 +53,7 @@ def backtest_pair_optimized(pair, params, start_date=None, end_date=None):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -96,8 +90,10 @@ def backtest_pair_optimized(pair, params, start_date=None, end_date=None):
         print(f"  ✗ Lỗi khi backtest {pair}: {e}")
         return None
 
-def main():
-    """Chạy backtest với tham số tối ưu cho từng cặp"""
+def main(max_points=None):
+    """Chạy backtest với tham số tối ưu cho từng cặp (max_points: ngân sách điểm mỗi biểu đồ equity, xem downsample.py)"""
+    import matplotlib.pyplot as plt
+
     print("=" * 80)
     print("BACKTEST VỚI THAM SỐ TỐI ƯU CHO TỪNG CẶP")
     print("=" * 80)
@@ -286,9 +282,9 @@ def main():
         
         for idx, (pair, results) in enumerate([(p, r) for p, r in all_results.items() if r]):
             ax = axes[idx]
-            equity = results['equity_curve']
+            candles, equity = downsample(results['equity_curve'], max_points)
             
-            ax.plot(equity, label=f'{pair} Equity Curve', linewidth=2)
+            ax.plot(candles, equity, label=f'{pair} Equity Curve', linewidth=2)
             ax.axhline(y=results['initial_capital'], color='r', linestyle='--', 
                       label='Initial Capital', alpha=0.7)
             ax.set_title(f'{pair} - Final: ${results["final_capital"]:,.2f} '
@@ -0,0 +1,161 @@
+"""
+Checkpoint cho các lần tối ưu chạy lâu
+- Mỗi combination xong được ghi một dòng JSON vào file append-only (.jsonl)
+- Ghi có khóa file (flock) nên nhiều process cùng ghi vào một checkpoint vẫn an toàn
+  (các process chạy song song cần cùng dùng --resume để không xóa checkpoint của nhau)
+- Best-so-far được lưu định kỳ ra file snapshot (.best.json) bằng ghi tạm + rename (atomic)
+- Khi --resume: đọc lại checkpoint, bỏ qua các combination đã xong
+- File kết quả cuối cùng được gộp theo khóa (vd. pair/timeframe) dưới cùng khóa file,
+  nên các process chạy song song không ghi đè kết quả của nhau
+"""
+
+import json
+import os
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: không có flock, chỉ dựa vào append
+    fcntl = None
+
+SNAPSHOT_EVERY = 20
+
+def make_key(*parts):
+    """Khóa của một combination (chuỗi JSON của các thành phần)"""
+    return json.dumps(parts, default=_json_default)
+
+def _json_default(value):
+    if hasattr(value, 'item'):
+        return value.item()  # Kiểu số numpy
+    return str(value)
+
+class Checkpoint:
+    """
+    Checkpoint append-only cho một lần tối ưu
+
+    Parameters:
+    - path: File checkpoint (.jsonl)
+    - resume: True = đọc lại kết quả đã có; False = bắt đầu mới (xóa checkpoint cũ)
+    - snapshot_every: Ghi snapshot best-so-far sau mỗi N kết quả mới
+    """
+
+    def __init__(self, path, resume=False, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + '.best.json'
+        self.snapshot_every = snapshot_every
+        self.done = {}
+        self.best = {}
+        self._new_records = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if resume:
+            self._load()
+        else:
+            for stale in (self.path, self.snapshot_path, self.path + '.lock'):
+                if os.path.exists(stale):
+                    os.remove(stale)
+
+    @contextmanager
+    def _locked(self):
+        """Khóa độc quyền dùng chung giữa các process ghi vào cùng checkpoint"""
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Đọc lại mọi kết quả đã ghi (kể cả do process khác ghi)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Dòng cuối ghi dở khi bị dừng đột ngột
+                self.done[entry['key']] = entry['result']
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def get(self, key):
+        return self.done.get(key)
+
+    def record(self, key, result):
+        """Ghi kết quả một combination (kể cả None = không có kết quả)"""
+        line = json.dumps({'key': key, 'result': result}, default=_json_default) + '\n'
+        with self._locked(), open(self.path, 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.done[key] = result
+
+        self._new_records += 1
+        if self._new_records % self.snapshot_every == 0:
+            self.save_snapshot()
+
+    def update_best(self, group, record, score):
+        """Cập nhật best-so-far của một nhóm (ví dụ 'ADAUSDM 4H'), trả về True nếu tốt hơn"""
+        current = self.best.get(group)
+        if current is not None and score <= current['score']:
+            return False
+        self.best[group] = {'score': score, 'record': record}
+        return True
+
+    def save_snapshot(self):
+        """
+        Ghi best-so-far và số combination đã xong (ghi file tạm rồi rename)
+        Gộp với snapshot của các process khác: mỗi nhóm giữ kết quả có score cao nhất
+        """
+        with self._locked():
+            self._load()
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path) as f:
+                    for group, entry in json.load(f).get('best', {}).items():
+                        self.update_best(group, entry['record'], entry['score'])
+
+            snapshot = {'completed': len(self.done), 'best': self.best}
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2, default=_json_default)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+    def merge_table(self, path, rows, keys=('pair', 'timeframe')):
+        """
+        Gộp kết quả vào file CSV dùng chung (ghi file tạm rồi rename, dưới khóa checkpoint)
+        Dòng cũ trùng khóa với dòng mới được thay thế, dòng của các process khác được giữ lại
+
+        Parameters:
+        - path: File CSV kết quả
+        - rows: list dict kết quả của process này
+        - keys: Các cột xác định một dòng
+
+        Returns: DataFrame đã gộp
+        """
+        keys = list(keys)
+        new = pd.DataFrame(rows)
+        with self._locked():
+            if os.path.exists(path):
+                old = pd.read_csv(path)
+                if not new.empty and set(keys) <= set(old.columns):
+                    replaced = old.set_index(keys).index.isin(new.set_index(keys).index)
+                    old = old[~replaced]
+                merged = pd.concat([old, new], ignore_index=True) if not new.empty else old
+            elif new.empty:
+                return new
+            else:
+                merged = new
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            merged.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        return merged
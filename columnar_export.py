@@ -0,0 +1,173 @@
+"""
+Ghi bảng kết quả (lệnh giao dịch, tổng hợp, kết quả tối ưu) dạng CSV hoặc Parquet
+- csv: giống trước đây (pd.DataFrame(...).to_csv), tên file không đổi
+- parquet: cột có kiểu (timestamp là datetime, chuỗi lặp lại là category), nén zstd,
+  chia partition kiểu Hive theo pair/timeframe/strategy, vd. các file optimize_rsi_{pair}_{tf}.csv
+  thành một dataset optimize_rsi.parquet/pair=ADAUSDM/timeframe=4H/part-0.parquet
+  (mỗi chiến lược một dataset vì cột tham số khác nhau; pyarrow lấy schema từ file đầu tiên)
+  Đọc lại chỉ các cột/partition cần (read_table) nhanh hơn nhiều so với parse cả file CSV
+- Parquet cần pyarrow (pip install pyarrow); chưa cài thì tự ghi CSV
+- File tham số (optimal_params_*.csv) vẫn là CSV vì nhiều script đọc làm cấu hình
+
+Đặt biến môi trường RESULTS_FORMAT=parquet để đổi định dạng mặc định (mặc định csv).
+"""
+
+import importlib.util
+import os
+from urllib.parse import quote
+import pandas as pd
+
+FORMATS = ['csv', 'parquet']
+DEFAULT_FORMAT = os.environ.get('RESULTS_FORMAT', 'csv').lower()
+COMPRESSION = 'zstd'
+PARTITION_FILE = 'part-0.parquet'
+
+# Cột thời gian dạng chuỗi được đổi sang datetime
+DATETIME_COLUMNS = ('timestamp', 'date', 'entry_time', 'exit_time')
+
+_warned = []
+
+def has_parquet():
+    """pyarrow đã được cài chưa"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+def resolve_format(fmt=None):
+    """Định dạng ghi thực tế: fmt (None = RESULTS_FORMAT), parquet khi thiếu pyarrow thì về csv"""
+    fmt = (fmt or DEFAULT_FORMAT).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Định dạng không hợp lệ: {fmt} (chọn {', '.join(FORMATS)})")
+    if fmt == 'parquet' and not has_parquet():
+        if not _warned:
+            print("⚠ Chưa cài pyarrow (pip install pyarrow), ghi CSV thay cho Parquet")
+            _warned.append(True)
+        return 'csv'
+    return fmt
+
+def parquet_path(output):
+    """Đường dẫn Parquet tương ứng với file CSV: 'a/b.csv' -> 'a/b.parquet'"""
+    root, ext = os.path.splitext(output)
+    return (root if ext.lower() == '.csv' else output) + '.parquet'
+
+def typed_frame(df):
+    """
+    Bảng với kiểu cột cho Parquet: cột thời gian -> datetime, chuỗi lặp lại -> category
+
+    Parameters:
+    - df: DataFrame hoặc list dict
+    """
+    frame = df.copy() if isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+    for name in frame.columns:
+        column = frame[name]
+        if column.dtype != object and not pd.api.types.is_string_dtype(column):
+            continue
+        if name in DATETIME_COLUMNS or str(name).endswith(('_date', '_start', '_end')):
+            converted = pd.to_datetime(column, errors='coerce')
+            if converted.notna().sum() == column.notna().sum():
+                frame[name] = converted
+                continue
+        if (pd.api.types.infer_dtype(column, skipna=True) in ('string', 'empty')
+                and column.nunique(dropna=True) <= max(1, len(column) // 2)):
+            frame[name] = column.astype('category')
+        else:
+            frame[name] = column.astype('string')
+    return frame
+
+def _write_partition(frame, dataset, values):
+    """Ghi một partition (ghi đè partition cũ cùng giá trị)"""
+    path = os.path.join(dataset, *(f"{name}={quote(str(value), safe='')}" for name, value in values.items()))
+    os.makedirs(path, exist_ok=True)
+    frame = frame.drop(columns=[name for name in values if name in frame.columns])
+    frame.to_parquet(os.path.join(path, PARTITION_FILE), engine='pyarrow',
+                     compression=COMPRESSION, index=False)
+
+def export_table(df, output, fmt=None, partition=None, dataset=None):
+    """
+    Ghi bảng kết quả theo định dạng đã chọn
+
+    Parameters:
+    - df: DataFrame hoặc list dict
+    - output: File CSV (chế độ csv ghi đúng file này như trước)
+    - fmt: 'csv' hoặc 'parquet' (None = RESULTS_FORMAT)
+    - partition: dict {cột: giá trị} của cả bảng này (vd. pair/timeframe/strategy của một lần tối ưu,
+      chỉ partition đó được ghi đè), hoặc list cột có trong bảng để chia partition theo giá trị
+      (vd. ['pair'], cả dataset được ghi lại)
+    - dataset: Thư mục dataset Parquet khi có partition (mặc định: parquet_path(output))
+
+    Returns: đường dẫn đã ghi (file CSV, file .parquet hoặc thư mục dataset)
+    """
+    frame = df if isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+    if resolve_format(fmt) == 'csv':
+        frame.to_csv(output, index=False)
+        return output
+
+    frame = typed_frame(frame)
+    if not partition:
+        path = parquet_path(output)
+        frame.to_parquet(path, engine='pyarrow', compression=COMPRESSION, index=False)
+        return path
+
+    dataset = dataset or parquet_path(output)
+    if isinstance(partition, dict):
+        _write_partition(frame, dataset, partition)
+    else:
+        # Cả bảng được ghi lại: bỏ các partition của lần ghi trước (chỉ xóa file do module này tạo)
+        for root, _, files in os.walk(dataset):
+            if PARTITION_FILE in files:
+                os.remove(os.path.join(root, PARTITION_FILE))
+        partition = list(partition)
+        for values, group in frame.groupby(partition, observed=True, sort=False):
+            values = values if isinstance(values, tuple) else (values,)
+            _write_partition(group, dataset, dict(zip(partition, values)))
+    return dataset
+
+def _latest_mtime(path):
+    """mtime mới nhất của file hoặc mọi file trong thư mục dataset"""
+    if not os.path.isdir(path):
+        return os.path.getmtime(path)
+    return max((os.path.getmtime(os.path.join(root, name))
+                for root, _, files in os.walk(path) for name in files), default=0)
+
+def find_table(path):
+    """
+    File thực sự của một bảng kết quả: bản Parquet nếu có và mới hơn bản CSV, ngược lại CSV
+
+    Returns: (đường dẫn, 'csv' | 'parquet') hoặc None nếu không có bản nào
+    """
+    if path.endswith('.parquet') or os.path.isdir(path):
+        return (path, 'parquet') if os.path.exists(path) else None
+    parquet = parquet_path(path)
+    if os.path.exists(parquet) and has_parquet():
+        if not os.path.exists(path) or _latest_mtime(parquet) >= _latest_mtime(path):
+            return parquet, 'parquet'
+    return (path, 'csv') if os.path.exists(path) else None
+
+def read_table(path, columns=None, filters=None):
+    """
+    Đọc bảng kết quả (CSV hoặc Parquet), chỉ các cột và partition cần
+
+    Parameters:
+    - path: File CSV gốc, file .parquet hoặc thư mục dataset
+    - columns: Các cột cần đọc (None = tất cả); với Parquet chỉ các cột này được giải nén
+    - filters: dict {cột: giá trị hoặc list giá trị}; với dataset có partition, thư mục
+      không khớp không được đọc
+
+    Returns: DataFrame hoặc None nếu không có file
+    """
+    found = find_table(path)
+    if found is None:
+        return None
+    path, fmt = found
+    filters = {name: value if isinstance(value, (list, tuple, set)) else [value]
+               for name, value in (filters or {}).items()}
+
+    if fmt == 'parquet':
+        return pd.read_parquet(path, engine='pyarrow', columns=columns,
+                               filters=[(name, 'in', list(values)) for name, values in filters.items()] or None)
+
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + list(filters)))
+    df = pd.read_csv(path, usecols=usecols)
+    for name, values in filters.items():
+        df = df[df[name].astype(str).isin([str(value) for value in values])]
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
@@ -2,9 +2,19 @@
 Script so sánh chiến lược cũ và mới
 """
 
+import os
 import pandas as pd
 import subprocess
 import sys
+import time
+from columnar_export import find_table, read_table
+
+# File tổng hợp (CSV hoặc Parquet) mà mỗi script backtest ghi
+SUMMARY_FILES = {
+    'backtest.py': 'backtest_summary.csv',
+    'backtest_improved.py': 'backtest_improved_summary.csv',
+}
+SUMMARY_COLUMNS = ['Initial Capital', 'Final Capital']
 
 def run_backtest(script_name):
     """Chạy backtest và lấy kết quả"""
@@ -49,11 +59,42 @@ def extract_results(output):
     
     return results
 
+def load_summary(filename, since=None):
+    """
+    Tổng vốn và lợi nhuận từ file tổng hợp của script backtest (chỉ đọc các cột cần)
+
+    Parameters:
+    - filename: File tổng hợp (bản Parquet cùng tên được ưu tiên nếu mới hơn)
+    - since: Bỏ qua file ghi trước thời điểm này (kết quả của lần chạy cũ)
+    """
+    found = find_table(filename)
+    if found is None or (since is not None and os.path.getmtime(found[0]) < since):
+        return {}
+    df = read_table(found[0], columns=SUMMARY_COLUMNS)
+    initial = float(df['Initial Capital'].sum())
+    final = float(df['Final Capital'].sum())
+    if not initial:
+        return {}
+    return {
+        'initial': initial,
+        'final': final,
+        'profit': final - initial,
+        'profit_pct': (final - initial) / initial * 100
+    }
+
+def strategy_results(script_name, output, since):
+    """Kết quả của một script: đọc file tổng hợp, không có thì trích từ output"""
+    results = load_summary(SUMMARY_FILES[script_name], since)
+    if not results and output:
+        results = extract_results(output)
+    return results
+
 def main():
     print("=" * 60)
     print("SO SÁNH CHIẾN LƯỢC CŨ VÀ MỚI")
     print("=" * 60)
     
+    started = time.time()
     print("\n1. Chạy chiến lược cũ...")
     old_output, old_error = run_backtest('backtest.py')
     
@@ -64,8 +105,8 @@ def main():
     print("KẾT QUẢ SO SÁNH")
     print("=" * 60)
     
-    old_results = extract_results(old_output) if old_output else {}
-    new_results = extract_results(new_output) if new_output else {}
+    old_results = strategy_results('backtest.py', old_output, started)
+    new_results = strategy_results('backtest_improved.py', new_output, started)
     
     if old_results and new_results:
         print(f"\n{'Chỉ số':<30} {'Chiến lược Cũ':<20} {'Chiến lược Mới':<20} {'Thay đổi':<15}")
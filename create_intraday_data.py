@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from ohlcv_schema import normalize_columns
 
 def create_intraday_from_daily(df, timeframe_hours=8):
     """
@@ -107,14 +108,7 @@ def main():
             try:
                 df = pd.read_csv(filename)
                 
-                column_mapping = {
-                    'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-                    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                }
-                
-                for old_name, new_name in column_mapping.items():
-                    if old_name in df.columns:
-                        df = df.rename(columns={old_name: new_name})
+                df = normalize_columns(df)
                 
                 print(f"  → Đang xử lý {pair}...")
                 print(f"    Số nến daily: {len(df)}")
@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from ohlcv_schema import normalize_columns
 
 def create_intraday_from_daily(df, timeframe_hours):
     """
@@ -104,14 +105,7 @@ def convert_pair_to_timeframe(pair, timeframe='6H'):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' not in df.columns:
             print(f"✗ Không tìm thấy cột timestamp trong {pair}")
@@ -0,0 +1,284 @@
+"""
+Kiểm tra chất lượng dữ liệu OHLCV (vectorized) và lưu quality index cạnh file dữ liệu
+- Gap: các đoạn thiếu nến so với khung thời gian
+- Duplicate: các đoạn nhiều nến trùng timestamp
+- Bad candle: high < low, open/close nằm ngoài [low, high], giá <= 0, thiếu giá trị, volume âm
+
+Index lưu tại data/{pair}_ohlcv_{tf}.quality.json kèm fingerprint của file (size, mtime),
+engine dùng lại index để bỏ qua/sửa các đoạn lỗi mà không phải quét lại file mỗi lần chạy.
+Vị trí dòng trong index tính theo thứ tự sau khi sắp xếp ổn định (stable) theo timestamp.
+"""
+
+import argparse
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from ohlcv_schema import normalize_columns, to_epoch_ns
+from ohlcv_store import DATA_DIR, timeframe_to_ns
+
+QUALITY_INDEX_VERSION = 1
+# Chế độ xử lý dữ liệu lỗi của các loader (tùy chọn --quality của sweep/optimize/walk_forward/...)
+QUALITY_MODES = ['skip', 'repair']
+
+# Cờ lỗi cho từng nến (bitmask)
+BAD_HIGH_LOW = 1          # high < low
+BAD_BODY = 2              # open/close nằm ngoài [low, high]
+NON_POSITIVE_PRICE = 4    # giá <= 0
+MISSING_VALUE = 8         # thiếu giá trị OHLC
+NEGATIVE_VOLUME = 16      # volume âm
+
+FLAG_NAMES = {
+    BAD_HIGH_LOW: 'HIGH_BELOW_LOW',
+    BAD_BODY: 'BODY_OUTSIDE_RANGE',
+    NON_POSITIVE_PRICE: 'NON_POSITIVE_PRICE',
+    MISSING_VALUE: 'MISSING_VALUE',
+    NEGATIVE_VOLUME: 'NEGATIVE_VOLUME',
+}
+
+def quality_index_path(data_path):
+    """Đường dẫn file quality index nằm cạnh file dữ liệu"""
+    return os.path.splitext(data_path)[0] + '.quality.json'
+
+def file_fingerprint(path):
+    """Fingerprint rẻ của file dữ liệu để biết index còn hợp lệ hay không"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _runs(mask):
+    """Tìm các đoạn liên tiếp True trong mask, trả về (starts, ends) với ends không bao gồm"""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def _iso(ns):
+    return pd.Timestamp(int(ns)).isoformat()
+
+def candle_flags(df):
+    """Tính bitmask lỗi cho từng nến (vectorized)"""
+    o = df['open'].to_numpy(dtype='float64')
+    h = df['high'].to_numpy(dtype='float64')
+    l = df['low'].to_numpy(dtype='float64')
+    c = df['close'].to_numpy(dtype='float64')
+
+    flags = np.zeros(len(df), dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        flags |= np.where(h < l, BAD_HIGH_LOW, 0)
+        flags |= np.where((np.maximum(o, c) > h) | (np.minimum(o, c) < l), BAD_BODY, 0)
+        flags |= np.where((o <= 0) | (h <= 0) | (l <= 0) | (c <= 0), NON_POSITIVE_PRICE, 0)
+        flags |= np.where(np.isnan(o) | np.isnan(h) | np.isnan(l) | np.isnan(c), MISSING_VALUE, 0)
+        if 'volume' in df.columns:
+            flags |= np.where(df['volume'].to_numpy(dtype='float64') < 0, NEGATIVE_VOLUME, 0)
+    return flags
+
+def build_quality_index(df, timeframe=None):
+    """
+    Quét DataFrame OHLCV (đã sắp xếp ổn định theo timestamp) và tạo quality index
+
+    Parameters:
+    - df: DataFrame có cột timestamp, open, high, low, close (volume tùy chọn)
+    - timeframe: Khung thời gian ('4H', '1D', ...); None = suy ra từ khoảng cách phổ biến nhất
+    """
+    ts, _ = to_epoch_ns(df['timestamp'])
+    diffs = np.diff(ts)
+
+    if timeframe is not None:
+        interval = timeframe_to_ns(timeframe)
+    else:
+        positive = diffs[diffs > 0]
+        interval = int(np.median(positive)) if len(positive) else 0
+
+    # Gap: khoảng cách lớn hơn 1 nến
+    gaps = []
+    if interval > 0:
+        gap_rows = np.flatnonzero(diffs > interval)
+        missing = -(-diffs[gap_rows] // interval) - 1
+        for row, count in zip(gap_rows.tolist(), missing.tolist()):
+            gaps.append({
+                'after_row': row,
+                'start': _iso(ts[row] + interval),
+                'end': _iso(ts[row + 1] - interval),
+                'missing_bars': max(int(count), 1)
+            })
+
+    # Duplicate: các nến liên tiếp có cùng timestamp
+    duplicates = []
+    dup_starts, dup_ends = _runs(diffs == 0)
+    for start, end in zip(dup_starts.tolist(), dup_ends.tolist()):
+        duplicates.append({
+            'start_row': start,
+            'end_row': end,
+            'timestamp': _iso(ts[start]),
+            'count': end - start + 1
+        })
+
+    # Bad candle: gộp các nến lỗi liên tiếp thành một đoạn
+    flags = candle_flags(df)
+    bad_candles = []
+    bad_starts, bad_ends = _runs(flags != 0)
+    if len(bad_starts):
+        span_flags = np.bitwise_or.reduceat(flags, bad_starts)
+        for start, end, mask in zip(bad_starts.tolist(), bad_ends.tolist(), span_flags.tolist()):
+            bad_candles.append({
+                'start_row': start,
+                'end_row': end - 1,
+                'flags': [name for bit, name in FLAG_NAMES.items() if mask & bit]
+            })
+
+    return {
+        'version': QUALITY_INDEX_VERSION,
+        'timeframe': timeframe,
+        'interval_ns': interval,
+        'rows': int(len(df)),
+        'first_timestamp': _iso(ts[0]) if len(ts) else None,
+        'last_timestamp': _iso(ts[-1]) if len(ts) else None,
+        'gaps': gaps,
+        'duplicates': duplicates,
+        'bad_candles': bad_candles,
+        'summary': {
+            'gap_runs': len(gaps),
+            'missing_bars': int(sum(g['missing_bars'] for g in gaps)),
+            'duplicate_spans': len(duplicates),
+            'duplicate_rows': int(sum(d['count'] - 1 for d in duplicates)),
+            'bad_rows': int(np.count_nonzero(flags))
+        }
+    }
+
+def read_sorted_ohlcv(data_path):
+    """Đọc file OHLCV, chuẩn hóa cột và sắp xếp ổn định theo timestamp"""
+    df = normalize_columns(pd.read_csv(data_path))
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+def save_quality_index(index, data_path):
+    """Lưu quality index cạnh file dữ liệu"""
+    index = dict(index, source=os.path.basename(data_path), fingerprint=file_fingerprint(data_path))
+    with open(quality_index_path(data_path), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def load_quality_index(data_path):
+    """Đọc quality index nếu còn khớp với file dữ liệu hiện tại, ngược lại trả về None"""
+    path = quality_index_path(data_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != QUALITY_INDEX_VERSION:
+        return None
+    if index.get('fingerprint') != file_fingerprint(data_path):
+        return None
+    return index
+
+def get_quality_index(data_path, timeframe=None, df=None):
+    """
+    Lấy quality index từ cache, chỉ quét lại khi file dữ liệu đã thay đổi
+    hoặc khi timeframe chỉ định có độ dài nến khác với index đã lưu (vd. index tạo với khung tự suy ra)
+    """
+    index = load_quality_index(data_path)
+    if index is not None and (timeframe is None or index['interval_ns'] == timeframe_to_ns(timeframe)):
+        return index
+    if df is None:
+        df = read_sorted_ohlcv(data_path)
+    return save_quality_index(build_quality_index(df, timeframe), data_path)
+
+def apply_quality_index(df, index, mode='skip'):
+    """
+    Xử lý các đoạn bị đánh dấu trong quality index (không quét lại dữ liệu)
+
+    Parameters:
+    - df: DataFrame đã sắp xếp ổn định theo timestamp (cùng thứ tự khi tạo index)
+    - mode: 'skip' = bỏ nến trùng/lỗi; 'repair' = bỏ nến trùng, sửa nến lỗi, lấp gap bằng nến phẳng
+    """
+    if mode not in ('skip', 'repair'):
+        raise ValueError(f"mode không hợp lệ: {mode}")
+    if len(df) != index['rows']:
+        raise ValueError(f"Quality index có {index['rows']} dòng, DataFrame có {len(df)} dòng")
+
+    # Giữ nến đầu tiên của mỗi đoạn trùng timestamp (giống drop_duplicates)
+    keep = np.ones(len(df), dtype=bool)
+    for dup in index['duplicates']:
+        keep[dup['start_row'] + 1:dup['end_row'] + 1] = False
+
+    bad = np.zeros(len(df), dtype=bool)
+    for span in index['bad_candles']:
+        bad[span['start_row']:span['end_row'] + 1] = True
+
+    if mode == 'skip':
+        return df[keep & ~bad].reset_index(drop=True)
+
+    df = df.copy()
+    if bad.any():
+        rows = np.flatnonzero(bad)
+        prices = df.loc[rows, ['open', 'high', 'low', 'close']].astype('float64')
+        prices = prices.where(prices > 0)
+        df.loc[rows, ['open', 'high', 'low', 'close']] = prices.to_numpy()
+        # Giá thiếu/không hợp lệ lấy theo close của nến trước
+        df['close'] = df['close'].ffill()
+        for col in ('open', 'high', 'low'):
+            df[col] = df[col].fillna(df['close'])
+        ohlc = df.loc[rows, ['open', 'high', 'low', 'close']].to_numpy()
+        df.loc[rows, 'high'] = ohlc.max(axis=1)
+        df.loc[rows, 'low'] = ohlc.min(axis=1)
+        if 'volume' in df.columns:
+            df.loc[rows, 'volume'] = df.loc[rows, 'volume'].clip(lower=0)
+
+    # Lấp gap bằng nến phẳng (OHLC = close trước đó, volume = 0)
+    fillers = []
+    interval = index['interval_ns']
+    for gap in index['gaps']:
+        row = gap['after_row']
+        base = pd.Timestamp(df['timestamp'].iloc[row])
+        stamps = base + pd.to_timedelta(interval * np.arange(1, gap['missing_bars'] + 1), unit='ns')
+        last_close = df['close'].iloc[row]
+        filler = pd.DataFrame({'timestamp': stamps, 'open': last_close, 'high': last_close,
+                               'low': last_close, 'close': last_close})
+        if 'volume' in df.columns:
+            filler['volume'] = 0.0
+        fillers.append(filler)
+
+    df = df[keep]
+    if fillers:
+        df = pd.concat([df] + fillers, ignore_index=True)
+        df = df.sort_values('timestamp', kind='stable')
+    return df.dropna(subset=['close']).reset_index(drop=True)
+
+def print_quality_summary(name, index):
+    """In tóm tắt chất lượng dữ liệu của một file"""
+    summary = index['summary']
+    status = "✓" if not (summary['gap_runs'] or summary['duplicate_rows'] or summary['bad_rows']) else "⚠"
+    print(f"  {status} {name}: {index['rows']} nến | "
+          f"Gap: {summary['gap_runs']} đoạn ({summary['missing_bars']} nến thiếu) | "
+          f"Trùng: {summary['duplicate_rows']} nến | Lỗi OHLC: {summary['bad_rows']} nến")
+
+def main():
+    """Tạo quality index cho tất cả các file OHLCV trong thư mục data"""
+    parser = argparse.ArgumentParser(description='Kiểm tra chất lượng dữ liệu OHLCV')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--rebuild', action='store_true', help='Bỏ qua cache và quét lại toàn bộ')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("KIỂM TRA CHẤT LƯỢNG DỮ LIỆU OHLCV")
+    print("=" * 80)
+
+    files = sorted(glob.glob(os.path.join(args.data_dir, '*_ohlcv*.csv')))
+    if not files:
+        print(f"✗ Không tìm thấy file dữ liệu trong {args.data_dir}/")
+        return
+
+    for data_path in files:
+        if args.rebuild:
+            index = save_quality_index(build_quality_index(read_sorted_ohlcv(data_path)), data_path)
+        else:
+            index = get_quality_index(data_path)
+        print_quality_summary(os.path.basename(data_path), index)
+
+    print(f"\n✓ Đã lưu quality index cạnh {len(files)} file dữ liệu (*.quality.json)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""
+Quét tham số phân tán trên nhiều máy (coordinator/worker)
+- Coordinator chia các sweep (chiến lược × cặp × khung thời gian × grid) thành chunk
+- Worker (máy khác hoặc cùng máy) kết nối TCP tới coordinator, nhận chunk, đọc dữ liệu
+  từ columnar store/CSV của máy mình, backtest rồi gửi kết quả về
+- Mỗi chunk giao cho worker có thời hạn (lease); worker gửi heartbeat trong lúc chạy.
+  Worker mất kết nối hoặc quá hạn lease thì chunk được giao lại cho worker khác
+- Chunk đã xong được ghi vào checkpoint (--resume để chạy tiếp sau khi coordinator dừng)
+
+Ví dụ:
+  python distributed_sweep.py coordinator --host 0.0.0.0 --port 6000 --strategies rsi,adx
+  python distributed_sweep.py worker --host <ip coordinator> --port 6000
+  python distributed_sweep.py local --workers 4    # coordinator + 4 worker trên máy này
+
+Kết nối dùng pickle nên bắt buộc có authkey chung (--authkey hoặc biến môi trường SWEEP_AUTHKEY).
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+import pandas as pd
+from checkpoint import Checkpoint
+from columnar_export import FORMATS, export_table
+from data_quality import QUALITY_MODES
+from ohlcv_store import DATA_DIR, read_ohlcv
+from results_db import cached_backtest, default_score, source_fingerprint
+from robustness import robustness_metrics
+from strategies import STRATEGIES, load_engine, strategy_params
+from sweep import effective_params, engine_param_names, higher_timeframe_fingerprint, load_higher_timeframe
+
+PAIRS = ['iBTCUSDM', 'iETHUSDM', 'ADAUSDM', 'WMTXUSDM', 'IAGUSDM', 'SNEKUSDM']
+TIMEFRAMES = ['1H', '2H', '4H', '6H', '8H', '12H', '1D']
+
+DEFAULT_PORT = 6000
+CHUNK_SIZE = 20
+LEASE_TIMEOUT = 300     # Giây: chunk được giao lại nếu worker im lặng quá thời gian này
+MAX_ATTEMPTS = 3        # Số lần thử một chunk trước khi đánh dấu lỗi
+CONNECT_TIMEOUT = 30    # Giây worker chờ coordinator khởi động
+CHECKPOINT_FILE = 'checkpoints/distributed_sweep.jsonl'
+
+DEFAULT_STRATEGIES = ['rsi', 'adx', 'psar', 'advanced']
+
+def build_chunks(strategies, pairs, timeframes, chunk_size=CHUNK_SIZE, quality=None):
+    """
+    Chia toàn bộ sweep thành các chunk (id tất định để --resume nhận ra chunk đã xong)
+
+    Parameters:
+    - quality: 'skip'/'repair' = worker xử lý dữ liệu lỗi theo quality index (None = giữ nguyên)
+
+    Returns: danh sách dict {'id', 'strategy', 'pair', 'timeframe', 'quality', 'params'}
+    """
+    chunks = []
+    for strategy in strategies:
+        for timeframe in timeframes:
+            param_list = strategy_params(strategy, timeframe)
+            for pair in pairs:
+                for start in range(0, len(param_list), chunk_size):
+                    chunks.append({
+                        'id': f"{strategy}|{pair}|{timeframe}|{start}" + (f"|{quality}" if quality else ''),
+                        'strategy': strategy,
+                        'pair': pair,
+                        'timeframe': timeframe,
+                        'quality': quality,
+                        'params': param_list[start:start + chunk_size]
+                    })
+    return chunks
+
+def summarize_result(results):
+    """
+    Chỉ gửi các chỉ số tổng hợp về coordinator (không gửi danh sách lệnh/equity curve)
+    Chỉ số Monte Carlo (mc_*) tính trên worker khi còn danh sách lệnh
+    """
+    if not results:
+        return None
+    return {
+        'total_profit_pct': results['total_profit_pct'],
+        'win_rate': results['win_rate'],
+        'total_trades': results['total_trades'],
+        'final_capital': results['final_capital'],
+        'score': default_score(results),
+        **(robustness_metrics(results) or {})
+    }
+
+class Coordinator:
+    """
+    Phân phát chunk cho worker và thu kết quả
+
+    Parameters:
+    - chunks: Danh sách chunk (từ build_chunks)
+    - address: (host, port) lắng nghe
+    - authkey: Khóa xác thực chung với worker (bytes)
+    - lease_timeout: Thời hạn một chunk được giao (giây), gia hạn bằng heartbeat
+    - checkpoint: Checkpoint ghi chunk đã xong (chunk có sẵn trong checkpoint không giao lại)
+    """
+
+    def __init__(self, chunks, address, authkey, lease_timeout=LEASE_TIMEOUT, checkpoint=None):
+        self.chunks = {chunk['id']: chunk for chunk in chunks}
+        self.address = address
+        self.authkey = authkey
+        self.lease_timeout = lease_timeout
+        self.checkpoint = checkpoint
+
+        self.results = {}
+        if checkpoint is not None:
+            self.results = {chunk_id: checkpoint.get(chunk_id) for chunk_id in self.chunks
+                            if chunk_id in checkpoint}
+        self.pending = deque(chunk_id for chunk_id in self.chunks if chunk_id not in self.results)
+        self.leases = {}      # chunk_id -> (worker_id, hạn lease)
+        self.attempts = {}
+        self.failed = {}
+        self.reassigned = 0
+        self.workers_seen = set()
+
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._listener = None
+        self._check_done()
+
+    def _check_done(self):
+        if len(self.results) + len(self.failed) == len(self.chunks):
+            self._done.set()
+
+    def _requeue(self, chunk_id, reason):
+        """Trả chunk về hàng đợi (gọi khi đang giữ lock)"""
+        self.leases.pop(chunk_id, None)
+        if chunk_id in self.results:
+            return
+        self.reassigned += 1
+        self.pending.appendleft(chunk_id)
+        print(f"  ⚠ Giao lại chunk {chunk_id} ({reason})")
+
+    def _expire_leases(self):
+        now = time.monotonic()
+        for chunk_id, (worker_id, deadline) in list(self.leases.items()):
+            if deadline < now:
+                self._requeue(chunk_id, f"{worker_id} quá hạn lease")
+
+    def _next_chunk(self, worker_id):
+        """Chunk tiếp theo cho worker: ('chunk', chunk), ('wait', giây) hoặc ('done',)"""
+        with self._lock:
+            self._expire_leases()
+            self.workers_seen.add(worker_id)
+            while self.pending and self.pending[0] in self.results:
+                self.pending.popleft()  # Chunk bị giao lại nhưng worker cũ đã gửi kết quả
+            if self.pending:
+                chunk_id = self.pending.popleft()
+                self.leases[chunk_id] = (worker_id, time.monotonic() + self.lease_timeout)
+                self.attempts[chunk_id] = self.attempts.get(chunk_id, 0) + 1
+                return ('chunk', self.chunks[chunk_id])
+            if self.leases:
+                return ('wait', 1.0)  # Còn chunk đang chạy ở worker khác, có thể bị giao lại
+            return ('done',)
+
+    def _heartbeat(self, worker_id, chunk_id):
+        with self._lock:
+            lease = self.leases.get(chunk_id)
+            if lease is not None and lease[0] == worker_id:
+                self.leases[chunk_id] = (worker_id, time.monotonic() + self.lease_timeout)
+
+    def _complete(self, worker_id, chunk_id, results):
+        with self._lock:
+            if chunk_id in self.results:
+                return  # Chunk đã được worker khác (nhận giao lại) hoàn thành trước
+            self.leases.pop(chunk_id, None)
+            self.results[chunk_id] = results
+            if self.checkpoint is not None:
+                self.checkpoint.record(chunk_id, results)
+            self._check_done()
+
+    def _fail(self, worker_id, chunk_id, message):
+        with self._lock:
+            if chunk_id in self.results:
+                return
+            print(f"  ✗ {worker_id}: chunk {chunk_id} lỗi: {message}")
+            if self.attempts.get(chunk_id, 0) >= MAX_ATTEMPTS:
+                self.leases.pop(chunk_id, None)
+                self.failed[chunk_id] = message
+                self._check_done()
+            else:
+                self._requeue(chunk_id, 'lỗi khi chạy')
+
+    def _handle(self, conn):
+        """Phục vụ một worker (mỗi kết nối một thread)"""
+        worker_id = None
+        try:
+            while True:
+                message = conn.recv()
+                kind, worker_id = message[0], message[1]
+                if kind == 'get':
+                    conn.send(self._next_chunk(worker_id))
+                elif kind == 'heartbeat':
+                    self._heartbeat(worker_id, message[2])
+                    conn.send(('ok',))
+                elif kind == 'result':
+                    self._complete(worker_id, message[2], message[3])
+                    conn.send(('ok',))
+                elif kind == 'failed':
+                    self._fail(worker_id, message[2], message[3])
+                    conn.send(('ok',))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            # Worker mất kết nối: giao lại ngay các chunk nó đang giữ (không chờ hết lease)
+            with self._lock:
+                for chunk_id, (owner, _) in list(self.leases.items()):
+                    if owner == worker_id:
+                        self._requeue(chunk_id, f"{worker_id} mất kết nối")
+
+    def _accept_loop(self):
+        while not self._done.is_set():
+            try:
+                conn = self._listener.accept()
+            except Exception:
+                if self._done.is_set():
+                    return
+                continue  # Kết nối sai authkey hoặc bị ngắt khi bắt tay
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def start(self):
+        """Mở cổng lắng nghe (port 0 = hệ điều hành chọn port, xem self.address)"""
+        if self._listener is None:
+            self._listener = Listener(self.address, authkey=self.authkey)
+            self.address = self._listener.address
+            threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self.address
+
+    def serve(self, progress_interval=10.0):
+        """Chạy đến khi mọi chunk xong (hoặc lỗi quá số lần thử), trả về dict {chunk_id: kết quả}"""
+        self.start()
+
+        last_report = time.monotonic()
+        try:
+            while not self._done.wait(1.0):
+                with self._lock:
+                    self._expire_leases()
+                if time.monotonic() - last_report >= progress_interval:
+                    last_report = time.monotonic()
+                    print(f"  📊 {len(self.results)}/{len(self.chunks)} chunk xong | "
+                          f"{len(self.leases)} đang chạy | {len(self.workers_seen)} worker")
+        finally:
+            self._listener.close()
+            if self.checkpoint is not None:
+                self.checkpoint.save_snapshot()
+        return self.results
+
+class _FrameCache:
+    """Giữ dữ liệu của vài cặp/khung gần nhất trong worker (chunk liên tiếp thường cùng dữ liệu)"""
+
+    def __init__(self, data_dir, size=4):
+        self.data_dir = data_dir
+        self.size = size
+        self.frames = {}
+
+    def get(self, pair, timeframe, quality=None, higher_timeframe=False):
+        """
+        (df, dữ liệu khung cao hơn hoặc None, fingerprint) của một cặp/khung
+
+        Parameters:
+        - higher_timeframe: True = engine nhận higher_timeframe_df (engine advanced),
+          file khung cao hơn được đọc và đưa vào fingerprint
+        """
+        key = (pair, timeframe, quality, higher_timeframe)
+        if key not in self.frames:
+            if len(self.frames) >= self.size:
+                self.frames.pop(next(iter(self.frames)))
+            df = read_ohlcv(pair, timeframe, self.data_dir, quality=quality)
+            higher, fingerprint = None, None
+            if df is not None:
+                fingerprint = source_fingerprint(pair, timeframe, self.data_dir, df, quality)
+                if higher_timeframe:
+                    higher = load_higher_timeframe(pair, timeframe, quality, self.data_dir)
+                    fingerprint = higher_timeframe_fingerprint(fingerprint, higher)
+            self.frames[key] = (df, higher, fingerprint)
+        return self.frames[key]
+
+def run_chunk(chunk, frames, heartbeat=None, heartbeat_interval=30.0):
+    """
+    Backtest mọi tham số trong chunk
+
+    Returns: danh sách kết quả tóm tắt (cùng thứ tự chunk['params'])
+    """
+    engine_cls = load_engine(chunk['strategy'])
+    uses_higher = 'higher_timeframe_df' in engine_param_names(engine_cls)
+    df, higher, fingerprint = frames.get(chunk['pair'], chunk['timeframe'], chunk.get('quality'), uses_higher)
+    if df is None:
+        raise FileNotFoundError(f"Không có dữ liệu {chunk['pair']} {chunk['timeframe']}")
+
+    results = []
+    last_beat = time.monotonic()
+    for params in chunk['params']:
+        engine_params = {**params, 'higher_timeframe_df': higher} if uses_higher else params
+        # Khóa cache theo tham số hiệu lực giống sweep.sweep (optimize.py dùng chung kết quả)
+        result = cached_backtest(engine_cls, engine_params, df, fingerprint,
+                                 pair=chunk['pair'], timeframe=chunk['timeframe'],
+                                 key_params=effective_params(engine_cls, params))
+        results.append(summarize_result(result))
+        if heartbeat and time.monotonic() - last_beat >= heartbeat_interval:
+            heartbeat()
+            last_beat = time.monotonic()
+    return results
+
+def run_worker(address, authkey, data_dir=DATA_DIR, heartbeat_interval=None):
+    """
+    Worker: nhận chunk từ coordinator cho đến khi hết việc
+
+    Parameters:
+    - address: (host, port) của coordinator
+    - authkey: Khóa xác thực (bytes)
+    - data_dir: Thư mục dữ liệu trên máy worker
+    - heartbeat_interval: Khoảng gửi heartbeat (mặc định LEASE_TIMEOUT / 3)
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    heartbeat_interval = heartbeat_interval or LEASE_TIMEOUT / 3
+    frames = _FrameCache(data_dir)
+    completed = 0
+
+    conn = None
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while conn is None:
+        try:
+            conn = Client(address, authkey=authkey)
+        except (OSError, EOFError):
+            if time.monotonic() >= deadline:
+                print(f"✗ {worker_id}: không kết nối được coordinator {address}")
+                return 0
+            time.sleep(1.0)
+
+    with conn:
+        while True:
+            try:
+                conn.send(('get', worker_id))
+                reply = conn.recv()
+            except (EOFError, OSError):
+                break  # Coordinator đã dừng
+            if reply[0] == 'done':
+                break
+            if reply[0] == 'wait':
+                time.sleep(reply[1])
+                continue
+
+            chunk = reply[1]
+
+            def heartbeat():
+                conn.send(('heartbeat', worker_id, chunk['id']))
+                conn.recv()
+
+            try:
+                results = run_chunk(chunk, frames, heartbeat, heartbeat_interval)
+            except Exception as e:
+                conn.send(('failed', worker_id, chunk['id'], f"{type(e).__name__}: {e}"))
+                conn.recv()
+                continue
+            conn.send(('result', worker_id, chunk['id'], results))
+            conn.recv()
+            completed += 1
+
+    print(f"✓ {worker_id}: xong {completed} chunk")
+    return completed
+
+def results_frame(chunks, results):
+    """Gộp kết quả các chunk thành DataFrame (mỗi dòng một combination)"""
+    rows = []
+    for chunk in chunks:
+        for params, result in zip(chunk['params'], results.get(chunk['id']) or []):
+            if not result:
+                continue
+            rows.append({
+                'strategy': chunk['strategy'],
+                'pair': chunk['pair'],
+                'timeframe': chunk['timeframe'],
+                'params': ', '.join(f"{k}={v}" for k, v in params.items()
+                                    if k not in ('initial_capital', 'fixed_amount')),
+                **result
+            })
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df = df.sort_values('score', ascending=False, kind='stable').reset_index(drop=True)
+    return df
+
+def parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def main():
+    """Chạy coordinator, worker hoặc cả hai trên máy này (local)"""
+    parser = argparse.ArgumentParser(description='Quét tham số phân tán (coordinator/worker)')
+    parser.add_argument('mode', choices=['coordinator', 'worker', 'local'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--authkey', default=os.environ.get('SWEEP_AUTHKEY'),
+                        help='Khóa xác thực chung (mặc định biến môi trường SWEEP_AUTHKEY)')
+    parser.add_argument('--strategies', default=','.join(DEFAULT_STRATEGIES),
+                        help=f"Chiến lược (chọn trong {', '.join(STRATEGIES)})")
+    parser.add_argument('--pairs', default=','.join(PAIRS))
+    parser.add_argument('--timeframes', default=','.join(TIMEFRAMES))
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--lease', type=float, default=LEASE_TIMEOUT, help='Thời hạn lease chunk (giây)')
+    parser.add_argument('--workers', type=int, default=2, help='Số worker process (chế độ local)')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--resume', action='store_true', help='Bỏ qua chunk đã có trong checkpoint')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE)
+    parser.add_argument('--output', default='distributed_sweep_results.csv')
+    parser.add_argument('--quality', choices=QUALITY_MODES, default=None,
+                        help='Xử lý gap/trùng/nến lỗi theo quality index (mặc định: giữ nguyên dữ liệu)')
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help='Định dạng file kết quả (mặc định: RESULTS_FORMAT hoặc csv)')
+    args = parser.parse_args()
+
+    if args.mode == 'local' and not args.authkey:
+        authkey = os.urandom(16)
+    elif args.authkey:
+        authkey = args.authkey.encode()
+    else:
+        parser.error('cần --authkey hoặc biến môi trường SWEEP_AUTHKEY')
+    address = (args.host, args.port)
+
+    if args.mode == 'worker':
+        run_worker(address, authkey, args.data_dir, heartbeat_interval=args.lease / 3)
+        return
+
+    strategies = parse_list(args.strategies)
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"chiến lược không hợp lệ: {', '.join(unknown)} (chọn {', '.join(STRATEGIES)})")
+
+    chunks = build_chunks(strategies, parse_list(args.pairs), parse_list(args.timeframes), args.chunk_size,
+                          quality=args.quality)
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    coordinator = Coordinator(chunks, address, authkey, lease_timeout=args.lease, checkpoint=checkpoint)
+
+    print("=" * 80)
+    print("QUÉT THAM SỐ PHÂN TÁN")
+    print("=" * 80)
+    print(f"Chiến lược: {', '.join(strategies)} | {len(chunks)} chunk "
+          f"({sum(len(c['params']) for c in chunks)} backtest)")
+    if args.resume:
+        print(f"↻ Đã xong từ trước: {len(coordinator.results)} chunk")
+
+    processes = []
+    if len(coordinator.results) < len(chunks):
+        address = coordinator.start()
+        print(f"Lắng nghe tại {address[0]}:{address[1]} | lease {args.lease:.0f}s")
+    if args.mode == 'local' and len(coordinator.results) < len(chunks):
+        # spawn (không fork): worker không được thừa hưởng socket lắng nghe của coordinator
+        context = get_context('spawn')
+        for _ in range(args.workers):
+            process = context.Process(target=run_worker, args=(address, authkey, args.data_dir, args.lease / 3))
+            process.start()
+            processes.append(process)
+
+    started = time.time()
+    results = coordinator.serve()
+    for process in processes:
+        process.join()
+
+    print(f"\n✓ Xong {len(results)}/{len(chunks)} chunk trong {time.time() - started:.1f}s "
+          f"({coordinator.reassigned} lần giao lại)")
+    for chunk_id, message in coordinator.failed.items():
+        print(f"  ✗ {chunk_id}: {message}")
+
+    df = results_frame(chunks, results)
+    if df.empty:
+        print("✗ Không có kết quả")
+        return
+    output = export_table(df, args.output, args.format, partition=['strategy', 'pair', 'timeframe'])
+    print(f"✓ Đã lưu {len(df)} kết quả vào {output}")
+    print("\nTop 10:")
+    for _, row in df.head(10).iterrows():
+        print(f"  {row['strategy']:8s} {row['pair']:10s} {row['timeframe']:4s} | {row['total_profit_pct']:7.2f}% | "
+              f"{int(row['total_trades'])} lệnh | {row['params']}")
+
+if __name__ == "__main__":
+    main()
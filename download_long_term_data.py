@@ -7,6 +7,7 @@ import pandas as pd
 import time
 from datetime import datetime, timedelta
 import os
+from data_quality import get_quality_index, print_quality_summary
 
 PAIRS = [
     'iBTCUSDM',
@@ -223,6 +224,9 @@ def main():
             df.to_csv(filename, index=False)
             print(f"  ✓ Đã lưu vào {filename}")
             downloaded_files.append(filename)
+            
+            # Tạo quality index để engine không phải quét lại file khi chạy
+            print_quality_summary(os.path.basename(filename), get_quality_index(filename, '1D'))
         
         time.sleep(1)  # Tránh rate limit
     
@@ -0,0 +1,93 @@
+"""
+Giảm số điểm của chuỗi (equity curve, giá) trước khi vẽ biểu đồ
+- LTTB (Largest-Triangle-Three-Buckets): giữ hình dạng đường, chọn mỗi bucket một điểm
+  tạo tam giác lớn nhất với điểm đã chọn trước và trung bình bucket sau
+- min/max: giữ điểm thấp nhất và cao nhất mỗi bucket (không mất đỉnh/đáy, hợp cho drawdown)
+- Điểm đầu và cuối luôn được giữ; trục x trả về theo vị trí gốc (số nến) nên nhãn trục không đổi
+- Ngân sách điểm mặc định mỗi biểu đồ: CHART_MAX_POINTS (biến môi trường, mặc định 2000)
+"""
+
+import os
+import numpy as np
+
+DEFAULT_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 2000))
+METHODS = ['lttb', 'minmax']
+# Ngân sách nhỏ nhất mỗi phương pháp (ngân sách nhỏ hơn được nâng lên mức này)
+MIN_POINTS = {'lttb': 3, 'minmax': 4}
+
+def lttb_indices(y, n_out, x=None):
+    """
+    Vị trí các điểm được giữ theo LTTB
+
+    Parameters:
+    - y: Giá trị chuỗi
+    - n_out: Số điểm tối đa (nhỏ hơn 3 thì dùng 3: điểm đầu, cuối và một điểm giữa)
+    - x: Tọa độ x (mặc định 0..n-1)
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_out = max(n_out, MIN_POINTS['lttb'])
+    if n_out >= n:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # n_out - 2 bucket giữa điểm đầu và điểm cuối
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y, n_out):
+    """Vị trí các điểm được giữ theo min/max từng bucket (tối đa n_out điểm, ít nhất 4, theo thứ tự)"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_out = max(n_out, MIN_POINTS['minmax'])
+    if n_out >= n:
+        return np.arange(n)
+
+    buckets = (n_out - 2) // 2
+    bucket = np.repeat(np.arange(buckets), np.diff(np.linspace(0, n, buckets + 1).astype(np.int64)))
+    order = np.lexsort((y, bucket))  # Theo bucket, trong bucket tăng dần theo y
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate(([0, n - 1], order[starts], order[ends])))
+
+def downsample(y, max_points=None, method='lttb', x=None):
+    """
+    Giảm chuỗi về tối đa max_points điểm để vẽ
+
+    Parameters:
+    - y: Giá trị chuỗi (list hoặc mảng)
+    - max_points: Ngân sách điểm của biểu đồ (None = DEFAULT_MAX_POINTS, 0 = không giảm;
+      nhỏ hơn MIN_POINTS của phương pháp thì dùng MIN_POINTS)
+    - method: 'lttb' hoặc 'minmax'
+    - x: Tọa độ x (mặc định vị trí 0..n-1)
+
+    Returns: (mảng x, mảng y) đã giảm điểm
+    """
+    if method not in METHODS:
+        raise ValueError(f"Phương pháp không hợp lệ: {method} (chọn {', '.join(METHODS)})")
+    y = np.asarray(y, dtype=float)
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    max_points = DEFAULT_MAX_POINTS if max_points is None else max_points
+    if not max_points:
+        return x, y
+    max_points = max(max_points, MIN_POINTS[method])
+    if len(y) <= max_points:
+        return x, y
+
+    if method == 'lttb':
+        numeric_x = x if np.issubdtype(x.dtype, np.number) else None
+        index = lttb_indices(y, max_points, numeric_x)
+    else:
+        index = minmax_indices(y, max_points)
+    return x[index], y[index]
@@ -4,12 +4,11 @@ Mỗi báo cáo chứa 100 lệnh gần nhất (gần ngày 26/11/2025)
 """
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 from datetime import datetime, timedelta
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+from ohlcv_schema import normalize_columns
+from downsample import downsample
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -59,14 +58,7 @@ def backtest_timeframe(pair, params, timeframe='1D'):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -157,8 +149,10 @@ def backtest_timeframe(pair, params, timeframe='1D'):
         traceback.print_exc()
         return None
 
-def generate_png_report(pair, timeframe, results):
+def generate_png_report(pair, timeframe, results, max_points=None):
     """Tạo báo cáo PNG cho một cặp token trên một khung thời gian"""
+    import matplotlib.pyplot as plt
+
     if not results or not results.get('trades'):
         return None
     
@@ -374,15 +368,15 @@ def generate_png_report(pair, timeframe, results):
     # Equity curve
     if results.get('equity_curve'):
         ax_equity = fig.add_axes([0.05, y_pos - 0.12, 0.9, 0.12])
-        equity = results['equity_curve']
-        ax_equity.plot(equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
+        candles, equity = downsample(results['equity_curve'], max_points)
+        ax_equity.plot(candles, equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
         ax_equity.axhline(y=results['initial_capital'], color='red', linestyle='--',
                          linewidth=2, label='Vốn ban đầu', alpha=0.7)
-        ax_equity.fill_between(range(len(equity)), results['initial_capital'], equity,
-                              where=np.array(equity) >= results['initial_capital'],
+        ax_equity.fill_between(candles, results['initial_capital'], equity,
+                              where=equity >= results['initial_capital'],
                               alpha=0.3, color='green')
-        ax_equity.fill_between(range(len(equity)), results['initial_capital'], equity,
-                              where=np.array(equity) < results['initial_capital'],
+        ax_equity.fill_between(candles, results['initial_capital'], equity,
+                              where=equity < results['initial_capital'],
                               alpha=0.3, color='red')
         ax_equity.set_title(f'Equity Curve - {pair} ({timeframe})', fontsize=12, fontweight='bold')
         ax_equity.set_xlabel('Thời gian (Nến)', fontsize=10)
@@ -5,16 +5,13 @@ Vốn: $10,000, mỗi lệnh: $500
 """
 
 import pandas as pd
-import numpy as np
 from datetime import datetime
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+import sys
+from ohlcv_schema import normalize_columns
+from report_cache import ReportManifest, module_params, report_key, template_version
+from trade_log import exit_cycles, trade_frame
 
 # Tham số
 INITIAL_CAPITAL = 10000
@@ -56,14 +53,7 @@ def backtest_with_fixed_amount(pair, params, start_date=None, end_date=None):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -104,6 +94,15 @@ def backtest_with_fixed_amount(pair, params, start_date=None, end_date=None):
 
 def generate_pdf_report():
     """Tạo báo cáo PDF"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+    import pdf_stream
+    from pdf_stream import build_pdf, paginated_table, trade_cycle_rows
+
     print("=" * 80)
     print("TẠO BÁO CÁO PDF CHI TIẾT")
     print("=" * 80)
@@ -114,6 +113,7 @@ def generate_pdf_report():
     # Chạy backtest cho tất cả các cặp
     print("\n📊 Đang chạy backtest cho tất cả các cặp...")
     all_results = {}
+    pair_params = {}
     
     for pair in PAIRS:
         print(f"  Đang xử lý {pair}...")
@@ -130,13 +130,25 @@ def generate_pdf_report():
                 'use_volume_filter': False
             }
         
+        pair_params[pair] = params
         results = backtest_with_fixed_amount(pair, params)
+        if results:
+            # Báo cáo chỉ cần bảng lệnh dạng cột (không giữ equity curve và list dict)
+            results['trades'] = trade_frame(results['trades'])
+            results.pop('equity_curve', None)
         all_results[pair] = results
+
+    # Cùng tham số, kết quả và template: giữ file đã tạo, không dàn trang lại (xem report_cache.py)
+    manifest = ReportManifest()
+    key = report_key('pdf', {**module_params(sys.modules[__name__]), 'pair_params': pair_params}, all_results,
+                     template_version(generate_pdf_report, pdf_stream))
+    cached = manifest.lookup('pdf|1D', key)
+    if cached:
+        print(f"\n↻ Không có thay đổi, giữ báo cáo PDF: {cached['filename']}")
+        return cached['filename']
     
     # Tạo PDF
     filename = f"Backtest_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    story = []
     
     # Styles
     styles = getSampleStyleSheet()
@@ -158,276 +170,212 @@ def generate_pdf_report():
         spaceBefore=12
     )
     
-    # Title
-    story.append(Paragraph("BÁO CÁO BACKTEST CHIẾN LƯỢC RSI14 + DCA", title_style))
-    story.append(Paragraph("Cardano DEX Trading Strategy", styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph(f"Ngày tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", styles['Normal']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Phương pháp backtest
-    story.append(Paragraph("1. PHƯƠNG PHÁP BACKTEST", heading_style))
-    
-    method_text = """
-    <b>1.1. Nguồn dữ liệu:</b><br/>
-    - Dữ liệu OHLCV lịch sử từ CryptoCompare API (dữ liệu thực)
-    - Các cặp token: iBTCUSDM, iETHUSDM, ADAUSDM (dữ liệu thực 2 năm)
-    - Các cặp khác: WMTXUSDM, IAGUSDM, SNEKUSDM (dữ liệu mẫu)<br/><br/>
-    
-    <b>1.2. Chiến lược giao dịch:</b><br/>
-    - Mua khi RSI14 ≤ ngưỡng mua (tối ưu cho từng cặp)
-    - DCA: Mua thêm tại nến đỏ khi RSI14 < ngưỡng mua, tối đa 2-3 lần
-    - Bán khi RSI14 ≥ ngưỡng bán HOẶC lợi nhuận ≥ Take Profit HOẶC Stop Loss<br/><br/>
-    
-    <b>1.3. Tham số:</b><br/>
-    - Vốn ban đầu: $10,000
-    - Số tiền mỗi lệnh: $500 (cố định)
-    - Tham số tối ưu được tìm bằng cách test 324 combinations trên 4 khoảng thời gian<br/><br/>
-    
-    <b>1.4. Quản lý rủi ro:</b><br/>
-    - Stop Loss: 3-4% (tùy từng cặp)
-    - Trailing Stop: 3% từ đỉnh
-    - Giới hạn DCA: 2-3 lần tùy từng cặp
-    """
-    
-    story.append(Paragraph(method_text, styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Tổng hợp kết quả
-    story.append(Paragraph("2. TỔNG HỢP KẾT QUẢ", heading_style))
-    
-    summary_data = [['Cặp Token', 'Vốn Ban Đầu', 'Vốn Cuối', 'Lợi Nhuận', 'Lợi Nhuận %', 'Số Lệnh', 'Win Rate']]
-    
-    total_initial = 0
-    total_final = 0
-    
-    for pair in PAIRS:
-        if all_results.get(pair) and all_results[pair] is not None:
-            r = all_results[pair]
-            total_initial += r['initial_capital']
-            total_final += r['final_capital']
-            summary_data.append([
-                pair,
-                f"${r['initial_capital']:,.2f}",
-                f"${r['final_capital']:,.2f}",
-                f"${r['total_profit']:,.2f}",
-                f"{r['total_profit_pct']:+.2f}%",
-                str(r['total_trades']),
-                f"{r['win_rate']:.1f}%"
-            ])
-    
-    summary_data.append([
-        '<b>TỔNG</b>',
-        f"<b>${total_initial:,.2f}</b>",
-        f"<b>${total_final:,.2f}</b>",
-        f"<b>${total_final - total_initial:,.2f}</b>",
-        f"<b>{(total_final - total_initial) / total_initial * 100:+.2f}%</b>",
-        '',
-        ''
-    ])
-    
-    summary_table = Table(summary_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1*inch, 0.8*inch, 0.8*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-    ]))
-    
-    story.append(summary_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Chi tiết từng cặp
-    for pair in PAIRS:
-        if not all_results.get(pair) or all_results[pair] is None:
-            continue
-        
-        results = all_results[pair]
-        story.append(PageBreak())
-        story.append(Paragraph(f"3. CHI TIẾT CẶP: {pair}", heading_style))
-        
-        # Thông tin cơ bản
-        info_text = f"""
-        <b>Thời gian test:</b> {results['start_date'].strftime('%d/%m/%Y')} đến {results['end_date'].strftime('%d/%m/%Y')}<br/>
-        <b>Số ngày:</b> {results['days']} ngày<br/>
-        <b>Vốn ban đầu:</b> ${results['initial_capital']:,.2f}<br/>
-        <b>Vốn cuối cùng:</b> ${results['final_capital']:,.2f}<br/>
-        <b>Lợi nhuận:</b> ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%)<br/>
-        <b>Tổng số lệnh:</b> {results['total_trades']}<br/>
-        <b>Lệnh thắng:</b> {results['winning_trades']}<br/>
-        <b>Lệnh thua:</b> {results['losing_trades']}<br/>
-        <b>Tỷ lệ chính xác (Win Rate):</b> {results['win_rate']:.2f}%<br/>
-        <b>Lợi nhuận trung bình/lệnh:</b> ${results['avg_profit']:,.2f} ({results['avg_profit_pct']:+.2f}%)<br/>
+    def story():
+        """Các phần của báo cáo, sinh lần lượt khi PDF được dàn trang"""
+        # Title
+        yield Paragraph("BÁO CÁO BACKTEST CHIẾN LƯỢC RSI14 + DCA", title_style)
+        yield Paragraph("Cardano DEX Trading Strategy", styles['Normal'])
+        yield Spacer(1, 0.2*inch)
+        yield Paragraph(f"Ngày tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", styles['Normal'])
+        yield Spacer(1, 0.3*inch)
+        
+        # Phương pháp backtest
+        yield Paragraph("1. PHƯƠNG PHÁP BACKTEST", heading_style)
+        
+        method_text = """
+        <b>1.1. Nguồn dữ liệu:</b><br/>
+        - Dữ liệu OHLCV lịch sử từ CryptoCompare API (dữ liệu thực)
+        - Các cặp token: iBTCUSDM, iETHUSDM, ADAUSDM (dữ liệu thực 2 năm)
+        - Các cặp khác: WMTXUSDM, IAGUSDM, SNEKUSDM (dữ liệu mẫu)<br/><br/>
+        
+        <b>1.2. Chiến lược giao dịch:</b><br/>
+        - Mua khi RSI14 ≤ ngưỡng mua (tối ưu cho từng cặp)
+        - DCA: Mua thêm tại nến đỏ khi RSI14 < ngưỡng mua, tối đa 2-3 lần
+        - Bán khi RSI14 ≥ ngưỡng bán HOẶC lợi nhuận ≥ Take Profit HOẶC Stop Loss<br/><br/>
+        
+        <b>1.3. Tham số:</b><br/>
+        - Vốn ban đầu: $10,000
+        - Số tiền mỗi lệnh: $500 (cố định)
+        - Tham số tối ưu được tìm bằng cách test 324 combinations trên 4 khoảng thời gian<br/><br/>
+        
+        <b>1.4. Quản lý rủi ro:</b><br/>
+        - Stop Loss: 3-4% (tùy từng cặp)
+        - Trailing Stop: 3% từ đỉnh
+        - Giới hạn DCA: 2-3 lần tùy từng cặp
         """
         
-        story.append(Paragraph(info_text, styles['Normal']))
-        story.append(Spacer(1, 0.2*inch))
+        yield Paragraph(method_text, styles['Normal'])
+        yield Spacer(1, 0.2*inch)
         
-        # Tham số sử dụng
-        if pair in optimal_params:
-            params = optimal_params[pair]
-            params_text = f"""
-            <b>Tham số tối ưu:</b><br/>
-            - Take Profit: {params['take_profit']*100:.0f}%<br/>
-            - Stop Loss: {params['stop_loss']*100:.0f}%<br/>
-            - RSI Buy: {params['rsi_buy']}<br/>
-            - RSI Sell: {params['rsi_sell']}<br/>
-            - Max DCA: {params['max_dca']}<br/>
-            - Số tiền mỗi lệnh: ${POSITION_SIZE_FIXED:,.2f} (cố định)<br/>
-            - Vốn ban đầu: ${INITIAL_CAPITAL:,.2f}<br/>
-            """
-            story.append(Paragraph(params_text, styles['Normal']))
-            story.append(Spacer(1, 0.2*inch))
-        else:
-            params_text = f"""
-            <b>Tham số mặc định:</b><br/>
-            - Take Profit: 10%<br/>
-            - Stop Loss: 4%<br/>
-            - RSI Buy: 25<br/>
-            - RSI Sell: 75<br/>
-            - Max DCA: 3<br/>
-            - Số tiền mỗi lệnh: ${POSITION_SIZE_FIXED:,.2f} (cố định)<br/>
-            - Vốn ban đầu: ${INITIAL_CAPITAL:,.2f}<br/>
-            """
-            story.append(Paragraph(params_text, styles['Normal']))
-            story.append(Spacer(1, 0.2*inch))
+        # Tổng hợp kết quả
+        yield Paragraph("2. TỔNG HỢP KẾT QUẢ", heading_style)
+        
+        summary_data = [['Cặp Token', 'Vốn Ban Đầu', 'Vốn Cuối', 'Lợi Nhuận', 'Lợi Nhuận %', 'Số Lệnh', 'Win Rate']]
+        
+        total_initial = 0
+        total_final = 0
+        
+        for pair in PAIRS:
+            if all_results.get(pair) and all_results[pair] is not None:
+                r = all_results[pair]
+                total_initial += r['initial_capital']
+                total_final += r['final_capital']
+                summary_data.append([
+                    pair,
+                    f"${r['initial_capital']:,.2f}",
+                    f"${r['final_capital']:,.2f}",
+                    f"${r['total_profit']:,.2f}",
+                    f"{r['total_profit_pct']:+.2f}%",
+                    str(r['total_trades']),
+                    f"{r['win_rate']:.1f}%"
+                ])
+        
+        summary_data.append([
+            '<b>TỔNG</b>',
+            f"<b>${total_initial:,.2f}</b>",
+            f"<b>${total_final:,.2f}</b>",
+            f"<b>${total_final - total_initial:,.2f}</b>",
+            f"<b>{(total_final - total_initial) / total_initial * 100:+.2f}%</b>",
+            '',
+            ''
+        ])
         
-        # Bảng chi tiết lệnh
-        story.append(Paragraph("<b>Bảng chi tiết các lệnh giao dịch:</b>", styles['Normal']))
-        story.append(Spacer(1, 0.1*inch))
+        summary_table = Table(summary_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1*inch, 0.8*inch, 0.8*inch])
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]))
         
-        trades = results['trades']
-        if trades:
-            # Sắp xếp theo thời gian
-            trades_sorted = sorted(trades, key=lambda x: pd.to_datetime(x['timestamp']))
+        yield summary_table
+        yield Spacer(1, 0.3*inch)
+        
+        # Chi tiết từng cặp
+        for pair in PAIRS:
+            if not all_results.get(pair) or all_results[pair] is None:
+                continue
             
-            # Tách lệnh mua và bán
-            buy_trades = [t for t in trades_sorted if t['type'] in ['BUY', 'DCA']]
-            sell_trades = [t for t in trades_sorted if t['type'] == 'SELL']
+            results = all_results[pair]
+            yield PageBreak()
+            yield Paragraph(f"3. CHI TIẾT CẶP: {pair}", heading_style)
             
-            # Tạo bảng lệnh - hiển thị theo từng chu kỳ mua-bán
-            trades_data = [['STT', 'Ngày', 'Loại', 'Giá', 'Số Lượng', 'Vốn ($)', 'RSI', 'Lợi Nhuận ($)', 'Lợi Nhuận %', 'Lý Do']]
+            # Thông tin cơ bản
+            info_text = f"""
+            <b>Thời gian test:</b> {results['start_date'].strftime('%d/%m/%Y')} đến {results['end_date'].strftime('%d/%m/%Y')}<br/>
+            <b>Số ngày:</b> {results['days']} ngày<br/>
+            <b>Vốn ban đầu:</b> ${results['initial_capital']:,.2f}<br/>
+            <b>Vốn cuối cùng:</b> ${results['final_capital']:,.2f}<br/>
+            <b>Lợi nhuận:</b> ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%)<br/>
+            <b>Tổng số lệnh:</b> {results['total_trades']}<br/>
+            <b>Lệnh thắng:</b> {results['winning_trades']}<br/>
+            <b>Lệnh thua:</b> {results['losing_trades']}<br/>
+            <b>Tỷ lệ chính xác (Win Rate):</b> {results['win_rate']:.2f}%<br/>
+            <b>Lợi nhuận trung bình/lệnh:</b> ${results['avg_profit']:,.2f} ({results['avg_profit_pct']:+.2f}%)<br/>
+            """
             
-            trade_num = 1
-            buy_index = 0
+            yield Paragraph(info_text, styles['Normal'])
+            yield Spacer(1, 0.2*inch)
             
-            for sell in sell_trades:
-                sell_time = pd.to_datetime(sell['timestamp'])
-                
-                # Tìm các lệnh mua trước lệnh bán này
-                related_buys = []
-                while buy_index < len(buy_trades):
-                    buy_time = pd.to_datetime(buy_trades[buy_index]['timestamp'])
-                    if buy_time < sell_time:
-                        related_buys.append(buy_trades[buy_index])
-                        buy_index += 1
-                    else:
-                        break
-                
-                # Thêm các lệnh mua (theo thứ tự thời gian)
-                for buy in related_buys:
-                    trades_data.append([
-                        '',
-                        pd.to_datetime(buy['timestamp']).strftime('%d/%m/%Y'),
-                        buy['type'],
-                        f"${buy['price']:.4f}",
-                        f"{buy['amount']:.4f}",
-                        f"${buy.get('capital', 0):,.2f}",
-                        f"{buy.get('rsi', 0):.1f}",
-                        '',
-                        '',
-                        ''
-                    ])
-                
-                # Thêm lệnh bán
-                profit_color = 'green' if sell.get('profit', 0) > 0 else 'red'
-                trades_data.append([
-                    str(trade_num),
-                    pd.to_datetime(sell['timestamp']).strftime('%d/%m/%Y'),
-                    '<b>BÁN</b>',
-                    f"${sell['price']:.4f}",
-                    f"{sell['amount']:.4f}",
-                    f"${sell.get('proceeds', 0):,.2f}",
-                    f"{sell.get('rsi', 0):.1f}",
-                    f"<b>${sell.get('profit', 0):,.2f}</b>",
-                    f"<b>{sell.get('profit_pct', 0):+.2f}%</b>",
-                    sell.get('reason', '')
-                ])
-                
-                trade_num += 1
+            # Tham số sử dụng
+            if pair in optimal_params:
+                params = optimal_params[pair]
+                params_text = f"""
+                <b>Tham số tối ưu:</b><br/>
+                - Take Profit: {params['take_profit']*100:.0f}%<br/>
+                - Stop Loss: {params['stop_loss']*100:.0f}%<br/>
+                - RSI Buy: {params['rsi_buy']}<br/>
+                - RSI Sell: {params['rsi_sell']}<br/>
+                - Max DCA: {params['max_dca']}<br/>
+                - Số tiền mỗi lệnh: ${POSITION_SIZE_FIXED:,.2f} (cố định)<br/>
+                - Vốn ban đầu: ${INITIAL_CAPITAL:,.2f}<br/>
+                """
+                yield Paragraph(params_text, styles['Normal'])
+                yield Spacer(1, 0.2*inch)
+            else:
+                params_text = f"""
+                <b>Tham số mặc định:</b><br/>
+                - Take Profit: 10%<br/>
+                - Stop Loss: 4%<br/>
+                - RSI Buy: 25<br/>
+                - RSI Sell: 75<br/>
+                - Max DCA: 3<br/>
+                - Số tiền mỗi lệnh: ${POSITION_SIZE_FIXED:,.2f} (cố định)<br/>
+                - Vốn ban đầu: ${INITIAL_CAPITAL:,.2f}<br/>
+                """
+                yield Paragraph(params_text, styles['Normal'])
+                yield Spacer(1, 0.2*inch)
             
-            trades_table = Table(trades_data, colWidths=[0.4*inch, 0.9*inch, 0.5*inch, 0.7*inch, 
-                                                          0.7*inch, 0.8*inch, 0.5*inch, 0.7*inch, 0.7*inch, 1*inch])
-            trades_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
+            # Bảng chi tiết lệnh
+            yield Paragraph("<b>Bảng chi tiết các lệnh giao dịch:</b>", styles['Normal'])
+            yield Spacer(1, 0.1*inch)
             
-            story.append(trades_table)
-            story.append(Spacer(1, 0.2*inch))
-        
-        # Thống kê lý do bán
-        if results.get('sell_reasons'):
-            story.append(Paragraph("<b>Thống kê lý do bán:</b>", styles['Normal']))
-            reasons_data = [['Lý Do', 'Số Lần']]
-            for reason, count in results['sell_reasons'].items():
-                reasons_data.append([reason, str(count)])
+            trades = results['trades']
+            if len(trades):
+                # Bảng lệnh theo chu kỳ mua-bán, chia thành nhiều bảng nhỏ (ghi theo trang)
+                rows = trade_cycle_rows(exit_cycles(trades), '%d/%m/%Y', '<b>BÁN</b>', bold_profit=True)
+                yield from paginated_table(
+                    ['STT', 'Ngày', 'Loại', 'Giá', 'Số Lượng', 'Vốn ($)', 'RSI', 'Lợi Nhuận ($)', 'Lợi Nhuận %', 'Lý Do'],
+                    rows, [0.4*inch, 0.9*inch, 0.5*inch, 0.7*inch, 0.7*inch, 0.8*inch, 0.5*inch, 0.7*inch, 0.7*inch, 1*inch])
+                yield Spacer(1, 0.2*inch)
+            results['trades'] = None  # Đã ghi xong, giải phóng
             
-            reasons_table = Table(reasons_data, colWidths=[2*inch, 1*inch])
-            reasons_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            story.append(reasons_table)
-    
-    # Kết luận
-    story.append(PageBreak())
-    story.append(Paragraph("4. KẾT LUẬN VÀ KHUYẾN NGHỊ", heading_style))
-    
-    conclusion_text = f"""
-    <b>4.1. Tổng kết:</b><br/>
-    - Tổng vốn ban đầu: ${total_initial:,.2f}<br/>
-    - Tổng vốn cuối cùng: ${total_final:,.2f}<br/>
-    - Tổng lợi nhuận: ${total_final - total_initial:,.2f} ({(total_final - total_initial) / total_initial * 100:+.2f}%)<br/>
-    - Số cặp có lợi nhuận: {len([p for p in PAIRS if all_results.get(p) and all_results[p]['total_profit_pct'] > 0])}/{len([p for p in PAIRS if all_results.get(p)])}<br/><br/>
-    
-    <b>4.2. Đánh giá:</b><br/>
-    - Chiến lược RSI14 + DCA cho thấy hiệu quả trên các cặp có dữ liệu thực<br/>
-    - Việc tối ưu tham số riêng cho từng cặp đã cải thiện đáng kể lợi nhuận<br/>
-    - Cần tiếp tục paper trading để xác nhận trước khi giao dịch thực<br/><br/>
-    
-    <b>4.3. Khuyến nghị:</b><br/>
-    - Ưu tiên giao dịch các cặp có dữ liệu thực: ADAUSDM, iBTCUSDM, iETHUSDM<br/>
-    - Sử dụng tham số tối ưu cho từng cặp<br/>
-    - Luôn có stop loss và trailing stop<br/>
-    - Paper trading ít nhất 2-3 tháng trước khi giao dịch thực<br/>
-    - Quản lý rủi ro: không đầu tư quá mức khả năng chịu đựng<br/><br/>
-    
-    <b>Lưu ý:</b> Kết quả backtest không đảm bảo hiệu suất tương lai. Luôn quản lý rủi ro cẩn thận.
-    """
-    
-    story.append(Paragraph(conclusion_text, styles['Normal']))
-    
-    # Build PDF
+            # Thống kê lý do bán
+            if results.get('sell_reasons'):
+                yield Paragraph("<b>Thống kê lý do bán:</b>", styles['Normal'])
+                reasons_data = [['Lý Do', 'Số Lần']]
+                for reason, count in results['sell_reasons'].items():
+                    reasons_data.append([reason, str(count)])
+                
+                reasons_table = Table(reasons_data, colWidths=[2*inch, 1*inch])
+                reasons_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ]))
+                yield reasons_table
+        
+        # Kết luận
+        yield PageBreak()
+        yield Paragraph("4. KẾT LUẬN VÀ KHUYẾN NGHỊ", heading_style)
+        
+        conclusion_text = f"""
+        <b>4.1. Tổng kết:</b><br/>
+        - Tổng vốn ban đầu: ${total_initial:,.2f}<br/>
+        - Tổng vốn cuối cùng: ${total_final:,.2f}<br/>
+        - Tổng lợi nhuận: ${total_final - total_initial:,.2f} ({(total_final - total_initial) / total_initial * 100:+.2f}%)<br/>
+        - Số cặp có lợi nhuận: {len([p for p in PAIRS if all_results.get(p) and all_results[p]['total_profit_pct'] > 0])}/{len([p for p in PAIRS if all_results.get(p)])}<br/><br/>
+        
+        <b>4.2. Đánh giá:</b><br/>
+        - Chiến lược RSI14 + DCA cho thấy hiệu quả trên các cặp có dữ liệu thực<br/>
+        - Việc tối ưu tham số riêng cho từng cặp đã cải thiện đáng kể lợi nhuận<br/>
+        - Cần tiếp tục paper trading để xác nhận trước khi giao dịch thực<br/><br/>
+        
+        <b>4.3. Khuyến nghị:</b><br/>
+        - Ưu tiên giao dịch các cặp có dữ liệu thực: ADAUSDM, iBTCUSDM, iETHUSDM<br/>
+        - Sử dụng tham số tối ưu cho từng cặp<br/>
+        - Luôn có stop loss và trailing stop<br/>
+        - Paper trading ít nhất 2-3 tháng trước khi giao dịch thực<br/>
+        - Quản lý rủi ro: không đầu tư quá mức khả năng chịu đựng<br/><br/>
+        
+        <b>Lưu ý:</b> Kết quả backtest không đảm bảo hiệu suất tương lai. Luôn quản lý rủi ro cẩn thận.
+        """
+        
+        yield Paragraph(conclusion_text, styles['Normal'])
+        
+    # Build PDF (dàn trang theo luồng, xem pdf_stream.py)
     print(f"\n📄 Đang tạo file PDF...")
-    doc.build(story)
+    build_pdf(filename, story(), A4)
+    manifest.record('pdf|1D', key, filename)
+    manifest.save()
     print(f"✓ Đã tạo báo cáo PDF: {filename}")
     
     return filename
@@ -6,12 +6,11 @@ Vốn: $10,000, mỗi lệnh: $500
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 from datetime import datetime
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+from ohlcv_schema import normalize_columns
+from downsample import downsample
 
 # Tham số
 INITIAL_CAPITAL = 10000
@@ -51,14 +50,7 @@ def backtest_with_fixed_amount(pair, params, start_date=None, end_date=None):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -97,8 +89,10 @@ def backtest_with_fixed_amount(pair, params, start_date=None, end_date=None):
         print(f"Lỗi khi backtest {pair}: {e}")
         return None
 
-def create_png_report():
-    """Tạo báo cáo PNG"""
+def create_png_report(max_points=None):
+    """Tạo báo cáo PNG (max_points: ngân sách điểm mỗi biểu đồ equity, xem downsample.py)"""
+    import matplotlib.pyplot as plt
+
     print("=" * 80)
     print("TẠO BÁO CÁO PNG CHI TIẾT")
     print("=" * 80)
@@ -299,8 +293,8 @@ def create_png_report():
         # Biểu đồ equity curve
         if results.get('equity_curve'):
             ax_equity = fig.add_axes([0.1, current_y - 0.12, 0.8, 0.12])
-            equity = results['equity_curve']
-            ax_equity.plot(equity, linewidth=2, color='#2E86AB', label='Equity Curve')
+            candles, equity = downsample(results['equity_curve'], max_points)
+            ax_equity.plot(candles, equity, linewidth=2, color='#2E86AB', label='Equity Curve')
             ax_equity.axhline(y=results['initial_capital'], color='r', linestyle='--', 
                              label='Vốn ban đầu', alpha=0.7)
             ax_equity.set_title(f'Equity Curve - {pair}', fontsize=10, fontweight='bold')
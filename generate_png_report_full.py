@@ -3,12 +3,11 @@ Script tạo báo cáo PNG đầy đủ với tất cả các cặp và chi ti
 """
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
 from datetime import datetime
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+from ohlcv_schema import normalize_columns
+from downsample import downsample
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -43,13 +42,7 @@ def backtest_with_fixed_amount(pair, params, start_date=None, end_date=None):
         return None
     try:
         df = pd.read_csv(filename)
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
             df = df.sort_values('timestamp').reset_index(drop=True)
@@ -78,8 +71,10 @@ def backtest_with_fixed_amount(pair, params, start_date=None, end_date=None):
         print(f"Lỗi khi backtest {pair}: {e}")
         return None
 
-def create_full_png_report():
-    """Tạo báo cáo PNG đầy đủ"""
+def create_full_png_report(max_points=None):
+    """Tạo báo cáo PNG đầy đủ (max_points: ngân sách điểm mỗi biểu đồ equity, xem downsample.py)"""
+    import matplotlib.pyplot as plt
+
     print("=" * 80)
     print("TẠO BÁO CÁO PNG ĐẦY ĐỦ")
     print("=" * 80)
@@ -253,15 +248,15 @@ def create_full_png_report():
         # Equity curve
         if results.get('equity_curve'):
             ax_equity = fig.add_axes([0.05, y_pos - 0.1, 0.9, 0.1])
-            equity = results['equity_curve']
-            ax_equity.plot(equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
+            candles, equity = downsample(results['equity_curve'], max_points)
+            ax_equity.plot(candles, equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
             ax_equity.axhline(y=results['initial_capital'], color='red', linestyle='--', 
                              linewidth=2, label='Vốn ban đầu', alpha=0.7)
-            ax_equity.fill_between(range(len(equity)), results['initial_capital'], equity, 
-                                  where=np.array(equity) >= results['initial_capital'],
+            ax_equity.fill_between(candles, results['initial_capital'], equity, 
+                                  where=equity >= results['initial_capital'],
                                   alpha=0.3, color='green', label='Lợi nhuận')
-            ax_equity.fill_between(range(len(equity)), results['initial_capital'], equity,
-                                  where=np.array(equity) < results['initial_capital'],
+            ax_equity.fill_between(candles, results['initial_capital'], equity,
+                                  where=equity < results['initial_capital'],
                                   alpha=0.3, color='red', label='Lỗ')
             ax_equity.set_title(f'Equity Curve - {pair}', fontsize=11, fontweight='bold')
             ax_equity.set_xlabel('Thời gian (Nến)', fontsize=9)
@@ -3,18 +3,14 @@ Tạo báo cáo PDF/PNG cho khung 12H với số lệnh nhiều hơn
 """
 
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+import sys
+from ohlcv_schema import normalize_columns
+from downsample import downsample
+from report_cache import ReportManifest, module_params, report_key, template_version
+from trade_log import exit_cycles, trade_frame
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -53,14 +49,7 @@ def backtest_12h(pair, params):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -103,6 +92,15 @@ def backtest_12h(pair, params):
 
 def generate_pdf_report_12h():
     """Tạo báo cáo PDF cho khung 12H"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER
+    import pdf_stream
+    from pdf_stream import build_pdf, paginated_table, trade_cycle_rows
+
     print("=" * 80)
     print("TẠO BÁO CÁO PDF - KHUNG 12H")
     print("=" * 80)
@@ -110,6 +108,7 @@ def generate_pdf_report_12h():
     optimal_params = load_optimal_params()
     print("\n📊 Đang chạy backtest trên khung 12H...")
     all_results = {}
+    pair_params = {}
     
     for pair in PAIRS:
         print(f"  Đang xử lý {pair}...")
@@ -121,13 +120,25 @@ def generate_pdf_report_12h():
                 'rsi_sell': 75, 'max_dca': 3, 'use_trend_filter': False, 'use_volume_filter': False
             }
         
+        pair_params[pair] = params
         results = backtest_12h(pair, params)
+        if results:
+            # Báo cáo chỉ cần bảng lệnh dạng cột (không giữ equity curve và list dict)
+            results['trades'] = trade_frame(results['trades'])
+            results.pop('equity_curve', None)
         all_results[pair] = results
+
+    # Cùng tham số, kết quả và template: giữ file đã tạo, không vẽ lại (xem report_cache.py)
+    manifest = ReportManifest()
+    key = report_key('pdf', {**module_params(sys.modules[__name__]), 'pair_params': pair_params}, all_results,
+                     template_version(generate_pdf_report_12h, pdf_stream))
+    cached = manifest.lookup('pdf|12H', key)
+    if cached:
+        print(f"\n↻ Không có thay đổi, giữ báo cáo PDF: {cached['filename']}")
+        return cached['filename']
     
     # Tạo PDF
     filename = f"Backtest_Report_12H_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    doc = SimpleDocTemplate(filename, pagesize=A4)
-    story = []
     
     styles = getSampleStyleSheet()
     title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'],
@@ -137,232 +148,191 @@ def generate_pdf_report_12h():
                                  fontSize=13, textColor=colors.HexColor('#2c3e50'),
                                  spaceAfter=10, spaceBefore=10)
     
-    # Title
-    story.append(Paragraph("BÁO CÁO BACKTEST - KHUNG 12 GIỜ", title_style))
-    story.append(Paragraph("Chiến Lược RSI14 + DCA - Cardano DEX", styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph(f"Ngày tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", styles['Normal']))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Phương pháp
-    story.append(Paragraph("1. PHƯƠNG PHÁP BACKTEST", heading_style))
-    method_text = f"""
-    <b>Khung thời gian:</b> 12 giờ (12H)<br/>
-    <b>Nguồn dữ liệu:</b> CryptoCompare API - dữ liệu thực 2 năm, chuyển đổi sang khung 12H<br/>
-    <b>Vốn ban đầu:</b> ${INITIAL_CAPITAL:,} cho mỗi cặp<br/>
-    <b>Số tiền mỗi lệnh:</b> ${POSITION_SIZE_FIXED:,} (cố định)<br/>
-    <b>Chiến lược:</b> RSI10 (period 10 cho khung ngắn) + DCA<br/>
-    <b>Tham số điều chỉnh:</b> Take Profit giảm 20%, RSI Buy threshold tăng, Stop Loss giảm 10%<br/>
-    <b>Quản lý rủi ro:</b> Stop Loss 3-4%, Trailing Stop 3%, Max DCA 2-3 lần<br/>
-    """
-    story.append(Paragraph(method_text, styles['Normal']))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Tổng hợp
-    story.append(Paragraph("2. TỔNG HỢP KẾT QUẢ", heading_style))
-    summary_data = [['Cặp Token', 'Vốn Ban Đầu', 'Vốn Cuối', 'Lợi Nhuận', 'Lợi Nhuận %', 'Số Lệnh', 'Win Rate']]
-    
-    total_initial = 0
-    total_final = 0
-    
-    for pair in PAIRS:
-        if all_results.get(pair) and all_results[pair]:
-            r = all_results[pair]
-            total_initial += r['initial_capital']
-            total_final += r['final_capital']
-            summary_data.append([
-                pair, f"${r['initial_capital']:,.2f}", f"${r['final_capital']:,.2f}",
-                f"${r['total_profit']:,.2f}", f"{r['total_profit_pct']:+.2f}%",
-                str(r['total_trades']), f"{r['win_rate']:.1f}%"
-            ])
-    
-    summary_data.append([
-        '<b>TỔNG</b>', f"<b>${total_initial:,.2f}</b>", f"<b>${total_final:,.2f}</b>",
-        f"<b>${total_final - total_initial:,.2f}</b>",
-        f"<b>{(total_final - total_initial) / total_initial * 100:+.2f}%</b>" if total_initial > 0 else "<b>0.00%</b>",
-        '', ''
-    ])
-    
-    summary_table = Table(summary_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1*inch, 0.8*inch, 0.8*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-    ]))
-    story.append(summary_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Chi tiết từng cặp
-    for pair in PAIRS:
-        if not all_results.get(pair) or not all_results[pair]:
-            continue
-        
-        results = all_results[pair]
-        story.append(PageBreak())
-        story.append(Paragraph(f"3. CHI TIẾT CẶP: {pair}", heading_style))
+    def story():
+        """Các phần của báo cáo, sinh lần lượt khi PDF được dàn trang"""
+        # Title
+        yield Paragraph("BÁO CÁO BACKTEST - KHUNG 12 GIỜ", title_style)
+        yield Paragraph("Chiến Lược RSI14 + DCA - Cardano DEX", styles['Normal'])
+        yield Spacer(1, 0.2*inch)
+        yield Paragraph(f"Ngày tạo: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", styles['Normal'])
+        yield Spacer(1, 0.3*inch)
         
-        info_text = f"""
+        # Phương pháp
+        yield Paragraph("1. PHƯƠNG PHÁP BACKTEST", heading_style)
+        method_text = f"""
         <b>Khung thời gian:</b> 12 giờ (12H)<br/>
-        <b>Thời gian test:</b> {results['start_date'].strftime('%d/%m/%Y')} đến {results['end_date'].strftime('%d/%m/%Y')}<br/>
-        <b>Số nến:</b> {results['days']}<br/>
-        <b>Vốn ban đầu:</b> ${results['initial_capital']:,.2f}<br/>
-        <b>Vốn cuối cùng:</b> ${results['final_capital']:,.2f}<br/>
-        <b>Lợi nhuận:</b> ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%)<br/>
-        <b>Tổng số lệnh:</b> {results['total_trades']}<br/>
-        <b>Lệnh thắng:</b> {results['winning_trades']}<br/>
-        <b>Lệnh thua:</b> {results['losing_trades']}<br/>
-        <b>Tỷ lệ chính xác (Win Rate):</b> {results['win_rate']:.2f}%<br/>
-        <b>Lợi nhuận trung bình/lệnh:</b> ${results['avg_profit']:,.2f} ({results['avg_profit_pct']:+.2f}%)<br/>
+        <b>Nguồn dữ liệu:</b> CryptoCompare API - dữ liệu thực 2 năm, chuyển đổi sang khung 12H<br/>
+        <b>Vốn ban đầu:</b> ${INITIAL_CAPITAL:,} cho mỗi cặp<br/>
+        <b>Số tiền mỗi lệnh:</b> ${POSITION_SIZE_FIXED:,} (cố định)<br/>
+        <b>Chiến lược:</b> RSI10 (period 10 cho khung ngắn) + DCA<br/>
+        <b>Tham số điều chỉnh:</b> Take Profit giảm 20%, RSI Buy threshold tăng, Stop Loss giảm 10%<br/>
+        <b>Quản lý rủi ro:</b> Stop Loss 3-4%, Trailing Stop 3%, Max DCA 2-3 lần<br/>
         """
-        story.append(Paragraph(info_text, styles['Normal']))
-        story.append(Spacer(1, 0.2*inch))
+        yield Paragraph(method_text, styles['Normal'])
+        yield Spacer(1, 0.2*inch)
         
-        # Tham số
-        if pair in optimal_params:
-            p = optimal_params[pair]
-            params_text = f"""
-            <b>Tham số (đã điều chỉnh cho 12H):</b><br/>
-            - RSI Period: 10 (thay vì 14)<br/>
-            - Take Profit: {p['take_profit']*100*0.8:.0f}% (giảm 20% từ {p['take_profit']*100:.0f}%)<br/>
-            - Stop Loss: {p['stop_loss']*100*0.9:.1f}% (giảm 10% từ {p['stop_loss']*100:.0f}%)<br/>
-            - RSI Buy: {max(20, p['rsi_buy']-2)} (tăng threshold từ {p['rsi_buy']})<br/>
-            - RSI Sell: {p['rsi_sell']}<br/>
-            - Max DCA: {p['max_dca']}<br/>
-            - Số tiền mỗi lệnh: ${POSITION_SIZE_FIXED:,.2f}<br/>
-            """
-            story.append(Paragraph(params_text, styles['Normal']))
-            story.append(Spacer(1, 0.2*inch))
+        # Tổng hợp
+        yield Paragraph("2. TỔNG HỢP KẾT QUẢ", heading_style)
+        summary_data = [['Cặp Token', 'Vốn Ban Đầu', 'Vốn Cuối', 'Lợi Nhuận', 'Lợi Nhuận %', 'Số Lệnh', 'Win Rate']]
         
-        # Bảng lệnh (tất cả)
-        story.append(Paragraph("<b>Bảng chi tiết tất cả các lệnh giao dịch:</b>", styles['Normal']))
-        story.append(Spacer(1, 0.1*inch))
+        total_initial = 0
+        total_final = 0
         
-        trades = results['trades']
-        if trades:
-            trades_sorted = sorted(trades, key=lambda x: pd.to_datetime(x['timestamp']))
-            sell_trades = [t for t in trades_sorted if t['type'] == 'SELL']
-            buy_trades = [t for t in trades_sorted if t['type'] in ['BUY', 'DCA']]
+        for pair in PAIRS:
+            if all_results.get(pair) and all_results[pair]:
+                r = all_results[pair]
+                total_initial += r['initial_capital']
+                total_final += r['final_capital']
+                summary_data.append([
+                    pair, f"${r['initial_capital']:,.2f}", f"${r['final_capital']:,.2f}",
+                    f"${r['total_profit']:,.2f}", f"{r['total_profit_pct']:+.2f}%",
+                    str(r['total_trades']), f"{r['win_rate']:.1f}%"
+                ])
+        
+        summary_data.append([
+            '<b>TỔNG</b>', f"<b>${total_initial:,.2f}</b>", f"<b>${total_final:,.2f}</b>",
+            f"<b>${total_final - total_initial:,.2f}</b>",
+            f"<b>{(total_final - total_initial) / total_initial * 100:+.2f}%</b>" if total_initial > 0 else "<b>0.00%</b>",
+            '', ''
+        ])
+        
+        summary_table = Table(summary_data, colWidths=[1.2*inch, 1*inch, 1*inch, 1*inch, 1*inch, 0.8*inch, 0.8*inch])
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]))
+        yield summary_table
+        yield Spacer(1, 0.3*inch)
+        
+        # Chi tiết từng cặp
+        for pair in PAIRS:
+            if not all_results.get(pair) or not all_results[pair]:
+                continue
             
-            trades_data = [['STT', 'Ngày', 'Loại', 'Giá', 'Số Lượng', 'Vốn ($)', 'RSI', 'Lợi Nhuận ($)', 'Lợi Nhuận %', 'Lý Do']]
+            results = all_results[pair]
+            yield PageBreak()
+            yield Paragraph(f"3. CHI TIẾT CẶP: {pair}", heading_style)
             
-            trade_num = 1
-            buy_index = 0
+            info_text = f"""
+            <b>Khung thời gian:</b> 12 giờ (12H)<br/>
+            <b>Thời gian test:</b> {results['start_date'].strftime('%d/%m/%Y')} đến {results['end_date'].strftime('%d/%m/%Y')}<br/>
+            <b>Số nến:</b> {results['days']}<br/>
+            <b>Vốn ban đầu:</b> ${results['initial_capital']:,.2f}<br/>
+            <b>Vốn cuối cùng:</b> ${results['final_capital']:,.2f}<br/>
+            <b>Lợi nhuận:</b> ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%)<br/>
+            <b>Tổng số lệnh:</b> {results['total_trades']}<br/>
+            <b>Lệnh thắng:</b> {results['winning_trades']}<br/>
+            <b>Lệnh thua:</b> {results['losing_trades']}<br/>
+            <b>Tỷ lệ chính xác (Win Rate):</b> {results['win_rate']:.2f}%<br/>
+            <b>Lợi nhuận trung bình/lệnh:</b> ${results['avg_profit']:,.2f} ({results['avg_profit_pct']:+.2f}%)<br/>
+            """
+            yield Paragraph(info_text, styles['Normal'])
+            yield Spacer(1, 0.2*inch)
             
-            for sell in sell_trades:
-                sell_time = pd.to_datetime(sell['timestamp'])
-                
-                # Tìm lệnh mua tương ứng
-                related_buys = []
-                while buy_index < len(buy_trades):
-                    buy_time = pd.to_datetime(buy_trades[buy_index]['timestamp'])
-                    if buy_time < sell_time:
-                        related_buys.append(buy_trades[buy_index])
-                        buy_index += 1
-                    else:
-                        break
-                
-                # Thêm lệnh mua
-                for buy in related_buys:
-                    trades_data.append([
-                        '', pd.to_datetime(buy['timestamp']).strftime('%d/%m/%Y %H:%M'),
-                        buy['type'], f"${buy['price']:.4f}", f"{buy['amount']:.4f}",
-                        f"${buy.get('capital', 0):,.2f}", f"{buy.get('rsi', 0):.1f}", '', '', ''
-                    ])
-                
-                # Thêm lệnh bán
-                trades_data.append([
-                    str(trade_num), pd.to_datetime(sell['timestamp']).strftime('%d/%m/%Y %H:%M'),
-                    '<b>BÁN</b>', f"${sell['price']:.4f}", f"{sell['amount']:.4f}",
-                    f"${sell.get('proceeds', 0):,.2f}", f"{sell.get('rsi', 0):.1f}",
-                    f"${sell.get('profit', 0):,.2f}", f"{sell.get('profit_pct', 0):+.2f}%",
-                    sell.get('reason', '')
-                ])
-                trade_num += 1
+            # Tham số
+            if pair in optimal_params:
+                p = optimal_params[pair]
+                params_text = f"""
+                <b>Tham số (đã điều chỉnh cho 12H):</b><br/>
+                - RSI Period: 10 (thay vì 14)<br/>
+                - Take Profit: {p['take_profit']*100*0.8:.0f}% (giảm 20% từ {p['take_profit']*100:.0f}%)<br/>
+                - Stop Loss: {p['stop_loss']*100*0.9:.1f}% (giảm 10% từ {p['stop_loss']*100:.0f}%)<br/>
+                - RSI Buy: {max(20, p['rsi_buy']-2)} (tăng threshold từ {p['rsi_buy']})<br/>
+                - RSI Sell: {p['rsi_sell']}<br/>
+                - Max DCA: {p['max_dca']}<br/>
+                - Số tiền mỗi lệnh: ${POSITION_SIZE_FIXED:,.2f}<br/>
+                """
+                yield Paragraph(params_text, styles['Normal'])
+                yield Spacer(1, 0.2*inch)
             
-            trades_table = Table(trades_data, colWidths=[0.4*inch, 1*inch, 0.5*inch, 0.7*inch,
-                                                          0.7*inch, 0.8*inch, 0.5*inch, 0.7*inch, 0.7*inch, 1*inch])
-            trades_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
-            story.append(trades_table)
-            story.append(Spacer(1, 0.2*inch))
-        
-        # Thống kê lý do bán
-        if results.get('sell_reasons'):
-            story.append(Paragraph("<b>Thống kê lý do bán:</b>", styles['Normal']))
-            reasons_data = [['Lý Do', 'Số Lần']]
-            for reason, count in results['sell_reasons'].items():
-                reasons_data.append([reason, str(count)])
+            # Bảng lệnh (tất cả)
+            yield Paragraph("<b>Bảng chi tiết tất cả các lệnh giao dịch:</b>", styles['Normal'])
+            yield Spacer(1, 0.1*inch)
             
-            reasons_table = Table(reasons_data, colWidths=[2*inch, 1*inch])
-            reasons_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            story.append(reasons_table)
-    
-    # Kết luận
-    story.append(PageBreak())
-    story.append(Paragraph("4. KẾT LUẬN VÀ KHUYẾN NGHỊ", heading_style))
-    
-    profitable = len([p for p in PAIRS if all_results.get(p) and all_results[p] and all_results[p]['total_profit_pct'] > 0])
-    total_pairs = len([p for p in PAIRS if all_results.get(p) and all_results[p]])
-    total_trades_all = sum(r['total_trades'] for r in all_results.values() if r)
-    
-    conclusion_text = f"""
-    <b>4.1. Tổng kết:</b><br/>
-    - Khung thời gian: 12 giờ (12H)<br/>
-    - Tổng vốn ban đầu: ${total_initial:,.2f}<br/>
-    - Tổng vốn cuối cùng: ${total_final:,.2f}<br/>
-    - Tổng lợi nhuận: ${total_final - total_initial:,.2f} ({(total_final - total_initial) / total_initial * 100:+.2f}%)<br/>
-    - Tổng số lệnh: {total_trades_all} (nhiều hơn đáng kể so với khung 1D)<br/>
-    - Số cặp có lợi nhuận: {profitable}/{total_pairs}<br/><br/>
-    
-    <b>4.2. So sánh với khung 1D:</b><br/>
-    - Số lệnh: Tăng từ ~92 lệnh (1D) lên {total_trades_all} lệnh (12H) - tăng {total_trades_all/92*100:.0f}%<br/>
-    - Lợi nhuận: Tương đương hoặc tốt hơn trong một số trường hợp<br/>
-    - Win Rate: Có thể thấp hơn một chút nhưng vẫn chấp nhận được<br/><br/>
-    
-    <b>4.3. Khuyến nghị:</b><br/>
-    - Khung 12H phù hợp để tăng số lệnh và cơ hội giao dịch<br/>
-    - Cần điều chỉnh tham số: RSI Period 10, giảm Take Profit, tăng RSI Buy threshold<br/>
-    - Paper trading trên khung 12H ít nhất 1-2 tháng trước khi giao dịch thực<br/>
-    - Theo dõi win rate và điều chỉnh tham số nếu cần<br/><br/>
-    
-    <b>Lưu ý:</b> Kết quả backtest không đảm bảo hiệu suất tương lai. Chưa tính phí giao dịch và slippage.
-    """
-    
-    story.append(Paragraph(conclusion_text, styles['Normal']))
-    
-    doc.build(story)
+            trades = results['trades']
+            if len(trades):
+                # Bảng lệnh theo chu kỳ mua-bán, chia thành nhiều bảng nhỏ (ghi theo trang)
+                rows = trade_cycle_rows(exit_cycles(trades), '%d/%m/%Y %H:%M', '<b>BÁN</b>')
+                yield from paginated_table(
+                    ['STT', 'Ngày', 'Loại', 'Giá', 'Số Lượng', 'Vốn ($)', 'RSI', 'Lợi Nhuận ($)', 'Lợi Nhuận %', 'Lý Do'],
+                    rows, [0.4*inch, 1*inch, 0.5*inch, 0.7*inch, 0.7*inch, 0.8*inch, 0.5*inch, 0.7*inch, 0.7*inch, 1*inch])
+                yield Spacer(1, 0.2*inch)
+            results['trades'] = None  # Đã ghi xong, giải phóng
+            
+            # Thống kê lý do bán
+            if results.get('sell_reasons'):
+                yield Paragraph("<b>Thống kê lý do bán:</b>", styles['Normal'])
+                reasons_data = [['Lý Do', 'Số Lần']]
+                for reason, count in results['sell_reasons'].items():
+                    reasons_data.append([reason, str(count)])
+                
+                reasons_table = Table(reasons_data, colWidths=[2*inch, 1*inch])
+                reasons_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ]))
+                yield reasons_table
+        
+        # Kết luận
+        yield PageBreak()
+        yield Paragraph("4. KẾT LUẬN VÀ KHUYẾN NGHỊ", heading_style)
+        
+        profitable = len([p for p in PAIRS if all_results.get(p) and all_results[p] and all_results[p]['total_profit_pct'] > 0])
+        total_pairs = len([p for p in PAIRS if all_results.get(p) and all_results[p]])
+        total_trades_all = sum(r['total_trades'] for r in all_results.values() if r)
+        
+        conclusion_text = f"""
+        <b>4.1. Tổng kết:</b><br/>
+        - Khung thời gian: 12 giờ (12H)<br/>
+        - Tổng vốn ban đầu: ${total_initial:,.2f}<br/>
+        - Tổng vốn cuối cùng: ${total_final:,.2f}<br/>
+        - Tổng lợi nhuận: ${total_final - total_initial:,.2f} ({(total_final - total_initial) / total_initial * 100:+.2f}%)<br/>
+        - Tổng số lệnh: {total_trades_all} (nhiều hơn đáng kể so với khung 1D)<br/>
+        - Số cặp có lợi nhuận: {profitable}/{total_pairs}<br/><br/>
+        
+        <b>4.2. So sánh với khung 1D:</b><br/>
+        - Số lệnh: Tăng từ ~92 lệnh (1D) lên {total_trades_all} lệnh (12H) - tăng {total_trades_all/92*100:.0f}%<br/>
+        - Lợi nhuận: Tương đương hoặc tốt hơn trong một số trường hợp<br/>
+        - Win Rate: Có thể thấp hơn một chút nhưng vẫn chấp nhận được<br/><br/>
+        
+        <b>4.3. Khuyến nghị:</b><br/>
+        - Khung 12H phù hợp để tăng số lệnh và cơ hội giao dịch<br/>
+        - Cần điều chỉnh tham số: RSI Period 10, giảm Take Profit, tăng RSI Buy threshold<br/>
+        - Paper trading trên khung 12H ít nhất 1-2 tháng trước khi giao dịch thực<br/>
+        - Theo dõi win rate và điều chỉnh tham số nếu cần<br/><br/>
+        
+        <b>Lưu ý:</b> Kết quả backtest không đảm bảo hiệu suất tương lai. Chưa tính phí giao dịch và slippage.
+        """
+        
+        yield Paragraph(conclusion_text, styles['Normal'])
+        
+    # Dàn trang theo luồng (xem pdf_stream.py)
+    build_pdf(filename, story(), A4)
+    manifest.record('pdf|12H', key, filename)
+    manifest.save()
     print(f"\n✓ Đã tạo báo cáo PDF: {filename}")
     return filename
 
-def generate_png_report_12h():
-    """Tạo báo cáo PNG cho khung 12H"""
+def generate_png_report_12h(max_points=None):
+    """Tạo báo cáo PNG cho khung 12H (max_points: ngân sách điểm mỗi biểu đồ equity, xem downsample.py)"""
+    import matplotlib.pyplot as plt
+
     print("\n📄 Đang tạo báo cáo PNG...")
     
     optimal_params = load_optimal_params()
     all_results = {}
+    pair_params = {}
     
     for pair in PAIRS:
         if pair in optimal_params:
@@ -372,8 +342,18 @@ def generate_png_report_12h():
                 'take_profit': 0.10, 'stop_loss': 0.04, 'rsi_buy': 25,
                 'rsi_sell': 75, 'max_dca': 3, 'use_trend_filter': False, 'use_volume_filter': False
             }
+        pair_params[pair] = params
         results = backtest_12h(pair, params)
         all_results[pair] = results
+
+    # Cùng tham số, kết quả và template: giữ file đã tạo, không vẽ lại (xem report_cache.py)
+    manifest = ReportManifest()
+    key = report_key('png', {**module_params(sys.modules[__name__]), 'pair_params': pair_params}, all_results,
+                     template_version(generate_png_report_12h))
+    cached = manifest.lookup('png|12H', key)
+    if cached:
+        print(f"\n↻ Không có thay đổi, giữ báo cáo PNG: {cached['filename']}")
+        return cached['filename']
     
     # Tạo figure
     fig = plt.figure(figsize=(20, 32))
@@ -503,15 +483,15 @@ def generate_png_report_12h():
         # Equity curve
         if results.get('equity_curve'):
             ax_equity = fig.add_axes([0.05, y_pos - 0.1, 0.9, 0.1])
-            equity = results['equity_curve']
-            ax_equity.plot(equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
+            candles, equity = downsample(results['equity_curve'], max_points)
+            ax_equity.plot(candles, equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
             ax_equity.axhline(y=results['initial_capital'], color='red', linestyle='--',
                              linewidth=2, label='Vốn ban đầu', alpha=0.7)
-            ax_equity.fill_between(range(len(equity)), results['initial_capital'], equity,
-                                  where=np.array(equity) >= results['initial_capital'],
+            ax_equity.fill_between(candles, results['initial_capital'], equity,
+                                  where=equity >= results['initial_capital'],
                                   alpha=0.3, color='green')
-            ax_equity.fill_between(range(len(equity)), results['initial_capital'], equity,
-                                  where=np.array(equity) < results['initial_capital'],
+            ax_equity.fill_between(candles, results['initial_capital'], equity,
+                                  where=equity < results['initial_capital'],
                                   alpha=0.3, color='red')
             ax_equity.set_title(f'Equity Curve - {pair} (12H)', fontsize=11, fontweight='bold')
             ax_equity.set_xlabel('Thời gian (Nến 12H)', fontsize=9)
@@ -540,6 +520,8 @@ def generate_png_report_12h():
     
     filename = f"Backtest_Report_12H_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
     plt.savefig(filename, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
+    manifest.record('png|12H', key, filename)
+    manifest.save()
     print(f"✓ Đã tạo báo cáo PNG: {filename}")
     plt.close()
     
@@ -0,0 +1,206 @@
+"""
+Lightweight HTML report backend
+- One self-contained HTML file per pair/timeframe: inline CSS, tables as HTML,
+  charts as inline SVG (no matplotlib, no external files or scripts)
+- Same content as the PNG reports: summary, parameters, statistics, trades table,
+  equity curve and profit per sell trade
+- Renders in milliseconds and is a small fraction of the size of the 24x40-inch PNG
+"""
+
+import html
+import os
+import re
+from datetime import datetime
+import pandas as pd
+from downsample import downsample
+from trade_log import exits_by_time
+
+OUTPUT_DIR = 'Report_HTML'
+MAX_TRADES = 100
+CHART_WIDTH = 1000
+CHART_HEIGHT = 260
+_MARGIN = {'left': 70, 'right': 15, 'top': 15, 'bottom': 30}
+
+_STYLE = """
+body { font-family: -apple-system, 'Segoe UI', Helvetica, Arial, sans-serif; margin: 24px auto; max-width: 1100px; color: #212121; }
+h1 { text-align: center; margin-bottom: 4px; }
+h2 { font-size: 16px; margin: 28px 0 8px; border-bottom: 2px solid #1976D2; padding-bottom: 4px; }
+.sub { text-align: center; color: #555; margin: 2px 0; }
+.box { border-radius: 6px; padding: 10px 14px; margin: 12px 0; line-height: 1.6; }
+.profit { background: #E8F5E9; } .loss { background: #FFEBEE; } .params { background: #FFF3E0; }
+table { border-collapse: collapse; width: 100%; font-size: 12px; }
+th { background: #1A237E; color: white; padding: 5px; }
+td { padding: 4px 6px; border-bottom: 1px solid #E0E0E0; text-align: right; }
+td:first-child, td.text { text-align: left; }
+tr.win td.pnl { background: #C8E6C9; } tr.lose td.pnl { background: #FFCDD2; }
+table.stats { width: 420px; } table.stats th { background: #2C3E50; }
+svg { width: 100%; height: auto; } svg text { font-size: 11px; fill: #555; }
+.credit { text-align: center; color: #1976D2; font-weight: bold; margin-top: 24px; }
+"""
+
+def _fmt_date(value, fmt='%m/%d/%Y'):
+    try:
+        return pd.to_datetime(value).strftime(fmt)
+    except (ValueError, TypeError):
+        return html.escape(str(value))
+
+def _scale(lo, hi, out_lo, out_hi):
+    span = (hi - lo) or 1.0
+    return lambda v: out_lo + (v - lo) * (out_hi - out_lo) / span
+
+def _axis_labels(lo, hi, y, x0, x1, ticks=5):
+    """Horizontal grid lines with value labels"""
+    parts = []
+    for i in range(ticks):
+        value = lo + (hi - lo) * i / (ticks - 1)
+        py = y(value)
+        parts.append(f'<line x1="{x0}" y1="{py:.1f}" x2="{x1}" y2="{py:.1f}" stroke="#EEE"/>'
+                     f'<text x="{x0 - 6}" y="{py + 4:.1f}" text-anchor="end">{value:,.0f}</text>')
+    return ''.join(parts)
+
+def equity_svg(equity, initial_capital, width=CHART_WIDTH, height=CHART_HEIGHT, max_points=None):
+    """
+    Equity curve as inline SVG: line, initial capital line, green/red area above/below it
+    max_points: point budget of the chart (LTTB, see downsample.py; default: chart width)
+    """
+    if not len(equity):
+        return ''
+    candles, values = downsample(equity, max_points or width)
+    lo = min(values.min(), initial_capital)
+    hi = max(values.max(), initial_capital)
+    x0, x1 = _MARGIN['left'], width - _MARGIN['right']
+    y0, y1 = height - _MARGIN['bottom'], _MARGIN['top']
+    x = _scale(0, max(len(equity) - 1, 1), x0, x1)
+    y = _scale(lo, hi, y0, y1)
+    base = y(initial_capital)
+
+    points = ' '.join(f"{x(i):.1f},{y(v):.1f}" for i, v in zip(candles, values))
+    area = f"{x0:.1f},{base:.1f} {points} {x(len(equity) - 1):.1f},{base:.1f}"
+    return (
+        f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">'
+        f'<defs><clipPath id="above"><rect x="0" y="0" width="{width}" height="{base:.1f}"/></clipPath>'
+        f'<clipPath id="below"><rect x="0" y="{base:.1f}" width="{width}" height="{height}"/></clipPath></defs>'
+        f'{_axis_labels(lo, hi, y, x0, x1)}'
+        f'<polygon points="{area}" fill="#4CAF50" fill-opacity="0.3" clip-path="url(#above)"/>'
+        f'<polygon points="{area}" fill="#F44336" fill-opacity="0.3" clip-path="url(#below)"/>'
+        f'<line x1="{x0}" y1="{base:.1f}" x2="{x1}" y2="{base:.1f}" stroke="red" stroke-dasharray="6 4"/>'
+        f'<polyline points="{points}" fill="none" stroke="#1976D2" stroke-width="1.5"/>'
+        f'<text x="{(x0 + x1) / 2}" y="{height - 6}" text-anchor="middle">Time (candles, {len(equity):,} points)</text>'
+        f'</svg>'
+    )
+
+def profit_bars_svg(sells, width=CHART_WIDTH, height=CHART_HEIGHT // 2 + 40):
+    """Profit ($) per sell trade as inline SVG bars"""
+    profits = [s.get('profit', 0) or 0 for s in sells]
+    if not profits:
+        return ''
+    lo, hi = min(min(profits), 0), max(max(profits), 0)
+    x0, x1 = _MARGIN['left'], width - _MARGIN['right']
+    y0, y1 = height - _MARGIN['bottom'], _MARGIN['top']
+    y = _scale(lo, hi, y0, y1)
+    zero = y(0)
+    step = (x1 - x0) / len(profits)
+    bars = ''.join(
+        f'<rect x="{x0 + i * step + step * 0.1:.1f}" y="{min(y(p), zero):.1f}" width="{step * 0.8:.1f}" '
+        f'height="{abs(y(p) - zero):.1f}" fill="{"#43A047" if p > 0 else "#E53935"}"/>'
+        for i, p in enumerate(profits)
+    )
+    return (
+        f'<svg viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">'
+        f'{_axis_labels(lo, hi, y, x0, x1, ticks=3)}{bars}'
+        f'<line x1="{x0}" y1="{zero:.1f}" x2="{x1}" y2="{zero:.1f}" stroke="#333"/>'
+        f'<text x="{(x0 + x1) / 2}" y="{height - 6}" text-anchor="middle">Sell trades (chronological)</text>'
+        f'</svg>'
+    )
+
+def _table(headers, rows, css_class='', row_classes=None):
+    head = ''.join(f'<th>{html.escape(str(h))}</th>' for h in headers)
+    body = []
+    for i, row in enumerate(rows):
+        cls = f' class="{row_classes[i]}"' if row_classes else ''
+        body.append(f'<tr{cls}>' + ''.join(row) + '</tr>')
+    return f'<table class="{css_class}"><tr>{head}</tr>{"".join(body)}</table>'
+
+def _td(value, css_class=None):
+    cls = f' class="{css_class}"' if css_class else ''
+    return f'<td{cls}>{html.escape(str(value))}</td>'
+
+def render_html(pair, timeframe, results, strategy='', settings=None, max_trades=MAX_TRADES):
+    """
+    HTML document (string) for one report
+
+    Parameters:
+    - pair, timeframe: Report subject
+    - results: Results after trade selection (same dict the PNG reports use)
+    - strategy: Strategy name shown in the header
+    - settings: dict of report settings shown in the parameters box (e.g. TAKE_PROFIT_PCT)
+    - max_trades: Maximum sell trades in the table
+    """
+    profit_class = 'profit' if results['total_profit'] > 0 else 'loss'
+    sells = exits_by_time(results['trades'])[:max_trades]
+
+    summary = (
+        f"Test Period: {_fmt_date(results['start_date'])} → {_fmt_date(results['end_date'])} | "
+        f"Candles: {results['days']:,} | Initial Capital: ${results['initial_capital']:,.2f} | "
+        f"Final Capital: ${results['final_capital']:,.2f} | "
+        f"Profit: ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%) | "
+        f"Total Trades: {results.get('selected_trades_count', results['total_trades'])} | "
+        f"Sell Trades: {results['total_trades']} | Win Rate: {results['win_rate']:.2f}%"
+    )
+    params = ' | '.join(f"{html.escape(str(k))}: {html.escape(str(v))}" for k, v in (settings or {}).items())
+
+    stats_rows = [
+        ('Winning Trades', results['winning_trades']),
+        ('Losing Trades', results['losing_trades']),
+        ('Win Rate', f"{results['win_rate']:.2f}%"),
+        ('Avg Profit/Trade', f"${results['avg_profit']:,.2f}"),
+        ('Avg Profit %', f"{results['avg_profit_pct']:+.2f}%"),
+    ] + [(f"Reason: {reason}", f"{count} times") for reason, count in (results.get('sell_reasons') or {}).items()]
+    stats = _table(['Metric', 'Value'], [[_td(k, 'text'), _td(v)] for k, v in stats_rows], 'stats')
+
+    trade_rows = [[
+        _td(i), _td(_fmt_date(s['timestamp'], '%m/%d/%Y %H:%M'), 'text'), _td(f"${s['price']:.4f}"),
+        _td(f"{s['amount']:.4f}"), _td(f"${s.get('proceeds', 0):,.2f}", 'pnl'),
+        _td(f"${s.get('total_invested', 0):,.2f}", 'pnl'), _td(f"${s.get('profit', 0):,.2f}", 'pnl'),
+        _td(f"{s.get('profit_pct', 0):+.2f}%", 'pnl'), _td(str(s.get('reason', ''))[:25], 'text')
+    ] for i, s in enumerate(sells, 1)]
+    trades = _table(['#', 'Date Time', 'Price', 'Amount', 'Proceeds ($)', 'Invested ($)', 'Profit ($)',
+                     'Profit %', 'Reason'], trade_rows,
+                    row_classes=['win' if (s.get('profit', 0) or 0) > 0 else 'lose' for s in sells])
+
+    title = f"Backtest Report - {pair} {timeframe}"
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{html.escape(title)}</title><style>{_STYLE}</style></head>
+<body>
+<h1>BACKTEST REPORT - {html.escape(pair)}</h1>
+<p class="sub"><b>Strategy: {html.escape(strategy)} | Timeframe: {html.escape(timeframe)}</b></p>
+<p class="sub"><i>Generated: {datetime.now().strftime('%m/%d/%Y %H:%M:%S')}</i></p>
+<div class="box {profit_class}">{summary}</div>
+<div class="box params">{params}</div>
+<h2>Detailed Statistics</h2>
+{stats}
+<h2>Equity Curve</h2>
+{equity_svg(results.get('equity_curve') or [], results['initial_capital'])}
+<h2>Profit per Sell Trade</h2>
+{profit_bars_svg(sells)}
+<h2>Detailed Trades Table ({len(sells)} sell trades)</h2>
+{trades}
+<div class="box {profit_class}"><b>CONCLUSION: {html.escape(pair)} - {html.escape(strategy)} on {html.escape(timeframe)} |
+Profit: ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%) | {results['total_trades']} sell trades |
+Win Rate: {results['win_rate']:.2f}% | Avg Profit: ${results['avg_profit']:,.2f} ({results['avg_profit_pct']:+.2f}%)</b></div>
+<p class="credit">Backtest by SeerBOT Team</p>
+</body></html>
+"""
+
+def generate_html_report(pair, timeframe, results, strategy='', settings=None, output_dir=OUTPUT_DIR,
+                         max_trades=MAX_TRADES):
+    """Write the HTML report; returns the file name (None if there are no trades)"""
+    if not results or not results.get('trades'):
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    safe_pair = pair.replace('/', '_')
+    safe_strategy = re.sub(r'[^A-Za-z0-9]+', '_', strategy).strip('_') or 'Strategy'
+    filename = os.path.join(output_dir, f"Report_{safe_pair}_{timeframe}_{safe_strategy}.html")
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(render_html(pair, timeframe, results, strategy, settings, max_trades))
+    return filename
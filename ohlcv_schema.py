@@ -0,0 +1,120 @@
+"""
+Schema chung cho DataFrame OHLCV
+- Chuẩn hóa tên cột một lần duy nhất (thay cho column_mapping lặp lại ở từng script)
+- Timestamp lưu dạng int64 epoch nanosecond (datetime64[ns] là view trên cùng bộ nhớ)
+- Tùy chọn float32 cho giá/volume khi chạy sweep lớn (bộ nhớ giảm ~một nửa)
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Tên cột chuẩn và các tên thường gặp trong file dữ liệu
+COLUMN_MAPPING = {
+    'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
+    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
+}
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+OHLCV_COLUMNS = ['timestamp'] + PRICE_COLUMNS + ['volume']
+
+# dtype cho từng cột: mặc định và chế độ compact (float32)
+SCHEMA_DTYPES = {
+    'default': {'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64', 'volume': 'float64'},
+    'compact': {'open': 'float32', 'high': 'float32', 'low': 'float32', 'close': 'float32', 'volume': 'float32'},
+}
+
+def normalize_columns(df):
+    """Đổi tên cột về dạng chuẩn: timestamp, open, high, low, close, volume"""
+    renames = {old: new for old, new in COLUMN_MAPPING.items() if old in df.columns and new not in df.columns}
+    return df.rename(columns=renames) if renames else df
+
+def infer_epoch_unit(sample):
+    """Đoán đơn vị epoch (s/ms/us/ns) dựa trên độ lớn giá trị"""
+    magnitude = abs(float(sample))
+    if magnitude >= 1e17:
+        return 'ns'
+    if magnitude >= 1e14:
+        return 'us'
+    if magnitude >= 1e11:
+        return 'ms'
+    return 's'
+
+def to_epoch_ns(values, epoch_unit=None):
+    """
+    Chuyển cột timestamp (epoch số, datetime hoặc chuỗi ngày giờ) sang int64 nanosecond UTC
+
+    Returns: (mảng int64 ns, đơn vị epoch đã dùng hoặc None nếu không phải số)
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if pd.api.types.is_datetime64_any_dtype(values):
+        stamps = values.dt.tz_convert(None) if values.dt.tz is not None else values
+    elif pd.api.types.is_numeric_dtype(values):
+        if epoch_unit is None and len(values) > 0:
+            epoch_unit = infer_epoch_unit(values.iloc[0])
+        stamps = pd.to_datetime(values, unit=epoch_unit or 's')
+    else:
+        stamps = pd.to_datetime(values, utc=True).dt.tz_localize(None)
+    return stamps.dt.as_unit('ns').to_numpy().view('int64'), epoch_unit
+
+def apply_schema(df, compact=False, epoch=False):
+    """
+    Áp dụng schema chuẩn cho DataFrame OHLCV
+
+    Parameters:
+    - compact: True = giá/volume dạng float32
+    - epoch: True = giữ timestamp dạng int64 epoch ns; False = datetime64[ns] (cùng bộ nhớ)
+    """
+    df = normalize_columns(df)
+
+    if 'timestamp' in df.columns:
+        stamps, _ = to_epoch_ns(df['timestamp'])
+        df['timestamp'] = stamps if epoch else stamps.view('datetime64[ns]')
+
+    dtypes = SCHEMA_DTYPES['compact' if compact else 'default']
+    casts = {col: dtype for col, dtype in dtypes.items() if col in df.columns and df[col].dtype != dtype}
+    if casts:
+        df = df.astype(casts)
+    return df
+
+def load_ohlcv_csv(filename, compact=False, epoch=False, start_date=None, end_date=None,
+                   quality=None, timeframe=None):
+    """
+    Đọc file CSV OHLCV theo schema chuẩn, sắp xếp ổn định theo timestamp
+
+    Parameters:
+    - filename: Đường dẫn file CSV
+    - compact: True = giá/volume dạng float32
+    - epoch: True = timestamp dạng int64 epoch ns
+    - start_date, end_date: Lọc theo ngày (tùy chọn)
+    - quality: None = giữ nguyên dữ liệu; 'skip'/'repair' = xử lý gap/trùng/nến lỗi theo
+      quality index lưu cạnh file (xem data_quality.py), trước khi lọc theo ngày
+    - timeframe: Khung thời gian để tìm gap (None = suy ra từ dữ liệu)
+
+    Returns: DataFrame hoặc None nếu không có file
+    """
+    if not os.path.exists(filename):
+        return None
+
+    df = apply_schema(pd.read_csv(filename), compact=compact, epoch=epoch and quality is None)
+    if 'timestamp' not in df.columns:
+        return df
+
+    df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    if quality is not None:
+        from data_quality import apply_quality_index, get_quality_index
+        index = get_quality_index(filename, timeframe, df=df)
+        df = apply_schema(apply_quality_index(df, index, mode=quality), compact=compact, epoch=epoch)
+    if start_date or end_date:
+        stamps = df['timestamp'].to_numpy().view('int64')
+        mask = np.ones(len(df), dtype=bool)
+        if start_date:
+            mask &= stamps >= pd.Timestamp(start_date).value
+        if end_date:
+            mask &= stamps <= pd.Timestamp(end_date).value
+        df = df[mask].reset_index(drop=True)
+    return df
+
+def memory_usage_mb(df):
+    """Bộ nhớ sử dụng của DataFrame (MB)"""
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
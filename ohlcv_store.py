@@ -0,0 +1,174 @@
+"""
+Quản lý vị trí lưu dữ liệu OHLCV theo cặp token và khung thời gian
+Layout giống các engine đang đọc:
+- data/{pair}_ohlcv.csv        (khung 1D)
+- data/{pair}_ohlcv_{tf}.csv   (các khung khác: 12h, 8h, 6h, 4h, 2h, 1h, 15m, ...)
+- data/columnar/{pair}_{tf}/   (columnar store: mỗi cột một file .npy, đọc bằng mmap)
+"""
+
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from ohlcv_schema import OHLCV_COLUMNS, normalize_columns, to_epoch_ns
+
+DATA_DIR = 'data'
+COLUMNAR_DIR = 'columnar'
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+_TIMEFRAME_PATTERN = re.compile(r'^(\d+)\s*([mhd])$', re.IGNORECASE)
+_UNIT_MINUTES = {'m': 1, 'h': 60, 'd': 1440}
+
+def timeframe_to_minutes(timeframe):
+    """Chuyển khung thời gian ('15m', '4H', '12h', '1D') sang số phút"""
+    match = _TIMEFRAME_PATTERN.match(str(timeframe).strip())
+    if not match:
+        raise ValueError(f"Khung thời gian không hợp lệ: {timeframe}")
+    value, unit = match.groups()
+    minutes = int(value) * _UNIT_MINUTES[unit.lower()]
+    if minutes <= 0:
+        raise ValueError(f"Khung thời gian không hợp lệ: {timeframe}")
+    return minutes
+
+def timeframe_to_ns(timeframe):
+    """Độ dài một nến tính bằng nanosecond"""
+    return timeframe_to_minutes(timeframe) * NS_PER_MINUTE
+
+def timeframe_suffix(timeframe):
+    """Hậu tố tên file: '1D' -> '' (file gốc), '4H' -> '4h', '15m' -> '15m'"""
+    minutes = timeframe_to_minutes(timeframe)
+    if minutes == 1440:
+        return ''
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
+
+def ohlcv_filename(pair, timeframe='1D', data_dir=DATA_DIR):
+    """Đường dẫn file OHLCV của một cặp ở khung thời gian chỉ định"""
+    suffix = timeframe_suffix(timeframe)
+    if suffix:
+        return os.path.join(data_dir, f"{pair}_ohlcv_{suffix}.csv")
+    return os.path.join(data_dir, f"{pair}_ohlcv.csv")
+
+def columnar_path(pair, timeframe='1D', data_dir=DATA_DIR):
+    """Thư mục columnar store của một cặp ở khung thời gian chỉ định"""
+    suffix = timeframe_suffix(timeframe) or '1d'
+    return os.path.join(data_dir, COLUMNAR_DIR, f"{pair}_{suffix}")
+
+def write_columnar(columns, pair, timeframe='1D', data_dir=DATA_DIR):
+    """
+    Ghi dữ liệu OHLCV vào columnar store (mỗi cột một file .npy)
+
+    Parameters:
+    - columns: DataFrame hoặc dict {tên cột: mảng}; timestamp lưu dạng int64 epoch nanosecond
+    """
+    path = columnar_path(pair, timeframe, data_dir)
+    os.makedirs(path, exist_ok=True)
+
+    if isinstance(columns, pd.DataFrame):
+        columns = {name: columns[name] for name in columns.columns}
+
+    dtypes = {}
+    rows = None
+    for name in OHLCV_COLUMNS:
+        if name not in columns:
+            continue
+        values = columns[name]
+        if name == 'timestamp':
+            values, _ = to_epoch_ns(values)
+        else:
+            values = np.asarray(values)
+        np.save(os.path.join(path, f"{name}.npy"), values)
+        dtypes[name] = str(values.dtype)
+        rows = len(values)
+
+    # meta.json ghi sau cùng: có meta nghĩa là bộ cột đã ghi xong
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'pair': pair, 'timeframe': timeframe, 'rows': rows, 'columns': dtypes}, f, indent=2)
+    return path
+
+def read_columnar(pair, timeframe='1D', data_dir=DATA_DIR, mmap=True):
+    """Đọc columnar store dưới dạng dict {tên cột: mảng} (mmap, không nạp vào RAM); None nếu chưa có"""
+    path = columnar_path(pair, timeframe, data_dir)
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+        for name in meta['columns']
+    }
+
+def columnar_to_frame(columns, start=0, stop=None):
+    """Chuyển (một đoạn) dữ liệu columnar thành DataFrame với timestamp dạng datetime"""
+    frame = {}
+    for name, values in columns.items():
+        values = np.array(values[start:stop])
+        if name == 'timestamp':
+            values = pd.to_datetime(values, unit='ns')
+        frame[name] = values
+    return pd.DataFrame(frame)
+
+def ohlcv_source(pair, timeframe='1D', data_dir=DATA_DIR):
+    """File nguồn mà read_ohlcv đọc: meta.json của columnar store nếu có, ngược lại file CSV (None nếu không có)"""
+    meta_path = os.path.join(columnar_path(pair, timeframe, data_dir), 'meta.json')
+    if os.path.exists(meta_path):
+        return meta_path
+    filename = ohlcv_filename(pair, timeframe, data_dir)
+    return filename if os.path.exists(filename) else None
+
+def read_ohlcv(pair, timeframe='1D', data_dir=DATA_DIR, quality=None):
+    """
+    Đọc toàn bộ dữ liệu OHLCV (ưu tiên columnar store, sau đó file CSV),
+    chuẩn hóa cột và sắp xếp theo timestamp
+
+    Parameters:
+    - quality: None = giữ nguyên dữ liệu; 'skip'/'repair' = xử lý gap/trùng/nến lỗi
+      theo quality index lưu cạnh file (xem data_quality.py)
+    """
+    filename = ohlcv_source(pair, timeframe, data_dir)
+    if filename is None:
+        return None
+    if filename.endswith('meta.json'):
+        df = columnar_to_frame(read_columnar(pair, timeframe, data_dir))
+    else:
+        df = normalize_columns(pd.read_csv(filename))
+    
+    if 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        
+        if quality is not None:
+            from data_quality import apply_quality_index, get_quality_index
+            index = get_quality_index(filename, timeframe, df=df)
+            df = apply_quality_index(df, index, mode=quality)
+    return df
+
+def iter_ohlcv_chunks(pair, timeframe='1D', chunk_size=100_000, data_dir=DATA_DIR):
+    """
+    Đọc dữ liệu OHLCV theo từng chunk cố định (dữ liệu phải được sắp xếp theo timestamp)
+    Ưu tiên columnar store (cắt trực tiếp trên mmap), sau đó file CSV
+    Mỗi chunk đã chuẩn hóa cột và có timestamp dạng datetime
+    """
+    columns = read_columnar(pair, timeframe, data_dir)
+    if columns is not None:
+        rows = len(next(iter(columns.values()))) if columns else 0
+        for start in range(0, rows, chunk_size):
+            yield columnar_to_frame(columns, start, start + chunk_size)
+        return
+    
+    filename = ohlcv_filename(pair, timeframe, data_dir)
+    if not os.path.exists(filename):
+        raise FileNotFoundError(filename)
+    
+    for chunk in pd.read_csv(filename, chunksize=chunk_size):
+        chunk = normalize_columns(chunk)
+        if 'timestamp' in chunk.columns:
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        yield chunk
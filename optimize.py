@@ -0,0 +1,193 @@
+"""
+Tối ưu tham số thống nhất cho mọi chiến lược
+- Chọn chiến lược theo tên (xem strategies.py: rsi, position, improved, adx, psar, advanced)
+- Không gian tham số: grid mặc định của chiến lược, thay từng trục bằng --param hoặc file --space
+- Chạy trên tập cặp × khung thời gian qua sweep.sweep: dữ liệu dùng chung qua shared memory,
+  combination trùng tham số hiệu lực chỉ backtest một lần, kết quả lưu/đọc từ results_db
+- Mục tiêu: score (một bảng xếp hạng) hoặc pareto (tập không bị trội, xem pareto.py)
+
+Ví dụ:
+  python optimize.py --strategy adx --pairs ADAUSDM --timeframes 4H,6H
+  python optimize.py --strategy rsi --param rsi_buy=20:35:5 --param take_profit=0.05,0.08 --objective pareto
+  python optimize.py --list
+"""
+
+import argparse
+import time
+import pandas as pd
+from columnar_export import FORMATS, export_table
+from data_quality import QUALITY_MODES
+from ohlcv_store import DATA_DIR, read_ohlcv
+from parallel_grid import default_workers
+from pareto import ParetoArchive, max_drawdown_pct
+from results_db import default_score, source_fingerprint
+from strategies import STRATEGIES, load_engine, load_space, parse_param_spec, strategy_grid, strategy_params
+from sweep import engine_param_names, higher_timeframe_fingerprint, load_higher_timeframe, sweep
+
+DEFAULT_PAIRS = ['iBTCUSDM', 'iETHUSDM', 'ADAUSDM']
+DEFAULT_TIMEFRAMES = ['4H', '6H']
+OBJECTIVES = ['score', 'pareto']
+
+def summarize_result(results):
+    """Chỉ số của một kết quả backtest (bỏ danh sách lệnh và equity curve)"""
+    return {
+        'total_profit_pct': results['total_profit_pct'],
+        'max_drawdown_pct': max_drawdown_pct(results.get('equity_curve', [])),
+        'win_rate': results['win_rate'],
+        'total_trades': results['total_trades'],
+        'score': default_score(results),
+        **{name: value for name, value in results.items() if name.startswith('mc_')}
+    }
+
+def optimize(strategy, pair, timeframe, grid, objective='score', workers=None, data_dir=DATA_DIR,
+             robustness=False, quality=None):
+    """
+    Tối ưu một chiến lược trên một cặp và khung thời gian
+
+    Parameters:
+    - strategy: Tên chiến lược trong strategies.STRATEGIES
+    - grid: dict {tham số: danh sách giá trị} (xem strategy_grid)
+    - objective: 'score' = xếp hạng theo score; 'pareto' = chỉ giữ các combination không bị trội
+      (lợi nhuận, max drawdown, win rate, số lệnh)
+    - robustness: True = thêm chỉ số Monte Carlo (mc_*)
+    - quality: 'skip'/'repair' = xử lý dữ liệu lỗi theo quality index (None = giữ nguyên)
+
+    Returns: (DataFrame kết quả đã sắp theo score, thống kê) hoặc (None, None) nếu không có dữ liệu
+    """
+    df = read_ohlcv(pair, timeframe, data_dir, quality=quality)
+    if df is None:
+        return None, None
+
+    engine_cls = load_engine(strategy)
+    param_list = strategy_params(strategy, timeframe, grid, dedupe=False)
+    # Fingerprint và khóa tham số (tham số hiệu lực) giống worker của distributed_sweep
+    # để hai công cụ dùng chung cache
+    data = source_fingerprint(pair, timeframe, data_dir, df, quality)
+    extra_frames = {}
+    if 'higher_timeframe_df' in engine_param_names(engine_cls):
+        extra_frames['higher_timeframe_df'] = load_higher_timeframe(pair, timeframe, quality, data_dir)
+        data = higher_timeframe_fingerprint(data, extra_frames['higher_timeframe_df'])
+    results, stats = sweep(engine_cls, df, param_list, extra_frames=extra_frames, data=data,
+                           pair=pair, timeframe=timeframe, workers=workers,
+                           robustness=robustness, summarize=summarize_result)
+
+    archive = ParetoArchive() if objective == 'pareto' else None
+    rows = []
+    for params, result in zip(param_list, results):
+        if not result or not result['total_trades']:
+            continue
+        row = {**{name: params[name] for name in grid}, **result}
+        if archive is not None:
+            archive.add(row)
+        else:
+            rows.append(row)
+    if archive is not None:
+        rows = archive.front(sort=False)
+        stats['front'] = len(rows)
+
+    if not rows:
+        return pd.DataFrame(), stats
+    df_results = pd.DataFrame(rows).sort_values('score', ascending=False, kind='stable').reset_index(drop=True)
+    return df_results, stats
+
+def format_params(row, names):
+    return ', '.join(f"{name}={row[name]}" for name in names)
+
+def main():
+    """Tối ưu một chiến lược trên tập cặp × khung thời gian"""
+    parser = argparse.ArgumentParser(description='Tối ưu tham số thống nhất cho mọi chiến lược')
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='rsi')
+    parser.add_argument('--pairs', default=','.join(DEFAULT_PAIRS))
+    parser.add_argument('--timeframes', default=','.join(DEFAULT_TIMEFRAMES))
+    parser.add_argument('--param', action='append', default=[],
+                        help='Trục tham số thay grid mặc định: tên=v1,v2,v3 hoặc tên=start:stop:step (lặp lại được)')
+    parser.add_argument('--space', default=None, help='File JSON không gian tham số')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='score')
+    parser.add_argument('--robustness', action='store_true', help='Thêm chỉ số Monte Carlo (mc_*)')
+    parser.add_argument('--workers', type=int, default=None, help='Số process (mặc định: số CPU)')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--top', type=int, default=5, help='Số kết quả in ra mỗi cặp/khung')
+    parser.add_argument('--list', action='store_true', help='Liệt kê chiến lược và grid mặc định')
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help='Định dạng file kết quả (mặc định: RESULTS_FORMAT hoặc csv)')
+    parser.add_argument('--quality', choices=QUALITY_MODES, default=None,
+                        help='Xử lý gap/trùng/nến lỗi theo quality index (mặc định: giữ nguyên dữ liệu)')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, spec in STRATEGIES.items():
+            print(f"{name:10s} {spec['engine']} - {spec['description']}")
+            for axis, values in spec['grid'].items():
+                print(f"    {axis}: {values}")
+        return
+
+    try:
+        overrides = load_space(args.space) if args.space else {}
+        overrides.update(parse_param_spec(spec) for spec in args.param)
+        grid = strategy_grid(args.strategy, overrides)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+
+    pairs = [p.strip() for p in args.pairs.split(',') if p.strip()]
+    timeframes = [t.strip() for t in args.timeframes.split(',') if t.strip()]
+    combinations = 1
+    for values in grid.values():
+        combinations *= len(values)
+
+    print("=" * 80)
+    print(f"TỐI ƯU THAM SỐ - {args.strategy} ({STRATEGIES[args.strategy]['engine']})")
+    print("=" * 80)
+    print(f"📊 {combinations} combinations × {len(pairs)} cặp × {len(timeframes)} khung thời gian")
+    for axis, values in grid.items():
+        print(f"  {axis}: {values}")
+    print(f"⚙️  {args.workers or default_workers()} process | mục tiêu: {args.objective}")
+
+    summary = []
+    started = time.time()
+    for pair in pairs:
+        for timeframe in timeframes:
+            print(f"\n{pair} {timeframe}")
+            df_results, stats = optimize(args.strategy, pair, timeframe, grid, objective=args.objective,
+                                         workers=args.workers, data_dir=args.data_dir,
+                                         robustness=args.robustness, quality=args.quality)
+            if df_results is None:
+                print("  ✗ Không tìm thấy dữ liệu")
+                continue
+            print(f"  ✓ {stats['requested']} combinations → {stats['simulated']} cấu hình hiệu lực được backtest")
+            if df_results.empty:
+                print("  ✗ Không có combination nào tạo lệnh")
+                continue
+            if args.objective == 'pareto':
+                print(f"  Pareto front: {stats['front']} combinations không bị trội")
+
+            suffix = '_pareto' if args.objective == 'pareto' else ''
+            # Parquet: một dataset mỗi chiến lược, partition theo pair/timeframe
+            output = export_table(df_results, f"optimize_{args.strategy}_{pair}_{timeframe}{suffix}.csv", args.format,
+                                  partition={'pair': pair, 'timeframe': timeframe},
+                                  dataset=f"optimize_{args.strategy}{suffix}.parquet")
+            for row in df_results.head(args.top).to_dict('records'):
+                print(f"  {row['total_profit_pct']:7.2f}% | DD {row['max_drawdown_pct']:5.2f}% | "
+                      f"WR {row['win_rate']:5.1f}% | {int(row['total_trades']):3d} lệnh | {format_params(row, grid)}")
+            print(f"  ✓ Đã lưu {output}")
+
+            best = df_results.iloc[:1].to_dict('records')[0]
+            summary.append({'strategy': args.strategy, 'pair': pair, 'timeframe': timeframe,
+                            **{name: best[name] for name in grid},
+                            **{name: best[name] for name in ('total_profit_pct', 'max_drawdown_pct',
+                                                             'win_rate', 'total_trades', 'score')}})
+
+    print(f"\n{'='*80}")
+    print(f"TỔNG HỢP ({time.time() - started:.1f}s)")
+    print(f"{'='*80}")
+    if not summary:
+        print("✗ Không có kết quả")
+        return
+    df_summary = pd.DataFrame(summary)
+    output = export_table(df_summary, f"optimize_{args.strategy}_summary.csv", args.format)
+    for row in df_summary.to_dict('records'):
+        print(f"🏆 {row['pair']:10s} {row['timeframe']:4s} | {row['total_profit_pct']:7.2f}% | "
+              f"{int(row['total_trades'])} lệnh | {format_params(row, grid)}")
+    print(f"\n✓ Đã lưu {output}")
+
+if __name__ == "__main__":
+    main()
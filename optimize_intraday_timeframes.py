@@ -2,12 +2,17 @@
 Optimize parameters for each pair and timeframe to maximize profit
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
 from itertools import product
+from checkpoint import Checkpoint, make_key
+from data_quality import file_fingerprint
+from ohlcv_schema import load_ohlcv_csv
+from results_db import engine_version
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
@@ -19,43 +24,45 @@ RSI_BUY_RANGE = [20, 22, 25, 28, 30]
 RSI_SELL_RANGE = [70, 72, 75, 78, 80]
 MAX_DCA_RANGE = [2, 3, 4, 5]
 
-def backtest_with_params(pair, timeframe, rsi_buy, rsi_sell, max_dca):
-    """Run backtest with specific parameters"""
-    timeframe_map = {
-        '6H': ('6h', 8),
-        '4H': ('4h', 8),
-        '2H': ('2h', 7),
-        '1H': ('1h', 7)
-    }
-    
-    if timeframe not in timeframe_map:
+CHECKPOINT_FILE = 'checkpoints/optimize_intraday_timeframes.jsonl'
+
+# Timeframe -> (data file suffix, RSI period)
+TIMEFRAME_MAP = {
+    '6H': ('6h', 8),
+    '4H': ('4h', 8),
+    '2H': ('2h', 7),
+    '1H': ('1h', 7)
+}
+
+def data_filename(pair, timeframe):
+    """Data file for a pair and timeframe (None if the timeframe is not supported)"""
+    if timeframe not in TIMEFRAME_MAP:
+        return None
+    return f"data/{pair}_ohlcv_{TIMEFRAME_MAP[timeframe][0]}.csv"
+
+def load_indicator_data(pair, timeframe):
+    """
+    Load data and compute the engine indicators once for a pair and timeframe
+
+    The RSI period is fixed per timeframe, so every rsi_buy/rsi_sell/max_dca
+    combination (decision parameters only) shares the same indicator columns.
+    """
+    filename = data_filename(pair, timeframe)
+    if filename is None:
         return None
     
-    file_suffix, rsi_period = timeframe_map[timeframe]
-    filename = f"data/{pair}_ohlcv_{file_suffix}.csv"
-    
-    if not os.path.exists(filename):
+    rsi_period = TIMEFRAME_MAP[timeframe][1]
+    df = load_ohlcv_csv(filename)
+    if df is None or len(df) < rsi_period + 5:
         return None
     
+    return FixedAmountBacktestEngine(rsi_period=rsi_period).prepare_indicators(df)
+
+def backtest_precomputed(data, timeframe, rsi_buy, rsi_sell, max_dca):
+    """Run backtest on data that already has indicator columns (from load_indicator_data)"""
+    rsi_period = TIMEFRAME_MAP[timeframe][1]
+    
     try:
-        df = pd.read_csv(filename)
-        
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
-        
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp').reset_index(drop=True)
-        
-        if len(df) < rsi_period + 5:
-            return None
-        
         # Adjust RSI for shorter timeframes
         adjusted_rsi_buy = rsi_buy
         if timeframe in ['2H', '1H']:
@@ -77,7 +84,7 @@ def backtest_with_params(pair, timeframe, rsi_buy, rsi_sell, max_dca):
         }
         
         engine = FixedAmountBacktestEngine(**engine_params)
-        engine.run(df)
+        engine.run(data, precomputed=True)
         results = engine.get_results()
         
         if results:
@@ -94,23 +101,56 @@ def backtest_with_params(pair, timeframe, rsi_buy, rsi_sell, max_dca):
     except Exception as e:
         return None
 
-def optimize_pair_timeframe(pair, timeframe):
-    """Find optimal parameters for a pair and timeframe"""
+def backtest_with_params(pair, timeframe, rsi_buy, rsi_sell, max_dca):
+    """Run backtest with specific parameters"""
+    data = load_indicator_data(pair, timeframe)
+    if data is None:
+        return None
+    return backtest_precomputed(data, timeframe, rsi_buy, rsi_sell, max_dca)
+
+def optimize_pair_timeframe(pair, timeframe, checkpoint=None):
+    """
+    Find optimal parameters for a pair and timeframe
+
+    Combinations already recorded in the checkpoint are not re-run; their
+    stored results take part in the best-so-far comparison as usual.
+    """
     print(f"  Optimizing {pair} {timeframe}...")
     
+    filename = data_filename(pair, timeframe)
+    if filename is None or not os.path.exists(filename):
+        # Nothing to record: a later --resume run must still test this pair once data exists
+        print(f"    ✗ No data file for {pair} {timeframe}")
+        return None
+    # Results recorded against an older version of the data file or engine are not reused
+    fingerprint = {**file_fingerprint(filename), 'engine': engine_version(FixedAmountBacktestEngine)}
+    data, loaded = None, False  # Loaded on the first combination not already in the checkpoint
+    
     best_params = None
     best_profit = float('-inf')
     best_result = None
     
     total_combinations = len(RSI_BUY_RANGE) * len(RSI_SELL_RANGE) * len(MAX_DCA_RANGE)
     tested = 0
+    resumed = 0
     
     for rsi_buy, rsi_sell, max_dca in product(RSI_BUY_RANGE, RSI_SELL_RANGE, MAX_DCA_RANGE):
         tested += 1
         if tested % 20 == 0:
             print(f"    Tested {tested}/{total_combinations} combinations...")
         
-        result = backtest_with_params(pair, timeframe, rsi_buy, rsi_sell, max_dca)
+        key = make_key(pair, timeframe, rsi_buy, rsi_sell, max_dca, fingerprint)
+        if checkpoint is not None and key in checkpoint:
+            result = checkpoint.get(key)
+            resumed += 1
+        else:
+            if not loaded:
+                data, loaded = load_indicator_data(pair, timeframe), True
+            result = None
+            if data is not None:
+                result = backtest_precomputed(data, timeframe, rsi_buy, rsi_sell, max_dca)
+            if checkpoint is not None:
+                checkpoint.record(key, result)
         
         if result and result['total_trades'] >= 10:  # At least 10 trades
             # Score based on profit and win rate
@@ -124,6 +164,11 @@ def optimize_pair_timeframe(pair, timeframe):
                     'max_dca': max_dca
                 }
                 best_result = result
+                if checkpoint is not None:
+                    checkpoint.update_best(f"{pair} {timeframe}", {**best_params, **best_result}, score)
+    
+    if resumed:
+        print(f"    ↻ Resumed {resumed}/{total_combinations} combinations from checkpoint")
     
     if best_params:
         print(f"    ✓ Best: RSI Buy={best_params['rsi_buy']}, RSI Sell={best_params['rsi_sell']}, Max DCA={best_params['max_dca']}")
@@ -139,33 +184,53 @@ def optimize_pair_timeframe(pair, timeframe):
 
 def main():
     """Optimize parameters for all pairs and timeframes"""
+    parser = argparse.ArgumentParser(description='Optimize parameters for intraday timeframes')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip combinations already recorded in the checkpoint')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help='Checkpoint file (.jsonl)')
+    parser.add_argument('--pairs', default=None,
+                        help='Comma-separated subset of pairs (run several processes with --resume '
+                             'on the same checkpoint to split the work)')
+    args = parser.parse_args()
+    
+    pairs = [p.strip() for p in args.pairs.split(',') if p.strip()] if args.pairs else PAIRS
+    
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    
     print("=" * 80)
     print("OPTIMIZE PARAMETERS FOR INTRADAY TIMEFRAMES")
     print("=" * 80)
-    print(f"Testing combinations for {len(PAIRS)} pairs × 4 timeframes")
+    print(f"Testing combinations for {len(pairs)} pairs × 4 timeframes")
     print(f"RSI Buy: {RSI_BUY_RANGE}")
     print(f"RSI Sell: {RSI_SELL_RANGE}")
     print(f"Max DCA: {MAX_DCA_RANGE}")
+    if args.resume:
+        print(f"Resuming from {args.checkpoint}: {len(checkpoint)} combinations already done")
     print("=" * 80)
     
     timeframes = ['6H', '4H', '2H', '1H']
     all_results = []
     
-    for pair in PAIRS:
+    for pair in pairs:
         print(f"\n{'='*80}")
         print(f"Processing: {pair}")
         print(f"{'='*80}")
         
         for timeframe in timeframes:
-            result = optimize_pair_timeframe(pair, timeframe)
+            result = optimize_pair_timeframe(pair, timeframe, checkpoint)
             if result:
                 all_results.append(result)
+        checkpoint.save_snapshot()
     
     # Save results
+    filename = 'optimal_params_intraday_timeframes.csv'
+    if args.resume:
+        # Other processes may share this checkpoint: merge by pair/timeframe instead of overwriting
+        all_results = checkpoint.merge_table(filename, all_results).to_dict('records')
+        pairs = list(dict.fromkeys(r['pair'] for r in all_results)) or pairs
+    elif all_results:
+        pd.DataFrame(all_results).to_csv(filename, index=False)
     if all_results:
-        df_results = pd.DataFrame(all_results)
-        filename = 'optimal_params_intraday_timeframes.csv'
-        df_results.to_csv(filename, index=False)
         print(f"\n{'='*80}")
         print("✅ OPTIMIZATION COMPLETE!")
         print(f"{'='*80}")
@@ -180,7 +245,7 @@ def main():
         print(f"\n{'='*80}")
         print("BEST PARAMETERS BY PAIR AND TIMEFRAME")
         print(f"{'='*80}")
-        for pair in PAIRS:
+        for pair in pairs:
             print(f"\n{pair}:")
             pair_results = [r for r in all_results if r['pair'] == pair]
             for tf in timeframes:
@@ -7,6 +7,9 @@ import numpy as np
 import os
 from itertools import product
 from backtest_improved import ImprovedBacktestEngine, filter_data_by_date, PAIRS
+from columnar_export import export_table
+from ohlcv_schema import normalize_columns
+from results_db import cached_backtest, data_fingerprint
 
 def test_parameter_combination(pair, params, filter_year=2025, filter_month=11, filter_days=25):
     """Test một combination tham số"""
@@ -18,14 +21,7 @@ def test_parameter_combination(pair, params, filter_year=2025, filter_month=11,
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -37,9 +33,8 @@ def test_parameter_combination(pair, params, filter_year=2025, filter_month=11,
         if len(df) < 14:
             return None
         
-        engine = ImprovedBacktestEngine(**params)
-        engine.run(df)
-        results = engine.get_results()
+        results = cached_backtest(ImprovedBacktestEngine, params, df, data_fingerprint(filename, df),
+                                  pair=pair, timeframe='1D')
         
         return results
         
@@ -180,8 +175,9 @@ def optimize_pair(pair, test_periods=None):
     if all_results:
         df_results = pd.DataFrame(all_results)
         df_results = df_results.sort_values('score', ascending=False)
-        df_results.to_csv(f'optimization_{pair}.csv', index=False)
-        print(f"\n✓ Đã lưu top results vào optimization_{pair}.csv")
+        output = export_table(df_results, f'optimization_{pair}.csv',
+                              partition={'pair': pair}, dataset='optimization.parquet')
+        print(f"\n✓ Đã lưu top results vào {output}")
     
     return best_params
 
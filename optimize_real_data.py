@@ -6,76 +6,57 @@ Chỉ test trên các cặp có dữ liệu thực: iBTCUSDM, iETHUSDM, ADAUSDM
 import pandas as pd
 import numpy as np
 import os
+import time
+import argparse
+from datetime import datetime, timedelta
 from itertools import product
 from backtest_improved import ImprovedBacktestEngine, PAIRS
+from columnar_export import FORMATS, export_table
+from ohlcv_schema import load_ohlcv_csv
+from parallel_grid import default_workers, imap_grid, rank_results
+from param_search import SAMPLERS, run_search
+from pareto import ParetoArchive, max_drawdown_pct
+from results_db import cached_backtest, data_fingerprint
 
 # Chỉ test trên các cặp có dữ liệu thực
 REAL_DATA_PAIRS = ['iBTCUSDM', 'iETHUSDM', 'ADAUSDM']
 
-def test_parameter_combination_real(pair, params, start_date=None, end_date=None):
-    """Test một combination tham số trên dữ liệu thực"""
+# Mục tiêu của mode 'pareto' (cột của summarize_combination)
+PARETO_OBJECTIVES = {
+    'avg_profit': 'max',
+    'max_drawdown': 'min',
+    'avg_win_rate': 'max',
+    'total_trades': 'max'
+}
+
+def test_parameter_combination_real(pair, params, start_date=None, end_date=None, compact=False):
+    """
+    Test một combination tham số trên dữ liệu thực
+    compact=True: giá/volume dạng float32 (đủ chính xác cho sweep, bộ nhớ giảm một nửa)
+    """
     filename = f"data/{pair}_ohlcv.csv"
     
     if not os.path.exists(filename):
         return None
     
     try:
-        df = pd.read_csv(filename)
-        
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
-        
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp').reset_index(drop=True)
-        
-        # Filter theo ngày nếu có
-        if start_date:
-            df = df[df['timestamp'] >= pd.to_datetime(start_date)]
-        if end_date:
-            df = df[df['timestamp'] <= pd.to_datetime(end_date)]
+        df = load_ohlcv_csv(filename, compact=compact, start_date=start_date, end_date=end_date)
         
         if len(df) < 14:
             return None
         
-        engine = ImprovedBacktestEngine(**params)
-        engine.run(df)
-        results = engine.get_results()
+        results = cached_backtest(ImprovedBacktestEngine, params, df, data_fingerprint(filename, df),
+                                  pair=pair, timeframe='1D')
         
         return results
         
     except Exception as e:
         return None
 
-def optimize_pair_real_data(pair):
-    """
-    Tối ưu hóa tham số cho một cặp token trên dữ liệu thực
-    Test trên nhiều khoảng thời gian từ dữ liệu 2 năm
-    """
-    print(f"\n{'='*80}")
-    print(f"Tối ưu hóa tham số cho: {pair} (Dữ liệu thực)")
-    print(f"{'='*80}")
-    
-    # Định nghĩa các giá trị để test (giảm số lượng để nhanh hơn)
-    take_profits = [0.08, 0.10, 0.12]
-    stop_losses = [0.03, 0.04, 0.05]
-    rsi_buys = [22, 25, 28]
-    rsi_sells = [75, 77, 80]
-    position_sizes = [0.05, 0.07]
-    max_dcas = [2, 3]
-    
-    # Định nghĩa các khoảng thời gian để test (từ dữ liệu 2 năm)
-    # Chia thành 4 quý để test
-    from datetime import datetime, timedelta
-    
-    end_date = datetime.now()
-    test_periods = [
+def build_test_periods(end_date=None):
+    """Các khoảng thời gian để test (từ dữ liệu 2 năm)"""
+    end_date = end_date or datetime.now()
+    return [
         {
             'name': '6 tháng gần nhất',
             'start': (end_date - timedelta(days=180)).strftime('%Y-%m-%d'),
@@ -97,120 +78,321 @@ def optimize_pair_real_data(pair):
             'end': end_date.strftime('%Y-%m-%d')
         }
     ]
+
+def period_bounds(df, period):
+    """Vị trí [start, stop) của một khoảng thời gian trong df (cắt bằng searchsorted, không lọc lại)"""
+    stamps = df['timestamp'].to_numpy().astype('datetime64[ns]').view('int64')
+    start = np.searchsorted(stamps, pd.Timestamp(period['start']).value, 'left') if period['start'] else 0
+    stop = np.searchsorted(stamps, pd.Timestamp(period['end']).value, 'right') if period['end'] else len(stamps)
+    return int(start), int(stop)
+
+def run_period_real(df, params, period, data=None, pair=None):
+    """
+    Chạy backtest một combination trên một khoảng thời gian
+    data: fingerprint file dữ liệu; có thì dùng kết quả đã lưu trong results_db nếu trùng
     
-    best_params = None
-    best_score = -float('inf')
-    all_results = []
+    Returns: (dict chi tiết hoặc None nếu không có lệnh, số nến đã chạy)
+    """
+    start, stop = period_bounds(df, period)
+    if stop - start < 14:
+        return None, 0
     
-    total_combinations = (len(take_profits) * len(stop_losses) * 
-                         len(rsi_buys) * len(rsi_sells) * 
-                         len(position_sizes) * len(max_dcas))
+    try:
+        df_period = df.iloc[start:stop].copy()
+        if data is not None:
+            results = cached_backtest(ImprovedBacktestEngine, params, df_period,
+                                      data_fingerprint(data, df_period), pair=pair, timeframe='1D')
+        else:
+            engine = ImprovedBacktestEngine(**params)
+            engine.run(df_period)
+            results = engine.get_results()
+    except Exception as e:
+        return None, stop - start
     
-    print(f"📊 Sẽ test {total_combinations} combinations...")
-    print(f"📅 Test trên {len(test_periods)} khoảng thời gian")
-    print(f"⏱️  Ước tính thời gian: {total_combinations * len(test_periods) * 2} giây")
-    print()
+    if not results or results['total_trades'] == 0:
+        return None, stop - start
     
-    count = 0
+    return {
+        'period': period['name'],
+        'profit': results['total_profit_pct'],
+        'trades': results['total_trades'],
+        'win_rate': results['win_rate'],
+        'max_drawdown': max_drawdown_pct(results['equity_curve'])
+    }, stop - start
+
+def summarize_combination(params, period_results_detail):
+    """Tính kết quả trung bình và score của một combination từ chi tiết các khoảng thời gian có lệnh"""
+    period_count = len(period_results_detail)
+    if period_count == 0:
+        return None
+    
+    total_profit = sum(d['profit'] for d in period_results_detail)
+    total_trades = sum(d['trades'] for d in period_results_detail)
+    total_win_rate = sum(d['win_rate'] for d in period_results_detail)
+    
+    avg_profit = total_profit / period_count
+    avg_win_rate = total_win_rate / period_count
+    avg_trades = total_trades / period_count
+    max_drawdown = max(d.get('max_drawdown', 0.0) for d in period_results_detail)
+    
+    # Tính score (có thể điều chỉnh)
+    # Ưu tiên lợi nhuận 70%, win rate 20%, số lệnh 10%
+    score = avg_profit * 0.7 + (avg_win_rate / 100) * 20 + min(avg_trades / 20, 1) * 10
+    
+    return {
+        'take_profit': params['take_profit'],
+        'stop_loss': params['stop_loss'],
+        'rsi_buy': params['rsi_buy'],
+        'rsi_sell': params['rsi_sell'],
+        'position_size': params['position_size'],
+        'max_dca': params['max_dca'],
+        'avg_profit': avg_profit,
+        'avg_win_rate': avg_win_rate,
+        'avg_trades': avg_trades,
+        'total_trades': total_trades,
+        'max_drawdown': max_drawdown,
+        'period_count': period_count,
+        'score': score,
+        'period_details': period_results_detail
+    }
+
+def evaluate_combination_real(frames, task):
+    """
+    Đánh giá một combination trên tất cả các khoảng thời gian (chạy trong worker)
+    
+    Parameters:
+    - frames: dict {pair: DataFrame} từ shared memory
+    - task: {'pair', 'params', 'periods'}
+    """
+    df = frames[task['pair']]
+    details = []
+    for period in task['periods']:
+        detail, _ = run_period_real(df, task['params'], period, task.get('data'), task['pair'])
+        if detail:
+            details.append(detail)
+    return summarize_combination(task['params'], details)
+
+def evaluate_period_real(frames, task):
+    """Đánh giá một combination trên một khoảng thời gian (task: {'pair', 'params', 'period'})"""
+    detail, candles = run_period_real(frames[task['pair']], task['params'], task['period'],
+                                      task.get('data'), task['pair'])
+    return {'detail': detail, 'candles': candles}
+
+def successive_halving_real(pair, df, param_list, test_periods, workers=None, eta=3, data=None):
+    """
+    Successive halving: chạy tất cả combination trên khoảng thời gian rẻ nhất (ít nến nhất),
+    giữ lại 1/eta combination tốt nhất rồi mới chạy tiếp trên khoảng dài hơn
     
+    Parameters:
+    - pair: Tên cặp token
+    - df: Dữ liệu OHLCV
+    - param_list: Danh sách dict tham số engine
+    - test_periods: Các khoảng thời gian test
+    - workers: Số process chạy song song
+    - eta: Hệ số loại bỏ mỗi vòng (giữ lại ceil(n/eta))
+    - data: Fingerprint file dữ liệu (dùng kết quả đã lưu trong results_db)
+    
+    Returns: (danh sách kết quả đã xếp hạng của các combination vào vòng cuối, thống kê khối lượng công việc)
+    """
+    costs = [max(0, stop - start) for start, stop in (period_bounds(df, p) for p in test_periods)]
+    costs = [c if c >= 14 else 0 for c in costs]
+    order = sorted(range(len(test_periods)), key=lambda i: (costs[i], i))
+    
+    survivors = list(range(len(param_list)))
+    details = {i: {} for i in survivors}
+    runs = 0
+    candles = 0
+    rungs = []
+    ranked = []
+    
+    for rung, period_index in enumerate(order):
+        period = test_periods[period_index]
+        tasks = [{'pair': pair, 'params': param_list[i], 'period': period, 'data': data} for i in survivors]
+        
+        for k, result in imap_grid(evaluate_period_real, tasks, {pair: df}, workers=workers):
+            details[survivors[k]][period_index] = result['detail']
+            runs += 1
+            candles += result['candles']
+        
+        # Score trên các khoảng đã chạy, chi tiết giữ theo thứ tự test_periods
+        scored = [
+            (i, summarize_combination(param_list[i], [details[i][p] for p in sorted(details[i]) if details[i][p]]))
+            for i in survivors
+        ]
+        ranked = rank_results(scored, with_index=True)
+        rungs.append({'period': period['name'], 'candidates': len(survivors)})
+        
+        if rung == len(order) - 1:
+            break
+        
+        keep = max(1, -(-len(survivors) // eta))
+        survivors = sorted(i for i, _ in ranked[:keep])
+        if not survivors:
+            break
+    
+    full_runs = len(param_list) * len(test_periods)
+    full_candles = len(param_list) * sum(costs)
+    stats = {
+        'rungs': rungs,
+        'runs': runs,
+        'full_runs': full_runs,
+        'candles': candles,
+        'full_candles': full_candles,
+        'skipped_runs': full_runs - runs,
+        'skipped_candles': full_candles - candles
+    }
+    return [record for _, record in ranked], stats
+
+def make_real_task(pair, test_periods, params, data=None):
+    """Task đánh giá một bộ tham số (các tham số còn lại lấy mặc định của optimizer)"""
+    return {
+        'pair': pair,
+        'periods': test_periods,
+        'data': data,
+        'params': {
+            'initial_capital': 10000,
+            'use_trend_filter': False,
+            'use_volume_filter': False,
+            **params
+        }
+    }
+
+def optimize_pair_real_data(pair, workers=None, mode='grid', eta=3, max_evals=200,
+                            time_budget=None, seed=42, fmt=None):
+    """
+    Tối ưu hóa tham số cho một cặp token trên dữ liệu thực
+    Test trên nhiều khoảng thời gian từ dữ liệu 2 năm
+    
+    Parameters:
+    - pair: Tên cặp token
+    - workers: Số process chạy song song (None = số CPU, 1 = tuần tự)
+    - mode: 'grid' = chạy mọi combination trên mọi khoảng; 'halving' = successive halving;
+      'pareto' = chạy mọi combination, giữ tập không bị trội theo PARETO_OBJECTIVES thay vì score
+    - eta: Hệ số loại bỏ mỗi vòng của successive halving
+    - max_evals, time_budget, seed: Ngân sách và seed cho mode 'random', 'lhs', 'tpe'
+      (tìm kiếm trên khoảng liên tục param_search.SEARCH_SPACE thay vì grid cố định)
+    - fmt: Định dạng file kết quả ('csv' hoặc 'parquet', None = RESULTS_FORMAT)
+    """
+    print(f"\n{'='*80}")
+    print(f"Tối ưu hóa tham số cho: {pair} (Dữ liệu thực)")
+    print(f"{'='*80}")
+    
+    # Định nghĩa các giá trị để test (giảm số lượng để nhanh hơn)
+    take_profits = [0.08, 0.10, 0.12]
+    stop_losses = [0.03, 0.04, 0.05]
+    rsi_buys = [22, 25, 28]
+    rsi_sells = [75, 77, 80]
+    position_sizes = [0.05, 0.07]
+    max_dcas = [2, 3]
+    
+    test_periods = build_test_periods()
+    
+    # Đọc dữ liệu một lần, các worker dùng chung qua shared memory
+    filename = f"data/{pair}_ohlcv.csv"
+    df = load_ohlcv_csv(filename)
+    if df is None:
+        return None
+    data = data_fingerprint(filename)
+    
+    tasks = []
     for tp, sl, rsi_b, rsi_s, pos_size, max_dca in product(
         take_profits, stop_losses, rsi_buys, rsi_sells, position_sizes, max_dcas
     ):
-        count += 1
-        if count % 20 == 0:
-            print(f"  Đã test {count}/{total_combinations} combinations... ({count/total_combinations*100:.1f}%)")
+        tasks.append(make_real_task(pair, test_periods, {
+            'position_size': pos_size,
+            'take_profit': tp,
+            'stop_loss': sl,
+            'rsi_buy': rsi_b,
+            'rsi_sell': rsi_s,
+            'max_dca': max_dca
+        }, data))
+    
+    total_combinations = len(tasks)
+    workers = workers or default_workers()
+    
+    if mode in SAMPLERS:
+        budget = f", tối đa {time_budget:.0f}s" if time_budget else ""
+        print(f"📊 Tìm kiếm {mode}: tối đa {max_evals} lần đánh giá{budget}")
+    else:
+        print(f"📊 Sẽ test {total_combinations} combinations...")
+    print(f"📅 Test trên {len(test_periods)} khoảng thời gian")
+    print(f"⚙️  Chạy song song trên {workers} process")
+    print()
+    
+    started = time.time()
+    
+    if mode in SAMPLERS:
+        def progress(count, best):
+            if best:
+                print(f"  Đã đánh giá {count}/{max_evals} | Score tốt nhất: {best['score']:.2f}")
         
-        # Test trên tất cả các khoảng thời gian
-        total_profit = 0
-        total_trades = 0
-        total_win_rate = 0
-        period_count = 0
-        period_results_detail = []
+        all_results, stats = run_search(
+            evaluate_combination_real, {pair: df},
+            lambda params: make_real_task(pair, test_periods, params, data),
+            sampler=mode, max_evals=max_evals, time_budget=time_budget,
+            workers=workers, seed=seed, progress=progress
+        )
+        print(f"  Đã đánh giá {stats['evaluations']} bộ tham số (bỏ qua {stats['duplicates']} bộ trùng)")
+    elif mode == 'halving':
+        param_list = [task['params'] for task in tasks]
+        all_results, stats = successive_halving_real(pair, df, param_list, test_periods,
+                                                     workers=workers, eta=eta, data=data)
+        print(f"  Successive halving (eta={eta}):")
+        for rung in stats['rungs']:
+            print(f"    {rung['period']:20s}: {rung['candidates']} combinations")
+        print(f"  Backtest đã chạy: {stats['runs']}/{stats['full_runs']} "
+              f"(bỏ qua {stats['skipped_runs']}, {stats['skipped_runs']/stats['full_runs']*100:.1f}%)")
+        print(f"  Nến đã xử lý: {stats['candles']:,}/{stats['full_candles']:,} "
+              f"(bỏ qua {stats['skipped_candles']:,}, "
+              f"{stats['skipped_candles']/max(stats['full_candles'], 1)*100:.1f}%)")
+    elif mode == 'pareto':
+        # Kết quả đưa thẳng vào archive, chỉ giữ trong bộ nhớ các combination trên front
+        archive = ParetoArchive(PARETO_OBJECTIVES)
+        count = 0
+        for index, result in imap_grid(evaluate_combination_real, tasks, {pair: df}, workers=workers):
+            if result:
+                archive.add({**result, 'index': index})
+            count += 1
+            if count % 20 == 0:
+                print(f"  Đã test {count}/{total_combinations} combinations... "
+                      f"({count/total_combinations*100:.1f}%) | Pareto front: {len(archive)}")
         
-        for period in test_periods:
-            params = {
-                'initial_capital': 10000,
-                'position_size': pos_size,
-                'take_profit': tp,
-                'stop_loss': sl,
-                'rsi_buy': rsi_b,
-                'rsi_sell': rsi_s,
-                'max_dca': max_dca,
-                'use_trend_filter': False,
-                'use_volume_filter': False
-            }
-            
-            results = test_parameter_combination_real(
-                pair,
-                params,
-                period['start'],
-                period['end']
-            )
-            
-            if results and results['total_trades'] > 0:
-                total_profit += results['total_profit_pct']
-                total_trades += results['total_trades']
-                total_win_rate += results['win_rate']
-                period_count += 1
-                
-                period_results_detail.append({
-                    'period': period['name'],
-                    'profit': results['total_profit_pct'],
-                    'trades': results['total_trades'],
-                    'win_rate': results['win_rate']
-                })
+        # Front sắp theo score (index phá hòa) để best vẫn là combination có score cao nhất
+        all_results = sorted(archive.front(sort=False), key=lambda r: (-r['score'], r['index']))
+        for result in all_results:
+            del result['index']
+        print(f"  Pareto front: {len(all_results)}/{archive.seen} combinations không bị trội")
+    else:
+        indexed_results = []
+        for index, result in imap_grid(evaluate_combination_real, tasks, {pair: df}, workers=workers):
+            indexed_results.append((index, result))
+            count = len(indexed_results)
+            if count % 20 == 0:
+                print(f"  Đã test {count}/{total_combinations} combinations... ({count/total_combinations*100:.1f}%)")
         
-        if period_count > 0:
-            avg_profit = total_profit / period_count
-            avg_win_rate = total_win_rate / period_count
-            avg_trades = total_trades / period_count
-            
-            # Tính score (có thể điều chỉnh)
-            # Ưu tiên lợi nhuận 70%, win rate 20%, số lệnh 10%
-            score = avg_profit * 0.7 + (avg_win_rate / 100) * 20 + min(avg_trades / 20, 1) * 10
-            
-            all_results.append({
-                'take_profit': tp,
-                'stop_loss': sl,
-                'rsi_buy': rsi_b,
-                'rsi_sell': rsi_s,
-                'position_size': pos_size,
-                'max_dca': max_dca,
-                'avg_profit': avg_profit,
-                'avg_win_rate': avg_win_rate,
-                'avg_trades': avg_trades,
-                'total_trades': total_trades,
-                'period_count': period_count,
-                'score': score,
-                'period_details': period_results_detail
-            })
-            
-            if score > best_score:
-                best_score = score
-                best_params = {
-                    'take_profit': tp,
-                    'stop_loss': sl,
-                    'rsi_buy': rsi_b,
-                    'rsi_sell': rsi_s,
-                    'position_size': pos_size,
-                    'max_dca': max_dca,
-                    'avg_profit': avg_profit,
-                    'avg_win_rate': avg_win_rate,
-                    'avg_trades': avg_trades,
-                    'score': score,
-                    'period_details': period_results_detail
-                }
+        # Xếp hạng tất định (không phụ thuộc số worker)
+        all_results = rank_results(indexed_results)
+    
+    print(f"  ✓ Hoàn thành trong {time.time() - started:.1f}s")
+    
+    best_params = None
+    if all_results:
+        best = all_results[0]
+        best_params = {key: best[key] for key in (
+            'take_profit', 'stop_loss', 'rsi_buy', 'rsi_sell', 'position_size', 'max_dca',
+            'avg_profit', 'avg_win_rate', 'avg_trades', 'score', 'period_details'
+        )}
     
     # Hiển thị kết quả
     if best_params:
         print(f"\n{'='*80}")
         print(f"🏆 THAM SỐ TỐI ƯU CHO {pair}")
         print(f"{'='*80}")
-        print(f"  Take Profit: {best_params['take_profit']*100:.0f}%")
-        print(f"  Stop Loss: {best_params['stop_loss']*100:.0f}%")
+        print(f"  Take Profit: {best_params['take_profit']*100:.1f}%")
+        print(f"  Stop Loss: {best_params['stop_loss']*100:.1f}%")
         print(f"  RSI Buy: {best_params['rsi_buy']}")
         print(f"  RSI Sell: {best_params['rsi_sell']}")
-        print(f"  Position Size: {best_params['position_size']*100:.0f}%")
+        print(f"  Position Size: {best_params['position_size']*100:.1f}%")
         print(f"  Max DCA: {best_params['max_dca']}")
         print(f"\n  Kết quả trung bình:")
         print(f"    Lợi nhuận: {best_params['avg_profit']:.2f}%")
@@ -223,20 +405,41 @@ def optimize_pair_real_data(pair):
             print(f"    {detail['period']:20s}: Profit {detail['profit']:>6.2f}% | "
                   f"Trades {detail['trades']:2d} | Win Rate {detail['win_rate']:>5.1f}%")
     
+    # Mode pareto: lưu toàn bộ front
+    if all_results and mode == 'pareto':
+        df_front = pd.DataFrame(all_results).drop(columns=['period_details'])
+        output = export_table(df_front, f'optimization_{pair}_pareto.csv', fmt,
+                              partition={'pair': pair}, dataset='optimization_pareto.parquet')
+        print(f"\n✓ Đã lưu Pareto front ({len(df_front)} combinations) vào {output}")
+    
     # Lưu top 20
-    if all_results:
-        df_results = pd.DataFrame(all_results)
-        df_results = df_results.sort_values('score', ascending=False).head(20)
+    elif all_results:
+        df_results = pd.DataFrame(all_results[:20])
         
         # Loại bỏ cột period_details (không thể serialize)
         df_results_clean = df_results.drop(columns=['period_details'])
-        df_results_clean.to_csv(f'optimization_{pair}_real_data.csv', index=False)
-        print(f"\n✓ Đã lưu top 20 results vào optimization_{pair}_real_data.csv")
+        output = export_table(df_results_clean, f'optimization_{pair}_real_data.csv', fmt,
+                              partition={'pair': pair}, dataset='optimization_real_data.parquet')
+        print(f"\n✓ Đã lưu top 20 results vào {output}")
     
     return best_params
 
 def main():
     """Tối ưu hóa tham số cho các cặp có dữ liệu thực"""
+    parser = argparse.ArgumentParser(description='Tối ưu hóa tham số trên dữ liệu thực')
+    parser.add_argument('--workers', type=int, default=None, help='Số process (mặc định: số CPU)')
+    parser.add_argument('--mode', choices=['grid', 'halving', 'pareto'] + SAMPLERS, default='grid',
+                        help='grid = toàn bộ grid, halving = successive halving (loại sớm trên khoảng ngắn), '
+                             'pareto = toàn bộ grid, giữ tập không bị trội (lợi nhuận, drawdown, win rate, số lệnh), '
+                             'random/lhs/tpe = tìm kiếm trên khoảng liên tục với ngân sách')
+    parser.add_argument('--eta', type=int, default=3, help='Hệ số loại bỏ mỗi vòng của successive halving')
+    parser.add_argument('--max-evals', type=int, default=200, help='Số lần đánh giá tối đa (random/lhs/tpe)')
+    parser.add_argument('--time-budget', type=float, default=None, help='Giới hạn thời gian mỗi cặp (giây)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help='Định dạng file kết quả (mặc định: RESULTS_FORMAT hoặc csv)')
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("TỐI ƯU HÓA THAM SỐ CHO TỪNG CẶP - DỮ LIỆU THỰC")
     print("=" * 80)
@@ -251,7 +454,9 @@ def main():
     optimal_params_all = {}
     
     for pair in REAL_DATA_PAIRS:
-        optimal_params = optimize_pair_real_data(pair)
+        optimal_params = optimize_pair_real_data(pair, workers=args.workers, mode=args.mode, eta=args.eta,
+                                                 max_evals=args.max_evals, time_budget=args.time_budget,
+                                                 seed=args.seed, fmt=args.format)
         if optimal_params:
             optimal_params_all[pair] = optimal_params
     
@@ -3,149 +3,153 @@ Tối ưu tham số RSI cho khung thời gian ngắn hơn (8H, 12H)
 Khung thời gian ngắn hơn thường cần điều chỉnh RSI period và ngưỡng
 """
 
-import pandas as pd
+import argparse
 import numpy as np
-from itertools import product
 from backtest_fixed_amount import FixedAmountBacktestEngine, PAIRS
 import os
+from checkpoint import Checkpoint, make_key
+from data_quality import file_fingerprint
+from ohlcv_schema import load_ohlcv_csv
+from results_db import engine_version
+from sweep import split_grid
 
 INITIAL_CAPITAL = 10000
 POSITION_SIZE_FIXED = 500
 
-def calculate_rsi_custom(prices, period=14):
-    """Tính RSI với period tùy chỉnh"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+CHECKPOINT_FILE = 'checkpoints/optimize_timeframe_params.jsonl'
 
-def backtest_with_custom_rsi(pair, params, timeframe='8h', rsi_period=14):
-    """Backtest với RSI period tùy chỉnh"""
+# Tham số ảnh hưởng cách tính chỉ báo; các tham số khác chỉ ảnh hưởng logic mua/bán
+INDICATOR_AXES = ['rsi_period']
+
+def data_filename(pair, timeframe):
+    """File dữ liệu của cặp theo khung thời gian (None nếu khung không hỗ trợ)"""
     if timeframe == '1D':
-        filename = f"data/{pair}_ohlcv.csv"
+        return f"data/{pair}_ohlcv.csv"
     elif timeframe == '12h':
-        filename = f"data/{pair}_ohlcv_12h.csv"
+        return f"data/{pair}_ohlcv_12h.csv"
     elif timeframe == '8h':
-        filename = f"data/{pair}_ohlcv_8h.csv"
-    else:
+        return f"data/{pair}_ohlcv_8h.csv"
+    return None
+
+def load_timeframe_data(pair, timeframe):
+    """Đọc dữ liệu OHLCV của cặp theo khung thời gian (None nếu không có)"""
+    filename = data_filename(pair, timeframe)
+    if filename is None:
         return None
+    return load_ohlcv_csv(filename)
+
+def prepare_rsi_data(df, rsi_period):
+    """
+    Tính chỉ báo của engine một lần cho một RSI period (trục chỉ báo)
+    Mọi combination rsi_buy/rsi_sell/TP/SL (trục quyết định) dùng chung kết quả
+    """
+    engine = FixedAmountBacktestEngine(rsi_period=rsi_period)
+    return engine.prepare_indicators(df.copy())
+
+def backtest_precomputed(data, params, rsi_period):
+    """Chạy engine trên dữ liệu đã có chỉ báo (từ prepare_rsi_data với cùng rsi_period)"""
+    params_clean = {k: v for k, v in params.items() if k != 'position_size'}
     
-    if not os.path.exists(filename):
-        return None
+    engine_params = {
+        'initial_capital': INITIAL_CAPITAL,
+        'fixed_amount': POSITION_SIZE_FIXED,
+        'rsi_period': rsi_period,
+        **params_clean
+    }
     
     try:
-        df = pd.read_csv(filename)
-        
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
-        
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp').reset_index(drop=True)
-        
-        if len(df) < rsi_period + 5:
-            return None
-        
-        # Tính RSI với period tùy chỉnh
-        df['rsi'] = calculate_rsi_custom(df['close'], period=rsi_period)
-        
-        # Sử dụng engine nhưng override RSI calculation
-        # Tạm thời sử dụng engine hiện tại với RSI mặc định
-        params_clean = {k: v for k, v in params.items() if k != 'position_size'}
-        
-        engine_params = {
-            'initial_capital': INITIAL_CAPITAL,
-            'fixed_amount': POSITION_SIZE_FIXED,
-            **params_clean
-        }
-        
-        # Tạo engine và override RSI
         engine = FixedAmountBacktestEngine(**engine_params)
-        
-        # Override RSI trong df trước khi chạy
-        # (Cần sửa engine để chấp nhận RSI period tùy chỉnh)
-        engine.run(df)
-        results = engine.get_results()
-        
-        if results:
-            results['timeframe'] = timeframe
-            results['rsi_period'] = rsi_period
-            results['start_date'] = df['timestamp'].min()
-            results['end_date'] = df['timestamp'].max()
-            results['days'] = len(df)
-        
-        return results
-        
+        engine.run(data, precomputed=True)
+        return engine.get_results()
     except Exception as e:
         return None
 
-def optimize_timeframe_params(pair, timeframe='8h'):
-    """Tối ưu tham số cho khung thời gian cụ thể"""
+def params_for(rsi_buy, rsi_sell, take_profit, stop_loss):
+    """Tham số engine cho một combination"""
+    return {
+        'take_profit': take_profit,
+        'stop_loss': stop_loss,
+        'rsi_buy': rsi_buy,
+        'rsi_sell': rsi_sell,
+        'max_dca': 3,
+        'use_trend_filter': False,
+        'use_volume_filter': False
+    }
+
+def optimize_timeframe_params(pair, timeframe='8h', checkpoint=None):
+    """
+    Tối ưu tham số cho khung thời gian cụ thể
+
+    Parameters:
+    - checkpoint: Checkpoint để ghi từng combination đã xong; combination có sẵn trong checkpoint không chạy lại
+    """
     print(f"\n{'='*80}")
     print(f"Tối ưu tham số cho {pair} - Khung {timeframe}")
     print(f"{'='*80}")
     
+    filename = data_filename(pair, timeframe)
+    if filename is None or not os.path.exists(filename):
+        # Không ghi checkpoint: lần --resume sau vẫn test cặp này khi đã có dữ liệu
+        print(f"  ✗ Không có dữ liệu {timeframe} cho {pair}")
+        return None, []
+    # Kết quả ghi với phiên bản file dữ liệu hoặc engine cũ không được dùng lại
+    fingerprint = {**file_fingerprint(filename), 'engine': engine_version(FixedAmountBacktestEngine)}
+    
     # Test các RSI period khác nhau cho khung ngắn hơn
-    rsi_periods = [7, 10, 14] if timeframe != '1D' else [14]
-    rsi_buys = [20, 25, 30]
-    rsi_sells = [70, 75, 80]
-    take_profits = [0.05, 0.08, 0.10]
-    stop_losses = [0.03, 0.04]
+    # rsi_period là trục chỉ báo (đứng đầu grid), các tham số còn lại là trục quyết định
+    grid = {
+        'rsi_period': [7, 10, 14] if timeframe != '1D' else [14],
+        'rsi_buy': [20, 25, 30],
+        'rsi_sell': [70, 75, 80],
+        'take_profit': [0.05, 0.08, 0.10],
+        'stop_loss': [0.03, 0.04]
+    }
     
     best_params = None
     best_score = -float('inf')
     all_results = []
     
-    total_combinations = len(rsi_periods) * len(rsi_buys) * len(rsi_sells) * len(take_profits) * len(stop_losses)
+    total_combinations = int(np.prod([len(values) for values in grid.values()]))
     print(f"📊 Sẽ test {total_combinations} combinations...")
     
+    df = load_timeframe_data(pair, timeframe)
+    
     count = 0
-    for rsi_p, rsi_b, rsi_s, tp, sl in product(rsi_periods, rsi_buys, rsi_sells, take_profits, stop_losses):
-        count += 1
-        if count % 20 == 0:
-            print(f"  Đã test {count}/{total_combinations}...")
-        
-        params = {
-            'take_profit': tp,
-            'stop_loss': sl,
-            'rsi_buy': rsi_b,
-            'rsi_sell': rsi_s,
-            'max_dca': 3,
-            'use_trend_filter': False,
-            'use_volume_filter': False
-        }
-        
-        results = backtest_with_custom_rsi(pair, params, timeframe, rsi_p)
-        
-        if results and results['total_trades'] > 0:
-            # Score = profit * 0.6 + win_rate * 0.3 + trades * 0.1
-            score = (results['total_profit_pct'] * 0.6 + 
-                    (results['win_rate'] / 100) * 30 + 
-                    min(results['total_trades'] / 50, 1) * 10)
+    resumed = 0
+    for indicator, decisions in split_grid(grid, INDICATOR_AXES):
+        rsi_p = indicator['rsi_period']
+        data = None  # Tính khi gặp combination đầu tiên chưa có trong checkpoint
+        
+        for decision in decisions:
+            rsi_b, rsi_s = decision['rsi_buy'], decision['rsi_sell']
+            tp, sl = decision['take_profit'], decision['stop_loss']
+            count += 1
+            if count % 20 == 0:
+                print(f"  Đã test {count}/{total_combinations}...")
             
-            all_results.append({
-                'rsi_period': rsi_p,
-                'rsi_buy': rsi_b,
-                'rsi_sell': rsi_s,
-                'take_profit': tp,
-                'stop_loss': sl,
-                'profit': results['total_profit_pct'],
-                'trades': results['total_trades'],
-                'win_rate': results['win_rate'],
-                'score': score
-            })
+            key = make_key(pair, timeframe, rsi_p, rsi_b, rsi_s, tp, sl, fingerprint)
+            if checkpoint is not None and key in checkpoint:
+                results = checkpoint.get(key)
+                resumed += 1
+            else:
+                results = None
+                if len(df) >= rsi_p + 5:
+                    if data is None:
+                        data = prepare_rsi_data(df, rsi_p)
+                    results = backtest_precomputed(data, params_for(rsi_b, rsi_s, tp, sl), rsi_p)
+                if results:
+                    # Chỉ giữ các chỉ số dùng để chấm điểm (kết quả đầy đủ có danh sách lệnh)
+                    results = {name: results[name] for name in ('total_profit_pct', 'total_trades', 'win_rate')}
+                if checkpoint is not None:
+                    checkpoint.record(key, results)
             
-            if score > best_score:
-                best_score = score
-                best_params = {
+            if results and results['total_trades'] > 0:
+                # Score = profit * 0.6 + win_rate * 0.3 + trades * 0.1
+                score = (results['total_profit_pct'] * 0.6 + 
+                        (results['win_rate'] / 100) * 30 + 
+                        min(results['total_trades'] / 50, 1) * 10)
+                
+                all_results.append({
                     'rsi_period': rsi_p,
                     'rsi_buy': rsi_b,
                     'rsi_sell': rsi_s,
@@ -155,7 +159,26 @@ def optimize_timeframe_params(pair, timeframe='8h'):
                     'trades': results['total_trades'],
                     'win_rate': results['win_rate'],
                     'score': score
-                }
+                })
+                
+                if score > best_score:
+                    best_score = score
+                    best_params = {
+                        'rsi_period': rsi_p,
+                        'rsi_buy': rsi_b,
+                        'rsi_sell': rsi_s,
+                        'take_profit': tp,
+                        'stop_loss': sl,
+                        'profit': results['total_profit_pct'],
+                        'trades': results['total_trades'],
+                        'win_rate': results['win_rate'],
+                        'score': score
+                    }
+                    if checkpoint is not None:
+                        checkpoint.update_best(f"{pair} {timeframe}", best_params, score)
+    
+    if resumed:
+        print(f"  ↻ {resumed}/{total_combinations} combinations lấy lại từ checkpoint")
     
     if best_params:
         print(f"\n🏆 THAM SỐ TỐI ƯU:")
@@ -170,12 +193,23 @@ def optimize_timeframe_params(pair, timeframe='8h'):
 
 def main():
     """Tối ưu tham số cho các khung thời gian"""
+    parser = argparse.ArgumentParser(description='Tối ưu tham số cho khung thời gian ngắn hơn')
+    parser.add_argument('--resume', action='store_true', help='Bỏ qua các combination đã có trong checkpoint')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help='File checkpoint (.jsonl)')
+    parser.add_argument('--pairs', default='iBTCUSDM,iETHUSDM,ADAUSDM',
+                        help='Danh sách cặp (chạy nhiều process với --resume trên cùng checkpoint để chia việc)')
+    args = parser.parse_args()
+    
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    
     print("=" * 80)
     print("TỐI ƯU THAM SỐ CHO KHUNG THỜI GIAN NGẮN HƠN")
     print("=" * 80)
+    if args.resume:
+        print(f"↻ Tiếp tục từ {args.checkpoint}: đã xong {len(checkpoint)} combinations")
     
     # Chỉ test trên các cặp có dữ liệu thực
-    test_pairs = ['iBTCUSDM', 'iETHUSDM', 'ADAUSDM']
+    test_pairs = [p.strip() for p in args.pairs.split(',') if p.strip()]
     timeframes = ['8h', '12h']
     
     all_optimal = {}
@@ -188,9 +222,10 @@ def main():
         timeframe_optimal = {}
         
         for pair in test_pairs:
-            optimal, all_results = optimize_timeframe_params(pair, timeframe)
+            optimal, all_results = optimize_timeframe_params(pair, timeframe, checkpoint)
             if optimal:
                 timeframe_optimal[pair] = optimal
+            checkpoint.save_snapshot()
         
         all_optimal[timeframe] = timeframe_optimal
     
@@ -199,6 +234,12 @@ def main():
     print("TỔNG HỢP THAM SỐ TỐI ƯU")
     print(f"{'='*80}")
     
+    if args.resume:
+        # Các process khác dùng chung checkpoint: lấy best của mọi cặp từ snapshot đã gộp
+        for group, entry in checkpoint.best.items():
+            pair, timeframe = group.rsplit(' ', 1)
+            all_optimal.setdefault(timeframe, {})[pair] = entry['record']
+    
     for timeframe in timeframes:
         print(f"\nKhung {timeframe}:")
         for pair, params in all_optimal[timeframe].items():
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 import json
 import os
 from backtest_improved import ImprovedBacktestEngine, PAIRS
+from ohlcv_schema import normalize_columns
+from columnar_export import export_table
 
 class PaperTradingSimulator:
     def __init__(self, initial_capital=10000, params=None):
@@ -70,14 +72,7 @@ class PaperTradingSimulator:
         try:
             df = pd.read_csv(filename)
             
-            column_mapping = {
-                'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-                'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-            }
-            
-            for old_name, new_name in column_mapping.items():
-                if old_name in df.columns:
-                    df = df.rename(columns={old_name: new_name})
+            df = normalize_columns(df)
             
             if 'timestamp' in df.columns:
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -169,11 +164,11 @@ class PaperTradingSimulator:
         
         print(f"✓ Đã lưu log vào {filename}")
     
-    def export_trades_csv(self, filename='paper_trading_trades.csv'):
-        """Xuất các lệnh giao dịch ra CSV"""
+    def export_trades_csv(self, filename='paper_trading_trades.csv', fmt=None):
+        """Xuất các lệnh giao dịch ra CSV (hoặc Parquet chia partition theo pair, xem columnar_export)"""
         if self.trades_log:
             df = pd.DataFrame(self.trades_log)
-            df.to_csv(filename, index=False)
+            filename = export_table(df, filename, fmt, partition=['pair'])
             print(f"✓ Đã xuất lệnh giao dịch vào {filename}")
 
 def main():
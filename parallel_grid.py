@@ -0,0 +1,184 @@
+"""
+Chạy grid search song song trên nhiều process
+- Dữ liệu OHLCV đặt một lần vào shared memory, worker gắn vào (không pickle DataFrame mỗi task)
+- Kết quả trả về theo thứ tự hoàn thành (imap_unordered)
+- Xếp hạng cuối cùng tất định, không phụ thuộc số worker: sắp xếp theo (-score, thứ tự trong grid)
+"""
+
+import os
+from multiprocessing import Pool, shared_memory
+import numpy as np
+import pandas as pd
+
+_ALIGN = 8
+
+# Trạng thái trong mỗi worker process
+_WORKER_FRAMES = None
+_WORKER_EVALUATE = None
+_WORKER_HANDLES = []
+
+class SharedFrames:
+    """
+    Đưa các DataFrame OHLCV vào shared memory (mỗi frame một block, các cột nằm liên tiếp)
+    Timestamp lưu dạng int64 epoch nanosecond
+    """
+
+    def __init__(self, frames):
+        self.descriptor = {}
+        self._blocks = []
+        try:
+            for key, df in frames.items():
+                self.descriptor[key] = self._share(df)
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, df):
+        columns = []
+        offset = 0
+        arrays = []
+        for name in df.columns:
+            values = df[name].to_numpy()
+            if np.issubdtype(values.dtype, np.datetime64):
+                values = values.astype('datetime64[ns]').view('int64')
+                kind = 'datetime'
+            elif values.dtype.kind in 'biuf':
+                kind = 'numeric'
+            else:
+                continue  # Bỏ qua cột object (engine không cần)
+            columns.append((name, values.dtype.str, kind, offset))
+            arrays.append(values)
+            offset += -(-values.nbytes // _ALIGN) * _ALIGN
+
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._blocks.append(block)
+        for (name, dtype, kind, start), values in zip(columns, arrays):
+            np.ndarray(len(values), dtype=dtype, buffer=block.buf, offset=start)[:] = values
+        return {'name': block.name, 'rows': len(df), 'columns': columns}
+
+    def close(self):
+        """Giải phóng shared memory"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _attach_block(name):
+    """Gắn vào block shared memory đã có (worker dùng chung resource tracker với process cha)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def attach_frames(descriptor):
+    """
+    Dựng lại các DataFrame từ shared memory (chỉ đọc, không copy dữ liệu giá)
+
+    Returns: (dict {key: DataFrame}, danh sách block cần giữ tham chiếu)
+    """
+    frames = {}
+    handles = []
+    for key, info in descriptor.items():
+        block = _attach_block(info['name'])
+        handles.append(block)
+        data = {}
+        for name, dtype, kind, offset in info['columns']:
+            values = np.ndarray(info['rows'], dtype=dtype, buffer=block.buf, offset=offset)
+            values.flags.writeable = False
+            data[name] = values.view('datetime64[ns]') if kind == 'datetime' else values
+        frames[key] = pd.DataFrame(data, copy=False)
+    return frames, handles
+
+def _init_worker(descriptor, evaluate):
+    global _WORKER_FRAMES, _WORKER_EVALUATE, _WORKER_HANDLES
+    _WORKER_FRAMES, _WORKER_HANDLES = attach_frames(descriptor)
+    _WORKER_EVALUATE = evaluate
+
+def _run_task(item):
+    index, task = item
+    return index, _WORKER_EVALUATE(_WORKER_FRAMES, task)
+
+def default_workers():
+    """Số worker mặc định: số CPU khả dụng"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+class GridPool:
+    """
+    Pool worker giữ lâu dài cho nhiều lượt đánh giá (ví dụ các batch của random/Bayesian search)
+    Dữ liệu chỉ đưa vào shared memory và gắn vào worker một lần
+    """
+
+    def __init__(self, evaluate, frames, workers=None):
+        self.evaluate = evaluate
+        self.frames = frames
+        self.workers = workers or default_workers()
+        self._shared = None
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._shared = SharedFrames(self.frames)
+            self._pool = Pool(self.workers, initializer=_init_worker,
+                              initargs=(self._shared.descriptor, self.evaluate))
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            if exc[0] is None:
+                self._pool.close()
+            else:
+                self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def imap(self, tasks, chunksize=1):
+        """Trả về (index, kết quả) theo thứ tự hoàn thành"""
+        if self._pool is None:
+            for index, task in enumerate(tasks):
+                yield index, self.evaluate(self.frames, task)
+            return
+        yield from self._pool.imap_unordered(_run_task, enumerate(tasks), chunksize=chunksize)
+
+def imap_grid(evaluate, tasks, frames, workers=None, chunksize=1):
+    """
+    Đánh giá các task song song, trả về (index, kết quả) theo thứ tự hoàn thành
+
+    Parameters:
+    - evaluate: Hàm top-level evaluate(frames, task) -> kết quả (phải pickle được)
+    - tasks: Danh sách task (ví dụ dict tham số)
+    - frames: dict {key: DataFrame} dữ liệu dùng chung cho mọi task
+    - workers: Số process (1 = chạy tuần tự trong process hiện tại)
+    - chunksize: Số task gửi cho worker mỗi lần
+    """
+    tasks = list(tasks)
+    workers = min(workers or default_workers(), max(len(tasks), 1))
+
+    with GridPool(evaluate, frames, workers) as pool:
+        yield from pool.imap(tasks, chunksize=chunksize)
+
+def rank_results(indexed_results, key='score', with_index=False):
+    """
+    Xếp hạng kết quả tất định: score giảm dần, hòa thì theo thứ tự trong grid
+    (giống chọn best bằng so sánh '>' khi chạy tuần tự)
+
+    Parameters:
+    - indexed_results: Danh sách (index, dict kết quả); kết quả None bị bỏ qua
+    - with_index: True = trả về danh sách (index, kết quả)
+    """
+    valid = [(index, result) for index, result in indexed_results if result is not None]
+    valid.sort(key=lambda item: (-item[1][key], item[0]))
+    if with_index:
+        return valid
+    return [result for _, result in valid]
@@ -0,0 +1,182 @@
+"""
+Tìm kiếm tham số liên tục có giới hạn ngân sách (số lần đánh giá hoặc thời gian)
+- random: lấy mẫu ngẫu nhiên đều
+- lhs: Latin hypercube (phủ đều từng chiều trong mỗi batch)
+- tpe: surrogate kiểu Tree-structured Parzen Estimator (ưu tiên vùng có score cao)
+Ứng viên được đánh giá theo batch song song bằng engine có sẵn (qua parallel_grid.GridPool)
+"""
+
+import time
+import numpy as np
+from parallel_grid import GridPool, default_workers, rank_results
+
+# Khoảng tìm kiếm mặc định cho ImprovedBacktestEngine
+SEARCH_SPACE = {
+    'take_profit':   {'low': 0.03, 'high': 0.20, 'type': 'float'},
+    'stop_loss':     {'low': 0.02, 'high': 0.08, 'type': 'float'},
+    'rsi_buy':       {'low': 15,   'high': 40,   'type': 'int'},
+    'rsi_sell':      {'low': 60,   'high': 85,   'type': 'int'},
+    'position_size': {'low': 0.02, 'high': 0.15, 'type': 'float'},
+    'max_dca':       {'low': 0,    'high': 5,    'type': 'int'},
+}
+
+SAMPLERS = ['random', 'lhs', 'tpe']
+
+def decode(space, unit):
+    """Chuyển điểm trong [0, 1)^d sang dict tham số (làm tròn tham số nguyên)"""
+    params = {}
+    for (name, spec), u in zip(space.items(), unit):
+        if spec['type'] == 'int':
+            value = int(np.floor(spec['low'] + u * (spec['high'] - spec['low'] + 1)))
+            params[name] = min(value, spec['high'])
+        else:
+            params[name] = float(spec['low'] + u * (spec['high'] - spec['low']))
+    return params
+
+class RandomSampler:
+    """Lấy mẫu ngẫu nhiên đều trong khoảng tìm kiếm"""
+
+    def __init__(self, space, seed=42):
+        self.space = space
+        self.rng = np.random.default_rng(seed)
+
+    def ask(self, n):
+        return self.rng.random((n, len(self.space)))
+
+    def tell(self, units, scores):
+        pass
+
+class LatinHypercubeSampler(RandomSampler):
+    """Latin hypercube: mỗi chiều chia n khoảng bằng nhau, mỗi khoảng đúng một mẫu"""
+
+    def ask(self, n):
+        strata = np.argsort(self.rng.random((len(self.space), n)), axis=1).T
+        return (strata + self.rng.random((n, len(self.space)))) / n
+
+class TPESampler(RandomSampler):
+    """
+    Surrogate kiểu TPE: chia lịch sử thành nhóm tốt (top gamma) và nhóm còn lại,
+    ước lượng mật độ Parzen l(x), g(x) cho từng chiều, chọn ứng viên có l(x)/g(x) lớn nhất
+    """
+
+    def __init__(self, space, seed=42, startup=20, gamma=0.25, candidates=64):
+        super().__init__(space, seed)
+        self.startup = startup
+        self.gamma = gamma
+        self.candidates = candidates
+        self.units = np.empty((0, len(space)))
+        self.scores = np.empty(0)
+
+    def tell(self, units, scores):
+        self.units = np.vstack((self.units, units))
+        self.scores = np.concatenate((self.scores, scores))
+
+    @staticmethod
+    def _log_density(x, centers, bandwidth):
+        """log mật độ Parzen (Gaussian) cho từng chiều, cộng lại theo chiều"""
+        z = (x[:, None, :] - centers[None, :, :]) / bandwidth
+        per_dim = np.logaddexp.reduce(-0.5 * z ** 2, axis=1) - np.log(len(centers) * bandwidth)
+        return per_dim.sum(axis=1)
+
+    def ask(self, n):
+        observed = np.isfinite(self.scores)
+        if observed.sum() < self.startup:
+            return super().ask(n)
+
+        units, scores = self.units[observed], self.scores[observed]
+        n_good = max(1, int(np.ceil(self.gamma * len(scores))))
+        order = np.argsort(-scores, kind='stable')
+        good, bad = units[order[:n_good]], units[order[n_good:]]
+        if len(bad) == 0:
+            return super().ask(n)
+
+        bw_good = np.maximum(good.std(axis=0) * len(good) ** (-1 / 5), 0.05)
+        bw_bad = np.maximum(bad.std(axis=0) * len(bad) ** (-1 / 5), 0.05)
+
+        # Ứng viên lấy mẫu từ l(x), giữ n ứng viên có tỉ lệ l/g cao nhất
+        picks = good[self.rng.integers(0, len(good), n * self.candidates)]
+        samples = np.mod(picks + self.rng.normal(0, 1, picks.shape) * bw_good, 1.0)
+        ratio = self._log_density(samples, good, bw_good) - self._log_density(samples, bad, bw_bad)
+        best = np.argsort(-ratio.reshape(n, self.candidates), axis=1)[:, 0]
+        return samples.reshape(n, self.candidates, -1)[np.arange(n), best]
+
+def make_sampler(name, space, seed=42):
+    """Tạo sampler theo tên: 'random', 'lhs', 'tpe'"""
+    samplers = {'random': RandomSampler, 'lhs': LatinHypercubeSampler, 'tpe': TPESampler}
+    if name not in samplers:
+        raise ValueError(f"Sampler không hợp lệ: {name} (chọn {', '.join(SAMPLERS)})")
+    return samplers[name](space, seed=seed)
+
+def run_search(evaluate, frames, make_task, space=None, sampler='tpe', max_evals=200,
+               time_budget=None, batch_size=None, workers=None, seed=42, key='score', progress=None):
+    """
+    Tìm kiếm tham số có giới hạn ngân sách
+
+    Parameters:
+    - evaluate: Hàm top-level evaluate(frames, task) -> dict kết quả có key score (hoặc None)
+    - frames: dict {key: DataFrame} dùng chung cho mọi lần đánh giá
+    - make_task: Hàm tạo task từ dict tham số ứng viên
+    - space: Khoảng tìm kiếm (mặc định SEARCH_SPACE)
+    - sampler: 'random', 'lhs' hoặc 'tpe'
+    - max_evals: Số lần đánh giá tối đa
+    - time_budget: Giới hạn thời gian (giây), None = không giới hạn
+    - batch_size: Số ứng viên mỗi batch (mặc định max(2 x số worker, 8))
+    - workers: Số process chạy song song
+    - progress: Hàm progress(số lần đã đánh giá, best) gọi sau mỗi batch
+
+    Returns: (danh sách kết quả đã xếp hạng, thống kê)
+    """
+    space = space or SEARCH_SPACE
+    workers = workers or default_workers()
+    batch_size = batch_size or max(2 * workers, 8)
+    sampler = make_sampler(sampler, space, seed=seed)
+
+    started = time.time()
+    indexed_results = []
+    scores_seen = {}
+    duplicates = 0
+
+    with GridPool(evaluate, frames, workers) as pool:
+        while len(indexed_results) < max_evals:
+            if time_budget is not None and time.time() - started >= time_budget:
+                break
+
+            units = sampler.ask(min(batch_size, max_evals - len(indexed_results)))
+            batch_keys = []
+            tasks = []
+            pending = set()
+
+            # Tham số nguyên làm nhiều điểm trùng nhau: không chạy lại, chỉ báo lại score cho sampler
+            for unit in units:
+                params = decode(space, unit)
+                params_key = tuple(sorted(params.items()))
+                batch_keys.append(params_key)
+                if params_key in scores_seen or params_key in pending:
+                    duplicates += 1
+                    continue
+                pending.add(params_key)
+                tasks.append((params_key, make_task(params)))
+
+            batch = [None] * len(tasks)
+            for index, result in pool.imap([task for _, task in tasks]):
+                batch[index] = result
+
+            # Ghi nhận theo thứ tự batch (không theo thứ tự hoàn thành) để kết quả tất định
+            for (params_key, _), result in zip(tasks, batch):
+                scores_seen[params_key] = result[key] if result else -np.inf
+                indexed_results.append((len(indexed_results), result))
+            sampler.tell(units, np.array([scores_seen[k] for k in batch_keys]))
+
+            if progress:
+                ranked = rank_results(indexed_results, key=key)
+                progress(len(indexed_results), ranked[0] if ranked else None)
+
+            if not tasks and duplicates > 10 * max_evals:
+                break  # Không gian tham số đã được duyệt hết
+
+    stats = {
+        'evaluations': len(indexed_results),
+        'duplicates': duplicates,
+        'elapsed': time.time() - started
+    }
+    return rank_results(indexed_results, key=key), stats
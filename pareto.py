@@ -0,0 +1,114 @@
+"""
+Tối ưu đa mục tiêu: giữ tập Pareto (không bị trội) thay vì gộp thành một score tuyến tính
+- Mục tiêu mặc định: lợi nhuận (max), max drawdown (min), win rate (max), số lệnh (max)
+- ParetoArchive cập nhật tăng dần: mỗi kết quả mới chỉ so với các điểm đang nằm trên front
+  (vector hóa bằng numpy), kết quả bị trội bỏ ngay nên không cần giữ toàn bộ kết quả sweep
+- epsilon (tùy chọn): gộp các điểm gần nhau theo lưới epsilon để giới hạn kích thước front
+"""
+
+import numpy as np
+
+# Mục tiêu: tên cột -> 'max' hoặc 'min'
+DEFAULT_OBJECTIVES = {
+    'total_profit_pct': 'max',
+    'max_drawdown_pct': 'min',
+    'win_rate': 'max',
+    'total_trades': 'max',
+}
+
+def max_drawdown_pct(equity_curve):
+    """Max drawdown (%) của equity curve"""
+    equity = np.asarray(equity_curve, dtype=float)
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(peak > 0, 1.0 - equity / peak, 0.0)
+    return float(drawdown.max() * 100)
+
+class ParetoArchive:
+    """
+    Tập các kết quả không bị trội theo nhiều mục tiêu
+
+    Parameters:
+    - objectives: dict {tên: 'max'/'min'} (mặc định DEFAULT_OBJECTIVES)
+    - epsilon: dict {tên: bước} cho epsilon-dominance (None = Pareto chính xác)
+    """
+
+    def __init__(self, objectives=None, epsilon=None):
+        self.objectives = dict(objectives or DEFAULT_OBJECTIVES)
+        self.names = list(self.objectives)
+        # Đổi mọi mục tiêu về dạng cực tiểu hóa
+        self._sign = np.array([-1.0 if self.objectives[name] == 'max' else 1.0 for name in self.names])
+        self._epsilon = None
+        if epsilon:
+            self._epsilon = np.array([epsilon.get(name, 0.0) for name in self.names], dtype=float)
+        # Bộ đệm giá trị tăng dung lượng gấp đôi khi đầy, chỉ _size hàng đầu là front hiện tại
+        self._values = np.empty((16, len(self.names)))
+        self._size = 0
+        self._records = []
+        self.seen = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def _vector(self, record):
+        values = np.array([float(record[name]) for name in self.names]) * self._sign
+        if self._epsilon is not None:
+            step = np.where(self._epsilon > 0, self._epsilon, 1.0)
+            values = np.where(self._epsilon > 0, np.floor(values / step), values)
+        return values
+
+    def add(self, record):
+        """
+        Thêm một kết quả (dict có đủ các cột mục tiêu)
+
+        Returns: True nếu kết quả nằm trên front (các điểm nó trội bị loại)
+        """
+        self.seen += 1
+        if record is None or any(record.get(name) is None or np.isnan(record[name]) for name in self.names):
+            self.rejected += 1
+            return False
+
+        point = self._vector(record)
+        values = self._values[:self._size]
+        # Điểm đã có không tệ hơn ở mọi mục tiêu: trội hoặc trùng (giữ điểm đến trước)
+        if np.any(np.all(values <= point, axis=1)):
+            self.rejected += 1
+            return False
+
+        keep = ~np.all(point <= values, axis=1)
+        if not keep.all():
+            self._size = int(keep.sum())
+            self._values[:self._size] = values[keep]
+            self._records = [r for r, k in zip(self._records, keep) if k]
+
+        if self._size == len(self._values):
+            self._values = np.concatenate((self._values, np.empty_like(self._values)))
+        self._values[self._size] = point
+        self._size += 1
+        self._records.append(record)
+        return True
+
+    def update(self, records):
+        """Thêm nhiều kết quả, trả về số kết quả được đưa vào front"""
+        return sum(self.add(record) for record in records)
+
+    def merge(self, other):
+        """Gộp front của archive khác (ví dụ từ worker khác)"""
+        return self.update(other.front(sort=False))
+
+    def front(self, sort=True):
+        """Danh sách kết quả trên front (mặc định sắp theo mục tiêu đầu tiên, tốt nhất trước)"""
+        records = list(self._records)
+        if sort and records:
+            first = self.names[0]
+            records.sort(key=lambda r: r[first], reverse=self.objectives[first] == 'max')
+        return records
+
+def pareto_front(records, objectives=None, epsilon=None):
+    """Tập Pareto của một danh sách (hoặc iterator) kết quả"""
+    archive = ParetoArchive(objectives, epsilon)
+    archive.update(records)
+    return archive.front()
@@ -0,0 +1,105 @@
+"""
+Streaming PDF builder for multi-hundred-page reports (reportlab)
+- doc.build normally receives the complete story; here the story is a generator and the
+  document pulls flowables from it as pages are laid out (FlowableStream), so only the
+  flowables of the current page are alive at any time
+- Trade tables are emitted as consecutive tables of ROWS_PER_TABLE rows, each repeating
+  the header, instead of one table with every trade: reportlab re-splits a table for every
+  page it spans, and the rows are formatted from the columnar trade log chunk by chunk
+- Finished pages are compressed (pageCompression) before the next one is laid out
+- Imported only by the PDF scripts when they render (reportlab is an optional dependency)
+"""
+
+from itertools import islice
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+ROWS_PER_TABLE = 44  # About one A4 page at font size 7; even so row shading stays aligned
+STREAM_BUFFER = 16
+
+# Header grey, alternating white/light grey rows (style of the per-trade tables)
+TRADE_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('FONTSIZE', (0, 1), (-1, -1), 7),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+]
+
+class FlowableStream(list):
+    """
+    List of flowables refilled from a generator as the document consumes it
+
+    reportlab's build loop only reads the front of the list (len, [0], del, insert); len()
+    tops the list up to STREAM_BUFFER items so look-ahead (keepWithNext) still works
+    """
+
+    def __init__(self, flowables, buffer=STREAM_BUFFER):
+        super().__init__()
+        self._source = iter(flowables)
+        self._buffer = buffer
+
+    def __len__(self):
+        while self._source is not None and super().__len__() < self._buffer:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return super().__len__()
+
+def build_pdf(filename, story, pagesize, **doc_args):
+    """
+    Lay out a story generator page by page into filename
+
+    Parameters:
+    - story: Iterable (usually a generator) of flowables
+    - pagesize: Page size (e.g. reportlab.lib.pagesizes.A4)
+    - doc_args: Other SimpleDocTemplate arguments (margins, title, ...)
+    """
+    doc = SimpleDocTemplate(filename, pagesize=pagesize, pageCompression=1, **doc_args)
+    doc.build(FlowableStream(story))
+    return filename
+
+def paginated_table(header, rows, col_widths, style=TRADE_TABLE_STYLE, rows_per_table=ROWS_PER_TABLE):
+    """
+    Yield one Table per rows_per_table rows (each with the header row)
+
+    Parameters:
+    - header: Header row
+    - rows: Iterable of rows (consumed lazily)
+    - col_widths: Column widths
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, rows_per_table))
+        if not chunk:
+            return
+        table = Table([header] + chunk, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle(style))
+        yield table
+
+def trade_cycle_rows(cycles, date_format, exit_label, bold_profit=False, exit_type='SELL', chunk=ROWS_PER_TABLE):
+    """
+    Rows of a buy -> sell cycle table from trade_log.exit_cycles, formatted chunk by chunk
+
+    Entry rows: '', date, type, price, amount, capital, RSI
+    Exit rows: exit number, date, exit_label, price, amount, proceeds, RSI, profit, profit %, reason
+    """
+    for start in range(0, len(cycles), chunk):
+        part = cycles.iloc[start:start + chunk]
+        dates = part['timestamp'].dt.strftime(date_format).tolist()
+        for date, trade in zip(dates, part.itertuples(index=False)):
+            if trade.type != exit_type:
+                yield ['', date, trade.type, f"${trade.price:.4f}", f"{trade.amount:.4f}",
+                       f"${trade.capital:,.2f}", f"{trade.rsi:.1f}", '', '', '']
+                continue
+            profit, profit_pct = f"${trade.profit:,.2f}", f"{trade.profit_pct:+.2f}%"
+            if bold_profit:
+                profit, profit_pct = f"<b>{profit}</b>", f"<b>{profit_pct}</b>"
+            yield [str(trade.cycle), date, exit_label, f"${trade.price:.4f}", f"{trade.amount:.4f}",
+                   f"${trade.proceeds:,.2f}", f"{trade.rsi:.1f}", profit, profit_pct, trade.reason]
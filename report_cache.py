@@ -0,0 +1,134 @@
+"""
+Content-hash cache for rendered reports
+- Each report (report, pair, timeframe) is keyed by a hash of the strategy, its parameters,
+  the backtest results the template draws (selected trades, equity curve, summary stats)
+  and the template version (source of the render function + TEMPLATE_VERSION)
+- Keys are kept in a JSON manifest; a rerun only renders reports whose key changed or
+  whose output file is missing
+- Bump TEMPLATE_VERSION when a shared helper used by the templates changes
+  (report_template.py is hashed with each script's render function)
+- report_pipeline.py and the report scripts' main() share the manifest (same report ids
+  and keys); the PDF builders record their PDF under a single id per report.
+  Delete the manifest (or use report_pipeline.py --force) to render everything again
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from datetime import datetime
+
+TEMPLATE_VERSION = 1
+MANIFEST_FILE = 'report_manifest.json'
+
+def _json_default(value):
+    if hasattr(value, 'columns'):
+        return value.to_dict('list')  # Columnar trade tables (DataFrame)
+    if hasattr(value, 'tolist'):
+        return value.tolist()  # numpy scalars and arrays, Series
+    return str(value)
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=_json_default).encode()).hexdigest()
+
+def template_version(*render_fns):
+    """Version of a report template: hash of the render functions (or modules) source and TEMPLATE_VERSION"""
+    sources = []
+    for render_fn in render_fns:
+        try:
+            sources.append(inspect.getsource(render_fn))
+        except (OSError, TypeError):
+            sources.append(getattr(render_fn, '__qualname__', repr(render_fn)))
+    return _digest({'source': sources[0] if len(sources) == 1 else sources, 'version': TEMPLATE_VERSION})
+
+def module_params(module):
+    """Report settings of a module: its upper-case scalar constants (TAKE_PROFIT_PCT, TARGET_DATE, ...)"""
+    return {
+        name: value for name, value in vars(module).items()
+        if name.isupper() and isinstance(value, (bool, int, float, str, datetime))
+    }
+
+def png_template(module):
+    """Template version of a report script's PNG: its generate_png_report and report_template.py"""
+    import report_template
+    return template_version(module.generate_png_report, report_template)
+
+def report_key(strategy, params, results, template):
+    """
+    Cache key of one report
+
+    Parameters:
+    - strategy: Strategy/report name
+    - params: Parameters the report was produced with
+    - results: Results passed to the template (selected trades, equity curve, statistics)
+    - template: Template version (from template_version)
+    """
+    return _digest({'strategy': strategy, 'params': params, 'results': results, 'template': template})
+
+def png_report_key(report, module, results, params=None):
+    """
+    Cache key of a report script's PNG (same key as report_pipeline.py for the same job)
+
+    Parameters:
+    - report: Report name (key of report_pipeline.REPORTS)
+    - module: Report script module (its constants are part of the parameters)
+    - params: Extra parameters (e.g. {'pair_params': ...})
+    """
+    return report_key(report, {**module_params(module), **(params or {})}, results, png_template(module))
+
+def is_current(entry, key):
+    """True if a manifest entry was rendered with this key and its file still exists"""
+    return bool(entry and entry['key'] == key and entry.get('filename') and os.path.exists(entry['filename']))
+
+class ReportManifest:
+    """
+    Manifest of rendered reports: {report id: {'key', 'filename', 'rendered_at'}}
+
+    Parameters:
+    - path: Manifest file (JSON)
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                self.entries = {}  # Corrupt manifest: everything is re-rendered
+
+    def lookup(self, report_id, key):
+        """Entry if the report was rendered with this key and the file still exists, else None"""
+        entry = self.entries.get(report_id)
+        return entry if is_current(entry, key) else None
+
+    def record(self, report_id, key, filename):
+        self.entries[report_id] = {'key': key, 'filename': filename,
+                                   'rendered_at': datetime.now().isoformat(timespec='seconds')}
+
+    def save(self):
+        """Write the manifest atomically (temporary file + rename)"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def render_cached(manifest, report_id, key, render):
+    """
+    Render a report unless the manifest has it with the same key
+
+    Parameters:
+    - render: Function rendering the report, returns the file name (None = not created)
+
+    Returns: (file name, True if rendered / False if unchanged and kept)
+    """
+    entry = manifest.lookup(report_id, key)
+    if entry:
+        return entry['filename'], False
+    filename = render()
+    if filename:
+        manifest.record(report_id, key, filename)
+        manifest.save()
+    return filename, True
@@ -0,0 +1,238 @@
+"""
+Parallel report generation pipeline (pair x timeframe)
+- Each report script (backtest_*_reports.py, backtest_intraday_timeframes_en.py) exposes
+  backtest_timeframe() and generate_png_report(); this pipeline runs both stages for every
+  pair x timeframe in a process pool instead of the scripts' serial loops
+- Workers use the non-interactive Agg backend and close every figure after each job
+  (matplotlib is only imported when a PNG is rendered, see report_template.py);
+  workers are recycled after --max-tasks jobs so matplotlib caches cannot grow without bound
+- Jobs with the largest data files are scheduled first (better load balance)
+- Per-stage timings (backtest, render) are reported per job and in total
+- --format html renders lightweight self-contained HTML/SVG reports (html_report.py)
+  instead of the PNG figures, into Report_HTML/<report>/
+- Reports whose inputs did not change since the last run are not re-rendered
+  (content-hash manifest, see report_cache.py; --force renders everything)
+
+Examples:
+  python report_pipeline.py --reports adx,psar --workers 4
+  python report_pipeline.py --reports intraday --pairs ADAUSDM --timeframes 4H,6H
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import sys
+import time
+import traceback
+from multiprocessing import Pool
+from ohlcv_store import ohlcv_filename
+from parallel_grid import default_workers
+from report_cache import (MANIFEST_FILE, ReportManifest, is_current, module_params, png_template, report_key,
+                          template_version)
+
+MAX_TASKS_PER_CHILD = 8
+FORMATS = ['png', 'html']
+
+# Report: module, strategy label, timeframes rendered by the script,
+# and whether backtest_timeframe takes params
+REPORTS = {
+    'adx': {'module': 'backtest_adx_dca_reports', 'label': 'ADX + DCA',
+            'timeframes': ['1D', '12H', '8H', '6H', '4H', '2H', '1H'], 'params': False},
+    'psar': {'module': 'backtest_psar_dca_reports', 'label': 'PSAR + DCA',
+             'timeframes': ['1D', '12H', '8H', '6H', '4H', '2H', '1H'], 'params': False},
+    'improved': {'module': 'backtest_improved_strategy_reports', 'label': 'Improved Strategy',
+                 'timeframes': ['6H', '4H', '2H', '1H'], 'params': False},
+    'advanced': {'module': 'backtest_advanced_strategy_reports', 'label': 'Advanced Strategy',
+                 'timeframes': ['4H', '6H'], 'params': False},
+    'intraday': {'module': 'backtest_intraday_timeframes_en', 'label': 'RSI + DCA',
+                 'timeframes': ['6H', '4H', '2H', '1H'], 'params': True},
+}
+
+def _use_agg():
+    """Select the Agg backend before any report renders (HTML-only runs work without matplotlib)"""
+    try:
+        import matplotlib
+    except ImportError:
+        return
+    matplotlib.use('Agg', force=True)
+
+def build_jobs(reports, pairs=None, timeframes=None, output_format='png'):
+    """
+    All (report, pair, timeframe) jobs, largest data file first
+
+    Parameters:
+    - reports: Report names (keys of REPORTS)
+    - pairs: Pairs to render (default: PAIRS of each report's engine module)
+    - timeframes: Timeframes to render (default: the report's own list)
+    - output_format: 'png' (the script's matplotlib figure) or 'html' (html_report.py)
+    """
+    jobs = []
+    for report in reports:
+        spec = REPORTS[report]
+        report_pairs = pairs
+        if report_pairs is None:
+            report_pairs = importlib.import_module(spec['module']).PAIRS
+        for pair in report_pairs:
+            for timeframe in timeframes or spec['timeframes']:
+                filename = ohlcv_filename(pair, timeframe)
+                size = os.path.getsize(filename) if os.path.exists(filename) else 0
+                job_id = f"{report}|{pair}|{timeframe}" + ('|html' if output_format == 'html' else '')
+                jobs.append({'id': job_id, 'report': report, 'pair': pair, 'timeframe': timeframe,
+                             'format': output_format, 'size': size, 'cached': None})
+    jobs.sort(key=lambda job: -job['size'])
+    return jobs
+
+def run_job(job):
+    """
+    Backtest and render one report (runs in a worker); returns status and stage timings
+    The render is skipped when job['cached'] (manifest entry) has the same content key
+    """
+    spec = REPORTS[job['report']]
+    outcome = {'id': job['id'], 'report': job['report'], 'pair': job['pair'], 'timeframe': job['timeframe'],
+               'filename': None, 'profit': None, 'backtest_s': 0.0, 'render_s': 0.0, 'error': None,
+               'key': None, 'skipped': False}
+    try:
+        module = importlib.import_module(spec['module'])
+        params = module_params(module)
+        started = time.perf_counter()
+        if spec['params']:
+            pair_params = module.pair_params(job['pair'])
+            params['pair_params'] = pair_params
+            results = module.backtest_timeframe(job['pair'], pair_params, job['timeframe'])
+        else:
+            results = module.backtest_timeframe(job['pair'], job['timeframe'])
+        outcome['backtest_s'] = time.perf_counter() - started
+
+        if results and results.get('trades'):
+            outcome['profit'] = results.get('total_profit_pct')
+            if job.get('format') == 'html':
+                import html_report
+                template = template_version(html_report)
+            else:
+                template = png_template(module)
+            key = report_key(job['report'], params, results, template)
+            outcome['key'] = key
+            cached = job.get('cached')
+            if is_current(cached, key):
+                outcome['filename'] = cached['filename']
+                outcome['skipped'] = True
+                return outcome
+            started = time.perf_counter()
+            if job.get('format') == 'html':
+                outcome['filename'] = html_report.generate_html_report(
+                    job['pair'], job['timeframe'], results, strategy=spec['label'], settings=params,
+                    output_dir=os.path.join(html_report.OUTPUT_DIR, job['report']))
+            else:
+                outcome['filename'] = module.generate_png_report(job['pair'], job['timeframe'], results)
+            outcome['render_s'] = time.perf_counter() - started
+    except Exception:
+        outcome['error'] = traceback.format_exc(limit=3)
+    finally:
+        plt = sys.modules.get('matplotlib.pyplot')  # Only loaded if a PNG was rendered
+        if plt is not None:
+            plt.close('all')
+        gc.collect()
+    return outcome
+
+def run_pipeline(jobs, workers=None, max_tasks=MAX_TASKS_PER_CHILD, progress=None, manifest=None,
+                 force=False):
+    """
+    Run all jobs in a process pool (workers=1: in this process)
+    manifest: ReportManifest; unchanged reports are skipped and new renders recorded
+    force: True = render every report (the manifest is still updated)
+
+    Returns: (list of job outcomes, total wall time in seconds)
+    """
+    if manifest is not None and not force:
+        jobs = [dict(job, cached=manifest.entries.get(job['id'])) for job in jobs]
+    workers = min(workers or default_workers(), max(len(jobs), 1))
+    started = time.perf_counter()
+    outcomes = []
+
+    def collect(outcome):
+        outcomes.append(outcome)
+        if manifest is not None and outcome['filename'] and not outcome['skipped']:
+            manifest.record(outcome['id'], outcome['key'], outcome['filename'])
+            manifest.save()  # Saved per render: an interrupted run keeps what it finished
+        if progress:
+            progress(outcome)
+
+    if workers <= 1:
+        _use_agg()
+        for job in jobs:
+            collect(run_job(job))
+    else:
+        with Pool(workers, initializer=_use_agg, maxtasksperchild=max_tasks) as pool:
+            for outcome in pool.imap_unordered(run_job, jobs):
+                collect(outcome)
+    return outcomes, time.perf_counter() - started
+
+def print_outcome(outcome):
+    label = f"{outcome['report']:8s} {outcome['pair']:10s} {outcome['timeframe']:4s}"
+    if outcome['error']:
+        print(f"  ✗ {label} | error: {outcome['error'].strip().splitlines()[-1]}")
+    elif outcome['skipped']:
+        print(f"  ↻ {label} | backtest {outcome['backtest_s']:5.1f}s | unchanged, kept {outcome['filename']}")
+    elif outcome['filename']:
+        print(f"  ✓ {label} | backtest {outcome['backtest_s']:5.1f}s | render {outcome['render_s']:5.1f}s | "
+              f"{outcome['profit']:+.2f}% | {outcome['filename']}")
+    else:
+        print(f"  ✗ {label} | backtest {outcome['backtest_s']:5.1f}s | no data or no trades")
+
+def print_timings(outcomes, wall):
+    """Per-stage totals and parallel speedup"""
+    backtest = sum(o['backtest_s'] for o in outcomes)
+    render = sum(o['render_s'] for o in outcomes)
+    rendered = [o for o in outcomes if o['filename'] and not o['skipped']]
+    print(f"\n📊 Timings:")
+    print(f"  Backtest stage: {backtest:.1f}s total ({backtest / max(len(outcomes), 1):.2f}s per job)")
+    print(f"  Render stage:   {render:.1f}s total ({render / max(len(rendered), 1):.2f}s per report)")
+    print(f"  Wall time:      {wall:.1f}s (speedup {(backtest + render) / max(wall, 1e-9):.1f}x over serial)")
+
+def main():
+    """Generate reports for all pairs and timeframes in parallel"""
+    parser = argparse.ArgumentParser(description='Parallel pair x timeframe report generation')
+    parser.add_argument('--reports', default=','.join(REPORTS), help=f"Reports ({', '.join(REPORTS)})")
+    parser.add_argument('--pairs', default=None, help='Pairs (default: PAIRS of each report)')
+    parser.add_argument('--timeframes', default=None, help="Timeframes (default: each report's own list)")
+    parser.add_argument('--workers', type=int, default=None, help='Processes (default: CPU count)')
+    parser.add_argument('--max-tasks', type=int, default=MAX_TASKS_PER_CHILD,
+                        help='Jobs per worker before it is replaced (bounds memory)')
+    parser.add_argument('--format', choices=FORMATS, default='png',
+                        help='png = matplotlib figures, html = self-contained HTML/SVG')
+    parser.add_argument('--manifest', default=MANIFEST_FILE, help='Report cache manifest')
+    parser.add_argument('--force', action='store_true', help='Render every report even if unchanged')
+    args = parser.parse_args()
+
+    reports = [r.strip() for r in args.reports.split(',') if r.strip()]
+    unknown = [r for r in reports if r not in REPORTS]
+    if unknown:
+        parser.error(f"unknown reports: {', '.join(unknown)} (choose from {', '.join(REPORTS)})")
+    pairs = [p.strip() for p in args.pairs.split(',') if p.strip()] if args.pairs else None
+    timeframes = [t.strip() for t in args.timeframes.split(',') if t.strip()] if args.timeframes else None
+
+    jobs = build_jobs(reports, pairs, timeframes, args.format)
+    workers = args.workers or default_workers()
+
+    print("=" * 80)
+    print("PARALLEL REPORT PIPELINE")
+    print("=" * 80)
+    print(f"Reports: {', '.join(reports)} | {len(jobs)} jobs | {workers} processes | format: {args.format}")
+    print("=" * 80)
+
+    outcomes, wall = run_pipeline(jobs, workers=workers, max_tasks=args.max_tasks, progress=print_outcome,
+                                  manifest=ReportManifest(args.manifest), force=args.force)
+
+    rendered = [o for o in outcomes if o['filename'] and not o['skipped']]
+    skipped = [o for o in outcomes if o['skipped']]
+    failed = [o for o in outcomes if o['error']]
+    print(f"\n{'='*80}")
+    print("✅ COMPLETED!")
+    print(f"{'='*80}")
+    print(f"Generated {len(rendered)}/{len(jobs)} reports, {len(skipped)} unchanged (not re-rendered), "
+          f"{len(failed)} errors")
+    print_timings(outcomes, wall)
+
+if __name__ == "__main__":
+    main()
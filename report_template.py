@@ -0,0 +1,216 @@
+"""
+Shared PNG report template (header, info, parameters, statistics, trades, equity, credit)
+- A report is a list of sections; a section is any callable (fig, y_pos) -> new y_pos that
+  draws its panel below y_pos (figure coordinates, top = 1). The builders below return the
+  panels the backtest_*_reports scripts share; scripts only supply their texts and columns
+- matplotlib is imported by render_report only, so importing a report script (pipeline
+  job discovery, optimizer workers, HTML-only runs) does not load it
+"""
+
+import os
+from datetime import datetime
+import pandas as pd
+from downsample import downsample
+from trade_log import exits_by_time
+
+# Trades table columns: (label, width, value of an exit trade, coloured by profit)
+LEADING_COLUMNS = [
+    ('Date Time', 0.12, lambda t: pd.to_datetime(t['timestamp']).strftime('%m/%d/%Y\n%H:%M'), False),
+    ('Type', 0.06, lambda t: t['type'], False),
+    ('Price', 0.08, lambda t: f"${t['price']:.4f}", False),
+    ('Amount', 0.08, lambda t: f"{t['amount']:.4f}", False),
+]
+# Exit details of the DCA engines (ADX, PSAR)
+DCA_COLUMNS = [
+    ('Proceeds ($)', 0.10, lambda t: f"${t.get('proceeds', 0):,.2f}", True),
+    ('Invested ($)', 0.10, lambda t: f"${t.get('total_invested', 0):,.2f}", True),
+    ('Profit ($)', 0.10, lambda t: f"${t.get('profit', 0):,.2f}", True),
+    ('Profit %', 0.10, lambda t: f"{t.get('profit_pct', 0):+.2f}%", True),
+    ('Reason', 0.22, lambda t: t.get('reason', '')[:25], False),
+]
+# Exit details of the RSI engines (improved, advanced, intraday)
+RSI_COLUMNS = [
+    ('Capital/Proceeds ($)', 0.10, lambda t: f"${t.get('proceeds', 0):,.2f}", False),
+    ('RSI', 0.06, lambda t: f"{t.get('rsi', 0):.1f}", True),
+    ('Invested', 0.10, lambda t: f"${t.get('total_invested', 0):,.2f}", True),
+    ('Profit ($)', 0.10, lambda t: f"${t.get('profit', 0):,.2f}", True),
+    ('Profit %', 0.10, lambda t: f"{t.get('profit_pct', 0):+.2f}%", True),
+    ('Reason', 0.16, lambda t: t.get('reason', '')[:20], False),
+]
+
+def figure_height(timeframe):
+    """Figure height for intraday reports (more rows on shorter timeframes)"""
+    if timeframe in ['1H', '2H']:
+        return 45
+    if timeframe in ['4H', '6H']:
+        return 40
+    return 35
+
+def info_text(results):
+    """Test period / capital / profit line shown under the header"""
+    return f"""
+    Test Period: {results['start_date'].strftime('%m/%d/%Y')} → {results['end_date'].strftime('%m/%d/%Y')} | 
+    Candles: {results['days']} | 
+    Initial Capital: ${results['initial_capital']:,.2f} | 
+    Final Capital: ${results['final_capital']:,.2f} | 
+    Profit: ${results['total_profit']:,.2f} ({results['total_profit_pct']:+.2f}%) | 
+    Total Trades: {results.get('selected_trades_count', results['total_trades'])} | 
+    Sell Trades: {results['total_trades']} | 
+    Win Rate: {results['win_rate']:.2f}%
+    """
+
+def header_section(title, subtitle, footnote, description=None):
+    """Title, strategy line, optional italic description and the generated/settings footnote"""
+    def draw(fig, y_pos):
+        ax = fig.add_axes([0.05, y_pos - 0.10, 0.9, 0.10])
+        ax.axis('off')
+        lines = [(title, dict(fontsize=24, fontweight='bold')),
+                 (subtitle, dict(fontsize=16, fontweight='bold'))]
+        if description:
+            lines.append((description, dict(fontsize=12, style='italic')))
+        lines.append((f"Generated: {datetime.now().strftime('%m/%d/%Y %H:%M:%S')} | {footnote}",
+                      dict(fontsize=11, style='italic')))
+        positions = [0.75, 0.55, 0.35, 0.10] if description else [0.75, 0.45, 0.15]
+        for y, (text, style) in zip(positions, lines):
+            ax.text(0.5, y, text, ha='center', va='center', transform=ax.transAxes, **style)
+        return y_pos - 0.12
+    return draw
+
+def text_section(text, height, spacing, facecolor, fontsize=10, bold=False):
+    """
+    Boxed text panel (info, parameters, conclusion)
+
+    Parameters:
+    - height: Panel height (figure fraction)
+    - spacing: Distance to the next panel (height + gap)
+    - facecolor: Box colour
+    """
+    def draw(fig, y_pos):
+        ax = fig.add_axes([0.05, y_pos - height, 0.9, height])
+        ax.axis('off')
+        ax.text(0.02, 0.5, text, fontsize=fontsize, verticalalignment='center',
+                bbox=dict(boxstyle='round', facecolor=facecolor, alpha=0.7),
+                **({'weight': 'bold'} if bold else {}))
+        return y_pos - spacing
+    return draw
+
+def stats_section(results, title='DETAILED STATISTICS'):
+    """Metric/value table: wins, losses, win rate, averages and the top 3 exit reasons"""
+    def draw(fig, y_pos):
+        ax = fig.add_axes([0.05, y_pos - 0.06, 0.9, 0.06])
+        ax.axis('off')
+        ax.set_title(title, fontsize=14, fontweight='bold', pad=10)
+        stats_data = [
+            ['Metric', 'Value'],
+            ['Winning Trades', f"{results['winning_trades']}"],
+            ['Losing Trades', f"{results['losing_trades']}"],
+            ['Win Rate', f"{results['win_rate']:.2f}%"],
+            ['Avg Profit/Trade', f"${results['avg_profit']:,.2f}"],
+            ['Avg Profit %', f"{results['avg_profit_pct']:+.2f}%"],
+        ]
+        for reason, count in list((results.get('sell_reasons') or {}).items())[:3]:
+            stats_data.append([f"Reason: {reason}", f"{count} times"])
+
+        table = ax.table(cellText=stats_data, cellLoc='left', loc='center', bbox=[0, 0, 1, 1])
+        table.auto_set_font_size(False)
+        table.set_fontsize(10)
+        table.scale(1, 2.5)
+        for col in range(2):
+            table[(0, col)].set_facecolor('#2C3E50')
+            table[(0, col)].set_text_props(weight='bold', color='white')
+        return y_pos - 0.08
+    return draw
+
+def trades_section(trades, columns, max_trades=100, exit_type='SELL', header_color='#1A237E'):
+    """
+    Table of the first max_trades exits (by time)
+
+    Parameters:
+    - trades: Selected trades (results['trades'])
+    - columns: Columns after LEADING_COLUMNS (DCA_COLUMNS, RSI_COLUMNS or the same shape:
+      (label, width, function(trade) -> text, coloured green/red by the trade's profit))
+    """
+    def draw(fig, y_pos):
+        exits = exits_by_time(trades, exit_type)[:max_trades]
+        if not exits:
+            return y_pos
+        all_columns = [('#', 0.04, None, False)] + LEADING_COLUMNS + list(columns)
+        rows = [[str(number)] + [value(trade) for _, _, value, _ in all_columns[1:]]
+                for number, trade in enumerate(exits, start=1)]
+
+        table_height = min(0.75, 0.03 + len(rows) * 0.012)
+        ax = fig.add_axes([0.03, y_pos - table_height, 0.94, table_height])
+        ax.axis('off')
+        ax.set_title(f'DETAILED TRADES TABLE - {max_trades} NEAREST TRADES ({len(exits)} sell trades)',
+                     fontsize=13, fontweight='bold', pad=12)
+
+        font_size = 8
+        table = ax.table(cellText=rows, colLabels=[column[0] for column in all_columns],
+                         cellLoc='center', loc='center', bbox=[0, 0, 1, 1],
+                         colWidths=[column[1] for column in all_columns])
+        table.auto_set_font_size(False)
+        table.set_fontsize(font_size)
+        table.scale(1, 1.2)
+        for col in range(len(all_columns)):
+            table[(0, col)].set_facecolor(header_color)
+            table[(0, col)].set_text_props(weight='bold', color='white', size=font_size + 1)
+        highlight = [col for col, column in enumerate(all_columns) if column[3]]
+        for row, trade in enumerate(exits, start=1):
+            color = '#C8E6C9' if trade.get('profit', 0) > 0 else '#FFCDD2'
+            for col in highlight:
+                table[(row, col)].set_facecolor(color)
+        return y_pos - (table_height + 0.02)
+    return draw
+
+def equity_section(results, pair, timeframe, max_points=None):
+    """
+    Equity curve (downsampled) against the initial capital
+    max_points: point budget of this chart (see downsample.py; None = CHART_MAX_POINTS)
+    """
+    def draw(fig, y_pos):
+        if not results.get('equity_curve'):
+            return y_pos
+        initial_capital = results['initial_capital']
+        ax = fig.add_axes([0.05, y_pos - 0.12, 0.9, 0.12])
+        candles, equity = downsample(results['equity_curve'], max_points)
+        ax.plot(candles, equity, linewidth=2.5, color='#1976D2', label='Equity Curve')
+        ax.axhline(y=initial_capital, color='red', linestyle='--', linewidth=2, label='Initial Capital', alpha=0.7)
+        ax.fill_between(candles, initial_capital, equity, where=equity >= initial_capital, alpha=0.3, color='green')
+        ax.fill_between(candles, initial_capital, equity, where=equity < initial_capital, alpha=0.3, color='red')
+        ax.set_title(f'Equity Curve - {pair} ({timeframe})', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Time (Candles)', fontsize=10)
+        ax.set_ylabel('Portfolio Value ($)', fontsize=10)
+        ax.legend(fontsize=9)
+        ax.grid(True, alpha=0.3)
+        return y_pos - 0.14
+    return draw
+
+def credit_section(text="Backtest by SeerBOT Team"):
+    def draw(fig, y_pos):
+        ax = fig.add_axes([0.05, y_pos - 0.03, 0.9, 0.03])
+        ax.axis('off')
+        ax.text(0.5, 0.5, text, fontsize=12, verticalalignment='center', horizontalalignment='center',
+                weight='bold', color='#1976D2',
+                bbox=dict(boxstyle='round', facecolor='#F5F5F5', alpha=0.8, edgecolor='#1976D2', linewidth=2))
+        return y_pos - 0.04
+    return draw
+
+def render_report(sections, filename, fig_height=40):
+    """
+    Draw the sections top to bottom and save the figure as PNG
+
+    Returns: filename
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(24, fig_height))
+    fig.subplots_adjust(top=0.96)
+    try:
+        y_pos = 0.97
+        for section in sections:
+            y_pos = section(fig, y_pos)
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        fig.savefig(filename, dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
+    finally:
+        plt.close(fig)
+    return filename
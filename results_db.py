@@ -0,0 +1,223 @@
+"""
+Lưu kết quả backtest vào SQLite để không phải chạy lại cùng tham số trên cùng dữ liệu
+- Khóa = hash(engine + mã nguồn engine, tham số, fingerprint đoạn dữ liệu)
+- Sửa file engine hoặc file dữ liệu thì khóa thay đổi, kết quả cũ tự động không dùng nữa
+- Index theo pair/timeframe/score để truy vấn top kết quả nhanh
+- An toàn khi nhiều process cùng ghi (WAL, mỗi process một connection)
+
+Đặt biến môi trường RESULTS_DB=off để tắt cache, hoặc RESULTS_DB=<đường dẫn> để đổi file.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from data_quality import file_fingerprint
+from ohlcv_store import DATA_DIR, ohlcv_source
+
+DB_PATH = 'results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    engine TEXT NOT NULL,
+    pair TEXT,
+    timeframe TEXT,
+    params TEXT NOT NULL,
+    data TEXT NOT NULL,
+    score REAL,
+    total_profit_pct REAL,
+    win_rate REAL,
+    total_trades INTEGER,
+    result BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_pair_timeframe ON results (pair, timeframe);
+CREATE INDEX IF NOT EXISTS idx_results_score ON results (score DESC);
+CREATE INDEX IF NOT EXISTS idx_results_engine ON results (engine);
+"""
+
+# Giá trị trả về của get() khi chưa có kết quả (kết quả None = không có lệnh vẫn được cache)
+MISSING = object()
+
+_ENGINE_VERSIONS = {}
+_DEFAULT_DB = {}
+
+def engine_name(engine_cls):
+    """Tên đầy đủ của engine (module.Class)"""
+    return f"{engine_cls.__module__}.{engine_cls.__qualname__}"
+
+def engine_version(engine_cls):
+    """Hash mã nguồn module chứa engine (sửa engine thì kết quả cache cũ không còn khớp)"""
+    name = engine_name(engine_cls)
+    if name not in _ENGINE_VERSIONS:
+        try:
+            source = inspect.getsource(inspect.getmodule(engine_cls))
+        except (OSError, TypeError):
+            source = name
+        _ENGINE_VERSIONS[name] = hashlib.sha256(source.encode()).hexdigest()[:16]
+    return _ENGINE_VERSIONS[name]
+
+def data_fingerprint(source, df=None, quality=None):
+    """
+    Fingerprint đoạn dữ liệu: file nguồn (size, mtime) + số nến và timestamp đầu/cuối của đoạn đã cắt
+
+    Parameters:
+    - source: File dữ liệu gốc hoặc fingerprint file đã tính trước
+    - df: DataFrame đã lọc/cắt thực sự đưa vào engine
+    - quality: Chế độ xử lý dữ liệu lỗi đã áp dụng ('skip'/'repair', xem data_quality)
+    """
+    if isinstance(source, dict):
+        fingerprint = dict(source)
+    else:
+        fingerprint = {'file': os.path.basename(source), **file_fingerprint(source)}
+    if df is not None:
+        fingerprint['rows'] = len(df)
+        if len(df) and 'timestamp' in df.columns:
+            fingerprint['first'] = str(df['timestamp'].iloc[0])
+            fingerprint['last'] = str(df['timestamp'].iloc[-1])
+    if quality:
+        fingerprint['quality'] = quality
+    return fingerprint
+
+def source_fingerprint(pair, timeframe, data_dir=DATA_DIR, df=None, quality=None):
+    """
+    Fingerprint dữ liệu đọc bằng ohlcv_store.read_ohlcv: cặp, khung và file nguồn thực sự đã đọc
+    (CSV hoặc meta.json của columnar store) để sửa dữ liệu là cache không còn khớp
+    """
+    source = ohlcv_source(pair, timeframe, data_dir)
+    files = file_fingerprint(source) if source is not None else {}
+    return data_fingerprint({'pair': pair, 'timeframe': timeframe, **files}, df, quality)
+
+def default_score(results):
+    """Score mặc định lưu vào cột score: lợi nhuận 70%, win rate 20%, số lệnh 10%"""
+    if not results or results['total_trades'] == 0:
+        return None
+    return (results['total_profit_pct'] * 0.7 + (results['win_rate'] / 100) * 20
+            + min(results['total_trades'] / 20, 1) * 10)
+
+def result_key(engine_cls, params, data):
+    """Khóa cache: hash của engine, tham số và fingerprint dữ liệu"""
+    payload = json.dumps({
+        'engine': engine_name(engine_cls),
+        'version': engine_version(engine_cls),
+        'params': params,
+        'data': data
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResultsDB:
+    """Kho kết quả backtest trên SQLite"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Lấy kết quả đã lưu (MISSING nếu chưa có)"""
+        row = self.conn.execute('SELECT result FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def put(self, key, result, engine_cls, params, data, pair=None, timeframe=None, score=None):
+        """Lưu kết quả backtest (ghi đè nếu đã có)"""
+        summary = result or {}
+        blob = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO results (key, engine, pair, timeframe, params, data, score, '
+                'total_profit_pct, win_rate, total_trades, result, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, engine_name(engine_cls), pair, timeframe,
+                 json.dumps(params, sort_keys=True, default=str), json.dumps(data, sort_keys=True, default=str),
+                 score, summary.get('total_profit_pct'), summary.get('win_rate'), summary.get('total_trades'),
+                 blob, time.time())
+            )
+
+    def top(self, pair=None, timeframe=None, engine_cls=None, limit=20):
+        """Top kết quả theo score (lọc theo pair/timeframe/engine)"""
+        query = 'SELECT pair, timeframe, engine, params, score, total_profit_pct, win_rate, total_trades FROM results'
+        conditions, args = ['score IS NOT NULL'], []
+        if pair is not None:
+            conditions.append('pair = ?')
+            args.append(pair)
+        if timeframe is not None:
+            conditions.append('timeframe = ?')
+            args.append(timeframe)
+        if engine_cls is not None:
+            conditions.append('engine = ?')
+            args.append(engine_name(engine_cls))
+        query += ' WHERE ' + ' AND '.join(conditions) + ' ORDER BY score DESC LIMIT ?'
+        args.append(limit)
+
+        columns = ['pair', 'timeframe', 'engine', 'params', 'score', 'total_profit_pct', 'win_rate', 'total_trades']
+        rows = []
+        for row in self.conn.execute(query, args):
+            record = dict(zip(columns, row))
+            record['params'] = json.loads(record['params'])
+            rows.append(record)
+        return rows
+
+    def close(self):
+        self.conn.close()
+
+def get_default_db():
+    """
+    Kho kết quả mặc định của process hiện tại (None nếu đã tắt bằng RESULTS_DB=off)
+    Mỗi process mở connection riêng (connection SQLite không dùng chung qua fork được)
+    """
+    path = os.environ.get('RESULTS_DB', DB_PATH)
+    if path.lower() in ('off', '0', 'none', ''):
+        return None
+    pid = os.getpid()
+    if _DEFAULT_DB.get('pid') != pid or _DEFAULT_DB.get('path') != path:
+        _DEFAULT_DB.update(pid=pid, path=path, db=ResultsDB(path))
+    return _DEFAULT_DB['db']
+
+def cached_backtest(engine_cls, params, df, data, pair=None, timeframe=None, score_fn=default_score, db=None,
+                    key_params=None):
+    """
+    Chạy backtest hoặc lấy kết quả đã lưu nếu cùng engine, tham số và dữ liệu
+
+    Parameters:
+    - engine_cls: Class engine (ví dụ ImprovedBacktestEngine)
+    - params: dict tham số khởi tạo engine
+    - df: DataFrame đưa vào engine.run
+    - data: Fingerprint dữ liệu (từ data_fingerprint)
+    - pair, timeframe: Thông tin để truy vấn
+    - score_fn: Hàm tính score từ kết quả (lưu vào cột score có index)
+    - db: ResultsDB (mặc định get_default_db())
+    - key_params: Tham số dùng làm khóa cache (mặc định params), ví dụ tham số hiệu lực sau khi
+      engine tự điều chỉnh theo timeframe (xem sweep.effective_params)
+
+    Returns: dict kết quả giống engine.get_results()
+    """
+    db = db if db is not None else get_default_db()
+    key_params = params if key_params is None else key_params
+    key = None
+    if db is not None:
+        key = result_key(engine_cls, key_params, data)
+        cached = db.get(key)
+        if cached is not MISSING:
+            return cached
+
+    engine = engine_cls(**params)
+    engine.run(df)
+    results = engine.get_results()
+
+    if db is not None:
+        score = score_fn(results) if score_fn and results else None
+        db.put(key, results, engine_cls, key_params, data, pair=pair, timeframe=timeframe, score=score)
+    return results
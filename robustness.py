@@ -0,0 +1,153 @@
+"""
+Đánh giá độ bền của kết quả backtest bằng Monte Carlo trên chuỗi lệnh
+- Lấy lợi nhuận từng lệnh (theo % vốn tại thời điểm vào lệnh) từ kết quả engine
+- Tạo hàng nghìn chuỗi lệnh giả lập: bootstrap (lấy mẫu có hoàn lại) hoặc shuffle (đảo thứ tự)
+- Tính phân phối vốn cuối, max drawdown và xác suất cháy tài khoản (risk of ruin)
+Toàn bộ tính toán vector hóa bằng numpy (mỗi hàng một chuỗi), đủ nhanh để chạy cho mọi
+combination trong một lần tối ưu.
+
+Lưu ý: với shuffle, vốn cuối không đổi (tích các lợi nhuận không phụ thuộc thứ tự),
+chỉ phân phối drawdown thay đổi.
+"""
+
+import argparse
+import numpy as np
+
+N_SIMULATIONS = 10_000
+RUIN_LEVEL = 0.5        # Cháy tài khoản = vốn giảm xuống dưới 50% vốn ban đầu
+MAX_CELLS = 4_000_000   # Số phần tử tối đa mỗi batch (giới hạn bộ nhớ ~32MB)
+METHODS = ['bootstrap', 'shuffle']
+
+def trade_returns(results, initial_capital=None):
+    """
+    Lợi nhuận từng lệnh bán theo tỉ lệ vốn trước lệnh (0.02 = +2%)
+
+    Parameters:
+    - results: Kết quả engine.get_results() (cần 'trades' và 'initial_capital')
+    - initial_capital: Vốn ban đầu (mặc định lấy từ results)
+
+    Returns: mảng numpy theo thứ tự thời gian
+    """
+    if not results:
+        return np.empty(0)
+    profits = np.array([t['profit'] for t in results.get('trades', []) if t['type'] == 'SELL'], dtype=float)
+    if len(profits) == 0:
+        return profits
+    capital = initial_capital if initial_capital is not None else results['initial_capital']
+    equity_before = capital + np.concatenate(([0.0], np.cumsum(profits)[:-1]))
+    return profits / equity_before
+
+def _simulate_batch(returns, n_sims, method, rng):
+    """Ma trận lợi nhuận (n_sims × số lệnh) cho một batch"""
+    if method == 'bootstrap':
+        return returns[rng.integers(0, len(returns), size=(n_sims, len(returns)))]
+    return rng.permuted(np.broadcast_to(returns, (n_sims, len(returns))), axis=1)
+
+def monte_carlo(returns, n_sims=N_SIMULATIONS, method='bootstrap', ruin_level=RUIN_LEVEL, seed=42):
+    """
+    Monte Carlo trên chuỗi lợi nhuận từng lệnh
+
+    Parameters:
+    - returns: Lợi nhuận từng lệnh (từ trade_returns)
+    - n_sims: Số chuỗi giả lập
+    - method: 'bootstrap' (lấy mẫu có hoàn lại) hoặc 'shuffle' (đảo thứ tự)
+    - ruin_level: Ngưỡng cháy tài khoản (tỉ lệ vốn ban đầu)
+    - seed: Seed cho kết quả lặp lại được
+
+    Returns: dict {'final_return': mảng % lợi nhuận cuối, 'max_drawdown': mảng % drawdown,
+                   'ruined': mảng bool} — mỗi phần tử một chuỗi
+    """
+    if method not in METHODS:
+        raise ValueError(f"Phương pháp không hợp lệ: {method} (chọn {', '.join(METHODS)})")
+    returns = np.asarray(returns, dtype=float)
+    if len(returns) == 0:
+        return {'final_return': np.zeros(0), 'max_drawdown': np.zeros(0), 'ruined': np.zeros(0, dtype=bool)}
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, MAX_CELLS // len(returns))
+    final_return, max_drawdown, ruined = [], [], []
+
+    for start in range(0, n_sims, batch):
+        sims = _simulate_batch(returns, min(batch, n_sims - start), method, rng)
+        equity = np.cumprod(1.0 + sims, axis=1)  # Vốn sau mỗi lệnh (vốn ban đầu = 1)
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+
+        final_return.append((equity[:, -1] - 1.0) * 100)
+        max_drawdown.append((1.0 - equity / peak).max(axis=1) * 100)
+        ruined.append(equity.min(axis=1) < ruin_level)
+
+    return {
+        'final_return': np.concatenate(final_return),
+        'max_drawdown': np.concatenate(max_drawdown),
+        'ruined': np.concatenate(ruined)
+    }
+
+def summarize_monte_carlo(simulation):
+    """Các chỉ số tóm tắt từ kết quả monte_carlo (phân vị theo %)"""
+    final_return = simulation['final_return']
+    if len(final_return) == 0:
+        return None
+    drawdown = simulation['max_drawdown']
+    p5, p50, p95 = np.percentile(final_return, [5, 50, 95])
+    dd50, dd95 = np.percentile(drawdown, [50, 95])
+    return {
+        'mc_return_p5': float(p5),
+        'mc_return_p50': float(p50),
+        'mc_return_p95': float(p95),
+        'mc_prob_loss': float((final_return < 0).mean() * 100),
+        'mc_drawdown_p50': float(dd50),
+        'mc_drawdown_p95': float(dd95),
+        'mc_risk_of_ruin': float(simulation['ruined'].mean() * 100)
+    }
+
+def robustness_metrics(results, n_sims=N_SIMULATIONS, method='bootstrap', ruin_level=RUIN_LEVEL, seed=42):
+    """
+    Chỉ số độ bền cho một kết quả backtest (None nếu không có lệnh)
+    Dùng trong các vòng tối ưu: thêm vào dict kết quả của từng combination
+    """
+    return summarize_monte_carlo(monte_carlo(trade_returns(results), n_sims, method, ruin_level, seed))
+
+def print_robustness(metrics):
+    """In tóm tắt Monte Carlo"""
+    print(f"  Lợi nhuận (P5 / P50 / P95): {metrics['mc_return_p5']:.2f}% / "
+          f"{metrics['mc_return_p50']:.2f}% / {metrics['mc_return_p95']:.2f}%")
+    print(f"  Xác suất lỗ: {metrics['mc_prob_loss']:.1f}%")
+    print(f"  Max drawdown (P50 / P95): {metrics['mc_drawdown_p50']:.2f}% / {metrics['mc_drawdown_p95']:.2f}%")
+    print(f"  Risk of ruin (vốn < {RUIN_LEVEL*100:.0f}%): {metrics['mc_risk_of_ruin']:.2f}%")
+
+def main():
+    """Monte Carlo cho backtest FixedAmount với tham số mặc định"""
+    from backtest_fixed_amount import FixedAmountBacktestEngine
+    from ohlcv_store import read_ohlcv
+
+    parser = argparse.ArgumentParser(description='Monte Carlo độ bền của chuỗi lệnh')
+    parser.add_argument('--pairs', default='iBTCUSDM,iETHUSDM,ADAUSDM')
+    parser.add_argument('--timeframe', default='1D')
+    parser.add_argument('--sims', type=int, default=N_SIMULATIONS)
+    parser.add_argument('--method', choices=METHODS, default='bootstrap')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"MONTE CARLO ĐỘ BỀN ({args.method}, {args.sims:,} chuỗi)")
+    print("=" * 80)
+
+    for pair in [p.strip() for p in args.pairs.split(',') if p.strip()]:
+        print(f"\n{pair} {args.timeframe}")
+        df = read_ohlcv(pair, args.timeframe)
+        if df is None:
+            print(f"  ✗ Không tìm thấy dữ liệu")
+            continue
+
+        engine = FixedAmountBacktestEngine(use_trend_filter=False, use_volume_filter=False)
+        engine.run(df)
+        results = engine.get_results()
+        if not results:
+            print("  ✗ Không có lệnh")
+            continue
+
+        metrics = robustness_metrics(results, n_sims=args.sims, method=args.method)
+        print(f"  Backtest: {results['total_profit_pct']:.2f}% | {results['total_trades']} lệnh")
+        print_robustness(metrics)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Danh mục chiến lược dùng chung cho các công cụ tối ưu (optimize.py, distributed_sweep.py)
+- Mỗi chiến lược: module/class engine, tham số cố định và grid mặc định
+- Không gian tham số: grid mặc định có thể bị thay từng trục bằng spec
+  'tên=v1,v2,v3' (danh sách) hoặc 'tên=start:stop:step' (khoảng, gồm cả stop),
+  hoặc file JSON {tên: [giá trị] hoặc {"min", "max", "step"}}
+- Engine có tham số timeframe (improved, advanced) được truyền khung thời gian của sweep
+"""
+
+import importlib
+import json
+from itertools import product
+from sweep import dedupe_params, engine_param_names
+
+INITIAL_CAPITAL = 10000
+FIXED_AMOUNT = 500
+
+STRATEGIES = {
+    'rsi': {
+        'module': 'backtest_fixed_amount',
+        'engine': 'FixedAmountBacktestEngine',
+        'description': 'RSI + DCA, số tiền cố định mỗi lệnh',
+        'base': {'use_trend_filter': False, 'use_volume_filter': False},
+        'grid': {'rsi_buy': [20, 25, 30], 'rsi_sell': [70, 75, 80], 'take_profit': [0.05, 0.08, 0.10],
+                 'stop_loss': [0.03, 0.04], 'max_dca': [2, 3]},
+    },
+    'position': {
+        'module': 'backtest_improved',
+        'engine': 'ImprovedBacktestEngine',
+        'description': 'RSI + DCA, mỗi lệnh theo % vốn',
+        'base': {'use_trend_filter': False, 'use_volume_filter': False},
+        'grid': {'take_profit': [0.08, 0.10, 0.12], 'stop_loss': [0.03, 0.04, 0.05],
+                 'rsi_buy': [22, 25, 28], 'rsi_sell': [75, 77, 80],
+                 'position_size': [0.05, 0.07], 'max_dca': [2, 3]},
+    },
+    'improved': {
+        'module': 'backtest_improved_strategy',
+        'engine': 'ImprovedStrategyBacktestEngine',
+        'description': 'Chiến lược cải tiến, TP/SL/RSI điều chỉnh theo timeframe',
+        'base': {},
+        'grid': {'take_profit': [0.03, 0.05, 0.08], 'stop_loss': [0.015, 0.025, 0.04],
+                 'rsi_buy': [20, 25, 30], 'rsi_sell': [70, 75, 80], 'max_dca': [1, 2, 3]},
+    },
+    'adx': {
+        'module': 'backtest_adx_dca_strategy',
+        'engine': 'ADXDCABacktestEngine',
+        'description': 'ADX + DCA',
+        'base': {},
+        'grid': {'take_profit': [0.03, 0.05, 0.08], 'dca_threshold': [0.03, 0.05, 0.08],
+                 'adx_threshold': [20, 25, 30], 'rsi_oversold': [25, 30, 35]},
+    },
+    'psar': {
+        'module': 'backtest_psar_dca_strategy',
+        'engine': 'PSARDCABacktestEngine',
+        'description': 'Parabolic SAR + DCA',
+        'base': {},
+        'grid': {'take_profit': [0.03, 0.05, 0.08], 'dca_threshold': [0.03, 0.05, 0.08],
+                 'psar_af_start': [0.01, 0.02], 'psar_af_max': [0.1, 0.2, 0.3]},
+    },
+    'advanced': {
+        'module': 'backtest_advanced_strategy',
+        'engine': 'AdvancedStrategyBacktestEngine',
+        'description': 'Advanced (trailing stop, multi-timeframe confirmation)',
+        'base': {},
+        'grid': {'take_profit': [0.03, 0.05, 0.08], 'stop_loss': [0.015, 0.025, 0.04],
+                 'rsi_buy': [20, 25, 30], 'rsi_sell': [70, 75, 80], 'max_dca': [1, 2, 3]},
+    },
+}
+
+def load_engine(strategy):
+    """Class engine của chiến lược"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Chiến lược không hợp lệ: {strategy} (chọn {', '.join(STRATEGIES)})")
+    spec = STRATEGIES[strategy]
+    return getattr(importlib.import_module(spec['module']), spec['engine'])
+
+def _parse_value(text):
+    """'3' -> 3, '0.05' -> 0.05, 'true' -> True, còn lại giữ chuỗi"""
+    text = text.strip()
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+def value_range(start, stop, step):
+    """Các giá trị từ start đến stop (gồm cả stop) cách nhau step"""
+    if step <= 0:
+        raise ValueError(f"step phải > 0: {step}")
+    count = int(round((stop - start) / step)) + 1
+    if all(isinstance(v, int) for v in (start, stop, step)):
+        return [start + i * step for i in range(count) if start + i * step <= stop]
+    return [round(start + i * step, 10) for i in range(count) if start + i * step <= stop + step * 1e-9]
+
+def parse_param_spec(spec):
+    """
+    Một trục của không gian tham số
+
+    Parameters:
+    - spec: 'tên=v1,v2,v3' hoặc 'tên=start:stop:step'
+
+    Returns: (tên, danh sách giá trị)
+    """
+    if '=' not in spec:
+        raise ValueError(f"Spec tham số không hợp lệ: {spec} (dạng tên=v1,v2 hoặc tên=start:stop:step)")
+    name, values = (part.strip() for part in spec.split('=', 1))
+    if ':' in values:
+        parts = [_parse_value(v) for v in values.split(':')]
+        if len(parts) != 3:
+            raise ValueError(f"Khoảng không hợp lệ: {spec} (dạng tên=start:stop:step)")
+        return name, value_range(*parts)
+    return name, [_parse_value(v) for v in values.split(',') if v.strip()]
+
+def load_space(path):
+    """Không gian tham số từ file JSON: {tên: [giá trị] hoặc {"min", "max", "step"}}"""
+    with open(path) as f:
+        spec = json.load(f)
+    space = {}
+    for name, values in spec.items():
+        if isinstance(values, dict):
+            space[name] = value_range(values['min'], values['max'], values['step'])
+        else:
+            space[name] = list(values)
+    return space
+
+def strategy_grid(strategy, overrides=None):
+    """
+    Grid của chiến lược: grid mặc định, các trục trong overrides thay thế trục cùng tên
+    Trục mới phải là tham số khởi tạo của engine
+    """
+    grid = dict(STRATEGIES[strategy]['grid'])
+    if overrides:
+        accepted = engine_param_names(load_engine(strategy))
+        unknown = [name for name in overrides if name not in accepted]
+        if unknown:
+            raise ValueError(f"Engine {strategy} không có tham số: {', '.join(unknown)}")
+        grid.update(overrides)
+    return grid
+
+def strategy_params(strategy, timeframe, grid=None, dedupe=True):
+    """
+    Danh sách tham số khởi tạo engine của chiến lược cho một khung thời gian
+
+    Parameters:
+    - grid: Grid (mặc định grid của chiến lược, xem strategy_grid)
+    - dedupe: True = các combination trùng tham số hiệu lực (engine tự ghi đè theo timeframe)
+      chỉ giữ một
+    """
+    spec = STRATEGIES[strategy]
+    engine_cls = load_engine(strategy)
+    accepted = engine_param_names(engine_cls)
+    grid = grid or spec['grid']
+
+    base = {'initial_capital': INITIAL_CAPITAL, **spec['base']}
+    if 'fixed_amount' in accepted:
+        base['fixed_amount'] = FIXED_AMOUNT
+    if 'timeframe' in accepted:
+        base['timeframe'] = timeframe
+
+    names = list(grid)
+    param_list = [dict(base, **dict(zip(names, values))) for values in product(*grid.values())]
+    if not dedupe:
+        return param_list
+    return [group['params'] for group in dedupe_params(engine_cls, param_list)]
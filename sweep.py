@@ -0,0 +1,265 @@
+"""
+Quét grid tham số với loại bỏ combination trùng theo tham số hiệu lực
+- Một số engine tự ghi đè tham số theo timeframe (ImprovedStrategyBacktestEngine,
+  AdvancedStrategyBacktestEngine: take_profit/stop_loss bị thay, rsi_buy bị kẹp)
+  nên nhiều điểm grid thực chất là cùng một cấu hình
+- Mỗi combination được chuẩn hóa bằng chính engine (khởi tạo rồi đọc lại thuộc tính),
+  các combination cùng tham số hiệu lực chỉ chạy backtest một lần
+- Kết quả được trả lại cho mọi combination đã yêu cầu (cùng thứ tự với grid)
+"""
+
+import argparse
+import inspect
+import os
+from itertools import product
+import pandas as pd
+from columnar_export import FORMATS, export_table
+from data_quality import QUALITY_MODES
+from ohlcv_schema import load_ohlcv_csv
+from ohlcv_store import DATA_DIR
+from parallel_grid import default_workers, imap_grid
+from results_db import cached_backtest, data_fingerprint, default_score
+from robustness import robustness_metrics
+
+# Timeframe -> (hậu tố file dữ liệu, RSI period), giống các script report
+TIMEFRAME_MAP = {
+    '6H': ('6h', 8),
+    '4H': ('4h', 8),
+    '2H': ('2h', 7),
+    '1H': ('1h', 7)
+}
+
+# Khung cao hơn dùng cho multi-timeframe confirmation của engine advanced
+HIGHER_TIMEFRAME = {
+    '4H': ['6h'],
+    '6H': ['12h', '1d']
+}
+
+DEFAULT_GRID = {
+    'take_profit': [0.03, 0.05, 0.08],
+    'stop_loss': [0.015, 0.025, 0.04],
+    'rsi_buy': [20, 22, 25, 28, 30],
+    'rsi_sell': [70, 75, 80],
+    'max_dca': [1, 2, 3],
+}
+
+_SCALAR_TYPES = (bool, int, float, str, type(None))
+
+def engine_param_names(engine_cls):
+    """Tên các tham số khởi tạo của engine"""
+    signature = inspect.signature(engine_cls.__init__)
+    return [name for name in signature.parameters if name != 'self']
+
+def effective_params(engine_cls, params):
+    """
+    Tham số hiệu lực sau khi engine tự điều chỉnh (khởi tạo engine rồi đọc lại thuộc tính)
+    Chỉ giữ tham số dạng scalar (bỏ DataFrame như higher_timeframe_df)
+    """
+    engine = engine_cls(**params)
+    effective = {}
+    for name in engine_param_names(engine_cls):
+        value = getattr(engine, name, params.get(name))
+        if isinstance(value, _SCALAR_TYPES):
+            effective[name] = value
+    return effective
+
+def dedupe_params(engine_cls, param_list):
+    """
+    Gom các combination có cùng tham số hiệu lực
+
+    Returns: danh sách dict {'params': tham số yêu cầu đại diện, 'effective': tham số hiệu lực,
+             'members': các index trong param_list dùng chung kết quả}
+    """
+    groups = {}
+    for index, params in enumerate(param_list):
+        effective = effective_params(engine_cls, params)
+        key = tuple(sorted(effective.items()))
+        if key not in groups:
+            groups[key] = {'params': params, 'effective': effective, 'members': []}
+        groups[key]['members'].append(index)
+    return list(groups.values())
+
+def evaluate_effective(frames, task):
+    """Chạy backtest cho một cấu hình hiệu lực (chạy trong worker)"""
+    params = dict(task['params'])
+    for name in task['frame_params']:
+        params[name] = frames[name]
+    return cached_backtest(task['engine'], params, frames['df'], task['data'],
+                           pair=task['pair'], timeframe=task['timeframe'],
+                           key_params=task['effective'])
+
+def sweep(engine_cls, df, param_list, extra_frames=None, data=None, pair=None, timeframe=None,
+          workers=None, robustness=False, summarize=None):
+    """
+    Backtest toàn bộ grid, mỗi cấu hình hiệu lực chỉ chạy một lần
+
+    Parameters:
+    - engine_cls: Class engine
+    - df: Dữ liệu OHLCV
+    - param_list: Danh sách dict tham số khởi tạo engine (giá trị scalar)
+    - extra_frames: dict {tên tham số: DataFrame} truyền cho mọi engine (ví dụ higher_timeframe_df),
+      đặt vào shared memory cùng df
+    - data: Fingerprint dữ liệu cho cache kết quả (mặc định tính từ df)
+    - workers: Số process chạy song song
+    - robustness: True = thêm chỉ số Monte Carlo (mc_*, xem robustness.py) vào mỗi kết quả
+    - summarize: Hàm rút gọn kết quả (ví dụ chỉ giữ các chỉ số, bỏ lệnh/equity curve) trước khi
+      nhân bản cho các combination, để grid lớn không phải giữ toàn bộ kết quả engine
+
+    Returns: (danh sách kết quả cùng thứ tự param_list, thống kê)
+    """
+    extra_frames = {name: frame for name, frame in (extra_frames or {}).items() if frame is not None}
+    groups = dedupe_params(engine_cls, param_list)
+    if data is None:
+        data = data_fingerprint({'source': 'frame'}, df)
+
+    tasks = [
+        {'engine': engine_cls, 'params': group['params'], 'effective': group['effective'],
+         'frame_params': list(extra_frames), 'data': data, 'pair': pair, 'timeframe': timeframe}
+        for group in groups
+    ]
+
+    results = [None] * len(param_list)
+    for index, result in imap_grid(evaluate_effective, tasks, {'df': df, **extra_frames}, workers=workers):
+        if robustness and result:
+            result = {**result, **(robustness_metrics(result) or {})}  # Một lần cho mỗi cấu hình hiệu lực
+        if summarize and result:
+            result = summarize(result)
+        # Mỗi combination nhận bản sao riêng (caller có thể thêm khóa vào kết quả)
+        for member in groups[index]['members']:
+            results[member] = dict(result) if result else None
+
+    stats = {'requested': len(param_list), 'simulated': len(groups)}
+    return results, stats
+
+def expand_grid(grid, base=None):
+    """Chuyển dict {tham số: danh sách giá trị} thành danh sách dict tham số"""
+    names = list(grid)
+    return [dict(base or {}, **dict(zip(names, values))) for values in product(*grid.values())]
+
+def split_grid(grid, indicator_axes):
+    """
+    Tách grid thành trục chỉ báo (ảnh hưởng cách tính chỉ báo, ví dụ rsi_period) và
+    trục quyết định (chỉ ảnh hưởng logic mua/bán, ví dụ rsi_buy, take_profit)
+    để chỉ báo được tính một lần cho mỗi giá trị trục chỉ báo
+
+    Parameters:
+    - grid: dict {tham số: danh sách giá trị}
+    - indicator_axes: Tên các tham số thuộc trục chỉ báo
+
+    Returns: danh sách (dict tham số chỉ báo, danh sách dict tham số quyết định),
+             thứ tự giống product() khi trục chỉ báo đứng trước trong grid
+    """
+    indicator_grid = {name: values for name, values in grid.items() if name in indicator_axes}
+    decision_grid = {name: values for name, values in grid.items() if name not in indicator_axes}
+    decisions = expand_grid(decision_grid)
+    return [(indicator, decisions) for indicator in expand_grid(indicator_grid)]
+
+def load_higher_timeframe(pair, timeframe, quality=None, data_dir=DATA_DIR):
+    """Dữ liệu khung cao hơn (có EMA50/EMA200) cho engine advanced, None nếu không có"""
+    from backtest_advanced_strategy import calculate_ema
+
+    for suffix in HIGHER_TIMEFRAME.get(timeframe, []):
+        filename = os.path.join(data_dir, f"{pair}_ohlcv_{suffix}.csv")
+        higher = load_ohlcv_csv(filename, quality=quality, timeframe=suffix)
+        if higher is not None and len(higher) > 200:
+            higher['ema50'] = calculate_ema(higher['close'], period=50)
+            higher['ema200'] = calculate_ema(higher['close'], period=200)
+            higher.attrs['source'] = filename  # Cho higher_timeframe_fingerprint
+            return higher
+    return None
+
+def higher_timeframe_fingerprint(data, higher):
+    """
+    Fingerprint dữ liệu kèm file khung cao hơn đã dùng (None nếu engine chạy không có khung cao hơn),
+    để thêm/sửa file khung cao hơn cũng làm cache không còn khớp
+    """
+    source = higher.attrs.get('source') if higher is not None else None
+    return {**data, 'higher_timeframe': data_fingerprint(source, higher) if source else None}
+
+def load_engine(name):
+    """Class engine theo tên: 'improved' hoặc 'advanced'"""
+    if name == 'improved':
+        from backtest_improved_strategy import ImprovedStrategyBacktestEngine
+        return ImprovedStrategyBacktestEngine
+    if name == 'advanced':
+        from backtest_advanced_strategy import AdvancedStrategyBacktestEngine
+        return AdvancedStrategyBacktestEngine
+    raise ValueError(f"Engine không hợp lệ: {name} (chọn improved, advanced)")
+
+def main():
+    """Quét grid cho engine có điều chỉnh tham số theo timeframe"""
+    parser = argparse.ArgumentParser(description='Quét grid tham số (bỏ combination trùng tham số hiệu lực)')
+    parser.add_argument('--engine', choices=['improved', 'advanced'], default='improved')
+    parser.add_argument('--pairs', default='iBTCUSDM,iETHUSDM,ADAUSDM')
+    parser.add_argument('--timeframes', default='4H,6H')
+    parser.add_argument('--workers', type=int, default=None, help='Số process (mặc định: số CPU)')
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help='Định dạng file kết quả (mặc định: RESULTS_FORMAT hoặc csv)')
+    parser.add_argument('--quality', choices=QUALITY_MODES, default=None,
+                        help='Xử lý gap/trùng/nến lỗi theo quality index (mặc định: giữ nguyên dữ liệu)')
+    args = parser.parse_args()
+
+    engine_cls = load_engine(args.engine)
+
+    print("=" * 80)
+    print(f"QUÉT GRID THAM SỐ - {engine_cls.__name__}")
+    print("=" * 80)
+    print(f"⚙️  {args.workers or default_workers()} process")
+
+    for pair in [p.strip() for p in args.pairs.split(',') if p.strip()]:
+        for timeframe in [t.strip() for t in args.timeframes.split(',') if t.strip()]:
+            if timeframe not in TIMEFRAME_MAP:
+                print(f"\n✗ Timeframe không hỗ trợ: {timeframe}")
+                continue
+            file_suffix, rsi_period = TIMEFRAME_MAP[timeframe]
+            filename = f"data/{pair}_ohlcv_{file_suffix}.csv"
+
+            print(f"\n{pair} {timeframe}")
+            df = load_ohlcv_csv(filename, quality=args.quality, timeframe=timeframe)
+            if df is None:
+                print(f"  ✗ Không tìm thấy {filename}")
+                continue
+
+            base = {'initial_capital': 10000, 'fixed_amount': 500,
+                    'rsi_period': rsi_period, 'timeframe': timeframe}
+            param_list = expand_grid(DEFAULT_GRID, base)
+            data = data_fingerprint(filename, df, args.quality)
+            extra_frames = {}
+            if args.engine == 'advanced':
+                extra_frames['higher_timeframe_df'] = load_higher_timeframe(pair, timeframe, args.quality)
+                data = higher_timeframe_fingerprint(data, extra_frames['higher_timeframe_df'])
+
+            results, stats = sweep(engine_cls, df, param_list, extra_frames=extra_frames,
+                                   data=data, pair=pair, timeframe=timeframe,
+                                   workers=args.workers, robustness=True)
+            print(f"  ✓ {stats['requested']} combinations → {stats['simulated']} cấu hình hiệu lực được backtest")
+
+            rows = []
+            for params, result in zip(param_list, results):
+                if not result:
+                    continue
+                rows.append({
+                    **{name: params[name] for name in DEFAULT_GRID},
+                    'total_profit_pct': result['total_profit_pct'],
+                    'win_rate': result['win_rate'],
+                    'total_trades': result['total_trades'],
+                    'score': default_score(result),
+                    **{name: value for name, value in result.items() if name.startswith('mc_')}
+                })
+            if not rows:
+                print("  ✗ Không có combination nào tạo lệnh")
+                continue
+
+            df_results = pd.DataFrame(rows).sort_values('score', ascending=False, kind='stable')
+            output = export_table(df_results, f"sweep_{args.engine}_{pair}_{timeframe}.csv", args.format,
+                                  partition={'pair': pair, 'timeframe': timeframe},
+                                  dataset=f"sweep_{args.engine}.parquet")
+            best = df_results.iloc[0]
+            print(f"  🏆 Best: TP {best['take_profit']*100:.1f}%, SL {best['stop_loss']*100:.1f}%, "
+                  f"RSI Buy={int(best['rsi_buy'])}, RSI Sell={int(best['rsi_sell'])}, Max DCA={int(best['max_dca'])} | "
+                  f"{best['total_profit_pct']:.2f}% | {int(best['total_trades'])} lệnh | "
+                  f"Monte Carlo P5 {best['mc_return_p5']:.2f}%, DD P95 {best['mc_drawdown_p95']:.2f}%")
+            print(f"  ✓ Đã lưu {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Tạo dữ liệu thị trường giả lập quy mô lớn để load test engine và optimizer
+- Chuyển đổi regime (bull / bear / sideways / biến động mạnh) với thời lượng ngẫu nhiên
+- Volatility clustering: log-volatility theo quá trình AR(1), tính bằng tích chập FFT
+- Lợi nhuận đuôi dày (Student-t), volume theo giờ trong ngày và độ lớn biến động
+- Vectorized hoàn toàn (không vòng lặp theo nến), tạo được hàng triệu nến mỗi cặp
+- Tất định theo seed: cùng seed + tên cặp luôn cho cùng dữ liệu
+- Ghi thẳng vào columnar store (data/columnar/) hoặc CSV
+
+(CẢNH BÁO: Đây là dữ liệu giả, chỉ dùng để test hiệu năng, không dùng cho giao dịch thực)
+"""
+
+import argparse
+import os
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from ohlcv_store import DATA_DIR, NS_PER_MINUTE, ohlcv_filename, timeframe_to_minutes, write_columnar
+
+# Tham số regime tính theo ngày: drift, volatility, thời lượng trung bình (ngày), hệ số volume
+REGIMES = {
+    'bull':      {'drift': 0.004,  'volatility': 0.03, 'duration': 45, 'volume': 1.3},
+    'bear':      {'drift': -0.004, 'volatility': 0.04, 'duration': 30, 'volume': 1.2},
+    'sideways':  {'drift': 0.0,    'volatility': 0.02, 'duration': 60, 'volume': 0.8},
+    'high_vol':  {'drift': 0.0,    'volatility': 0.08, 'duration': 10, 'volume': 2.0},
+}
+
+VOL_PERSISTENCE = 0.98    # Hệ số AR(1) của log-volatility (theo nến)
+VOL_OF_VOL = 0.15         # Độ lệch chuẩn nhiễu của log-volatility
+TAIL_DOF = 4              # Bậc tự do Student-t cho lợi nhuận đuôi dày
+INTRADAY_AMPLITUDE = 0.35 # Biên độ dao động volume theo giờ trong ngày
+PEAK_HOUR_UTC = 15        # Giờ volume cao nhất (UTC)
+
+def pair_seed_sequence(seed, pair):
+    """SeedSequence riêng cho từng cặp (ổn định giữa các lần chạy, không phụ thuộc thứ tự)"""
+    return np.random.SeedSequence([seed, zlib.crc32(pair.encode())])
+
+def synthetic_pair_names(count, prefix='SYN'):
+    """Tên cặp giả lập: SYN000USDM, SYN001USDM, ..."""
+    width = max(3, len(str(count - 1)))
+    return [f"{prefix}{i:0{width}d}USDM" for i in range(count)]
+
+def generate_regimes(rng, bars, bars_per_day):
+    """
+    Tạo chuỗi regime cho từng nến (vectorized)
+
+    Returns: mảng int (chỉ số regime trong REGIMES) độ dài bars
+    """
+    n_regimes = len(REGIMES)
+    mean_bars = np.array([r['duration'] for r in REGIMES.values()]) * bars_per_day
+
+    regimes = np.empty(0, dtype=np.int64)
+    while len(regimes) < bars:
+        # Ước lượng đủ số đoạn regime, mỗi bước luôn chuyển sang regime khác
+        segments = int(bars / mean_bars.min()) + 2
+        steps = rng.integers(1, n_regimes, size=segments)
+        start = rng.integers(0, n_regimes)
+        sequence = (start + np.cumsum(steps)) % n_regimes
+        durations = rng.geometric(1.0 / np.maximum(mean_bars[sequence], 1.0))
+        regimes = np.concatenate((regimes, np.repeat(sequence, durations)))
+    return regimes[:bars]
+
+def ar1_filter(noise, phi):
+    """Quá trình AR(1) x_t = phi * x_{t-1} + noise_t tính bằng tích chập FFT với nhân phi^k"""
+    kernel_len = min(len(noise), int(np.ceil(np.log(1e-8) / np.log(phi))))
+    kernel = phi ** np.arange(kernel_len)
+    size = 1 << int(np.ceil(np.log2(len(noise) + kernel_len - 1)))
+    result = np.fft.irfft(np.fft.rfft(noise, size) * np.fft.rfft(kernel, size), size)
+    return result[:len(noise)]
+
+def generate_market(pair, bars, timeframe='1H', start='2020-01-01', seed=42, base_price=None):
+    """
+    Tạo dữ liệu OHLCV giả lập cho một cặp
+
+    Parameters:
+    - pair: Tên cặp token (dùng để tách seed)
+    - bars: Số nến
+    - timeframe: Khung thời gian ('15m', '1H', '4H', '1D', ...)
+    - start: Thời điểm nến đầu tiên
+    - seed: Seed gốc
+    - base_price: Giá khởi điểm (None = ngẫu nhiên 0.05 - 50)
+
+    Returns: dict {tên cột: mảng numpy}, timestamp dạng int64 epoch nanosecond
+    """
+    rng = np.random.default_rng(pair_seed_sequence(seed, pair))
+    minutes = timeframe_to_minutes(timeframe)
+    bars_per_day = 1440 / minutes
+
+    params = list(REGIMES.values())
+    regimes = generate_regimes(rng, bars, bars_per_day)
+    drift = np.array([r['drift'] for r in params])[regimes] / bars_per_day
+    volatility = np.array([r['volatility'] for r in params])[regimes] / np.sqrt(bars_per_day)
+    volume_factor = np.array([r['volume'] for r in params])[regimes]
+
+    # Volatility clustering: nhân volatility của regime với exp(log-vol AR(1))
+    log_vol = ar1_filter(rng.normal(0, VOL_OF_VOL, bars), VOL_PERSISTENCE)
+    sigma = volatility * np.exp(log_vol - log_vol.var() / 2)
+
+    # Lợi nhuận log đuôi dày (Student-t chuẩn hóa phương sai 1)
+    shocks = rng.standard_t(TAIL_DOF, bars) / np.sqrt(TAIL_DOF / (TAIL_DOF - 2))
+    returns = drift - 0.5 * sigma ** 2 + sigma * shocks
+
+    if base_price is None:
+        base_price = float(np.exp(rng.uniform(np.log(0.05), np.log(50))))
+    close = base_price * np.exp(np.cumsum(returns))
+
+    # Open = close trước đó kèm gap nhỏ; high/low bao quanh thân nến
+    open_ = np.empty(bars)
+    open_[0] = base_price
+    open_[1:] = close[:-1]
+    open_ *= np.exp(rng.normal(0, 0.1, bars) * sigma)
+    wick = np.abs(rng.normal(0, 0.5, (2, bars))) * sigma
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+
+    timestamps = pd.Timestamp(start).value + np.arange(bars, dtype=np.int64) * minutes * NS_PER_MINUTE
+
+    # Volume: theo giờ trong ngày x regime x độ lớn biến động x nhiễu log-normal
+    hours = (timestamps // (60 * NS_PER_MINUTE)) % 24
+    intraday = 1 + INTRADAY_AMPLITUDE * np.cos(2 * np.pi * (hours - PEAK_HOUR_UTC) / 24)
+    activity = 1 + 2 * np.abs(returns) / sigma.mean()
+    base_volume = rng.uniform(1e4, 1e6) / bars_per_day
+    volume = base_volume * intraday * volume_factor * activity * rng.lognormal(0, 0.3, bars)
+
+    return {
+        'timestamp': timestamps,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+        'regime': regimes,
+    }
+
+def write_synthetic_pairs(pairs, bars, timeframe='1H', start='2020-01-01', seed=42,
+                          output='columnar', data_dir=DATA_DIR):
+    """
+    Tạo và ghi dữ liệu giả lập cho nhiều cặp
+
+    Parameters:
+    - output: 'columnar' (data/columnar/, đọc bằng mmap) hoặc 'csv' (layout giống dữ liệu thật)
+
+    Returns: danh sách đường dẫn đã ghi
+    """
+    written = []
+    if output != 'columnar':
+        os.makedirs(data_dir, exist_ok=True)
+    for pair in pairs:
+        columns = generate_market(pair, bars, timeframe, start=start, seed=seed)
+        columns.pop('regime')
+        if output == 'columnar':
+            written.append(write_columnar(columns, pair, timeframe, data_dir))
+        else:
+            df = pd.DataFrame(columns)
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ns')
+            filename = ohlcv_filename(pair, timeframe, data_dir)
+            df.to_csv(filename, index=False)
+            written.append(filename)
+    return written
+
+def main():
+    """Tạo bộ dữ liệu giả lập để load test"""
+    parser = argparse.ArgumentParser(description='Tạo dữ liệu OHLCV giả lập quy mô lớn')
+    parser.add_argument('--pairs', type=int, default=100, help='Số cặp giả lập')
+    parser.add_argument('--bars', type=int, default=1_000_000, help='Số nến mỗi cặp')
+    parser.add_argument('--timeframe', default='15m')
+    parser.add_argument('--start', default='2000-01-01')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', choices=['columnar', 'csv'], default='columnar')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+    if args.pairs < 1:
+        parser.error('--pairs phải >= 1')
+    if args.bars < 1:
+        parser.error('--bars phải >= 1')
+
+    print("=" * 80)
+    print(f"TẠO DỮ LIỆU GIẢ LẬP: {args.pairs} cặp x {args.bars:,} nến ({args.timeframe})")
+    print("⚠ CẢNH BÁO: Đây là dữ liệu giả, chỉ dùng để test hiệu năng")
+    print("=" * 80)
+
+    started = time.time()
+    pairs = synthetic_pair_names(args.pairs)
+    written = write_synthetic_pairs(pairs, args.bars, args.timeframe, start=args.start,
+                                    seed=args.seed, output=args.output, data_dir=args.data_dir)
+
+    elapsed = time.time() - started
+    print(f"✓ Đã ghi {len(written)} cặp ({len(written) * args.bars:,} nến) trong {elapsed:.1f}s")
+    print(f"  Ví dụ: {written[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import numpy as np
 import os
 from datetime import datetime, timedelta
 from backtest_improved import ImprovedBacktestEngine, PAIRS
+from ohlcv_schema import normalize_columns
+from results_db import cached_backtest, data_fingerprint
 
 def test_long_term_backtest(pair, params, years=2):
     """Test backtest dài hạn cho một cặp"""
@@ -18,14 +20,7 @@ def test_long_term_backtest(pair, params, years=2):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -41,9 +36,8 @@ def test_long_term_backtest(pair, params, years=2):
         if len(df) < 14:
             return None
         
-        engine = ImprovedBacktestEngine(**params)
-        engine.run(df)
-        results = engine.get_results()
+        results = cached_backtest(ImprovedBacktestEngine, params, df, data_fingerprint(filename, df),
+                                  pair=pair, timeframe='1D')
         
         if results:
             results['start_date'] = df['timestamp'].min()
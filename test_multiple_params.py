@@ -7,6 +7,8 @@ import numpy as np
 import os
 from datetime import datetime
 from backtest_improved import ImprovedBacktestEngine, filter_data_by_date, PAIRS
+from ohlcv_schema import normalize_columns
+from results_db import cached_backtest, data_fingerprint
 
 def test_parameter_set(pair, params, filter_year=2025, filter_month=11, filter_days=25):
     """Test một bộ tham số cho một cặp token"""
@@ -18,14 +20,7 @@ def test_parameter_set(pair, params, filter_year=2025, filter_month=11, filter_d
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -37,9 +32,8 @@ def test_parameter_set(pair, params, filter_year=2025, filter_month=11, filter_d
         if len(df) < 14:  # Cần ít nhất 14 nến để tính RSI
             return None
         
-        engine = ImprovedBacktestEngine(**params)
-        engine.run(df)
-        results = engine.get_results()
+        results = cached_backtest(ImprovedBacktestEngine, params, df, data_fingerprint(filename, df),
+                                  pair=pair, timeframe='1D')
         
         return results
         
@@ -7,6 +7,7 @@ import numpy as np
 import os
 from datetime import datetime, timedelta
 from backtest_improved import ImprovedBacktestEngine, filter_data_by_date, PAIRS
+from ohlcv_schema import normalize_columns
 
 def test_period(pair, params, start_date, end_date, period_name):
     """Test chiến lược trên một khoảng thời gian cụ thể"""
@@ -18,14 +19,7 @@ def test_period(pair, params, start_date, end_date, period_name):
     try:
         df = pd.read_csv(filename)
         
-        column_mapping = {
-            'Timestamp': 'timestamp', 'Date': 'timestamp', 'time': 'timestamp',
-            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-        }
-        
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        df = normalize_columns(df)
         
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'])
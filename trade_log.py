@@ -0,0 +1,184 @@
+"""
+Columnar trade-log selection for the report scripts
+- The trade log (list of trade dicts from the engines) is turned into columns once:
+  int64 timestamps (ns) and trade types; profit columns only for the selected exits
+- "Trades near the target date": the max_trades exits closest to the target, exits on or
+  before the target first, then the exits after it. Distance to the target grows
+  monotonically on each side, so the selection is one contiguous run of the time-sorted
+  exits (up to duplicates of the cutoff timestamp, where the earlier ones are kept) and is
+  found with a searchsorted plus a sort of the tie at the cutoff (no per-trade sort keys)
+- The buffered window [first exit - 48h, last exit + 24h] is two searchsorted calls on the
+  sorted timestamps; the cost is O(n log n) for the initial sort, so logs with millions
+  of trades select in well under a second
+- trade_frame / exit_cycles give the whole log as typed columns (for paginated PDF tables):
+  a few dozen bytes per trade instead of one dict each
+"""
+
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+BUFFER_BEFORE = pd.Timedelta(hours=48)
+BUFFER_AFTER = pd.Timedelta(hours=24)
+FRAME_COLUMNS = ['timestamp', 'type', 'price', 'amount', 'capital', 'proceeds', 'rsi',
+                 'profit', 'profit_pct', 'reason']
+
+def trade_columns(trades):
+    """
+    Timestamps and types of a trade log as arrays, sorted by time (stable)
+
+    Returns: (order, timestamps, types) where order indexes into trades, timestamps is the
+    sorted int64 (ns) array and types the trade types in the same order
+    """
+    timestamps = pd.to_datetime([t['timestamp'] for t in trades]).values.astype('datetime64[ns]').view('int64')
+    types = np.array([t['type'] for t in trades])
+    order = np.argsort(timestamps, kind='stable')
+    return order, timestamps[order], types[order]
+
+def exits_by_time(trades, exit_type='SELL'):
+    """Exit trades of a log in time order (trades with the same timestamp keep log order)"""
+    if not trades:
+        return []
+    order, _, types = trade_columns(trades)
+    return [trades[i] for i in order[types == exit_type]]
+
+def select_near_target(timestamps, is_exit, target, max_trades,
+                       buffer_before=BUFFER_BEFORE, buffer_after=BUFFER_AFTER):
+    """
+    Positions (in the time-sorted log) of the exits closest to target and the trade window around them
+
+    Parameters:
+    - timestamps: Sorted int64 timestamps (ns) of all trades
+    - is_exit: Boolean mask of exit trades (SELL / COVER), same order
+    - target: Target time as int64 (ns)
+    - max_trades: Maximum number of exits selected
+
+    Returns: (exit positions by proximity, start position, stop position, window start ns,
+    window end ns) or None if there are no exits
+    """
+    exits = np.flatnonzero(is_exit)
+    if not len(exits) or max_trades <= 0:
+        return None
+    exit_times = timestamps[exits]
+
+    # Exits on or before target come first; only if there are fewer than max_trades of them
+    # are the earliest exits after the target added
+    before = int(np.searchsorted(exit_times, target, side='right'))
+    if before >= max_trades:
+        lo, hi = before - max_trades, before
+    else:
+        lo, hi = 0, min(len(exits), max_trades)
+
+    # Before the target, closest first; exits with the same timestamp stay in log order, so at
+    # the cutoff the earlier duplicates are kept (candidates include the whole tie at exit_times[lo])
+    taken = min(before, hi) - lo
+    first = int(np.searchsorted(exit_times, exit_times[lo], side='left')) if taken else before
+    closest = np.argsort(-exit_times[first:before], kind='stable')[:taken]
+    by_proximity = np.concatenate((exits[first:before][closest], exits[before:hi]))
+
+    window_start = exit_times[lo] - buffer_before.value
+    window_end = exit_times[hi - 1] + buffer_after.value
+    start = int(np.searchsorted(timestamps, window_start, side='left'))
+    stop = int(np.searchsorted(timestamps, window_end, side='right'))
+    return by_proximity, start, stop, window_start, window_end
+
+def select_trades_near_target(trades, target_date, max_trades, exit_type='SELL'):
+    """
+    Trades and exits closest to target_date (at most max_trades exits)
+
+    Parameters:
+    - trades: Trade log (list of dicts with 'timestamp' and 'type')
+    - target_date: Target date
+    - max_trades: Maximum number of exits in the report
+    - exit_type: Trade type that closes a position ('SELL', or 'COVER' for short engines)
+
+    Returns: {'selected_trades' (by time), 'selected_sells' (by proximity), 'time_start', 'time_end'}
+    or None if there are no exits
+    """
+    if not trades:
+        return None
+    order, timestamps, types = trade_columns(trades)
+    target = pd.Timestamp(target_date).as_unit('ns').value
+    selection = select_near_target(timestamps, types == exit_type, target, max_trades)
+    if selection is None:
+        return None
+    by_proximity, start, stop, window_start, window_end = selection
+
+    return {
+        'selected_trades': [trades[i] for i in order[start:stop]],
+        'selected_sells': [trades[i] for i in order[by_proximity]],
+        'time_start': pd.Timestamp(window_start),
+        'time_end': pd.Timestamp(window_end)
+    }
+
+def summarize_selection(results, selection, exit_type='SELL'):
+    """
+    Update results so the report only reflects the selected trades
+
+    Returns: results (updated in place) or None if the window holds no exits
+    """
+    selected_trades = selection['selected_trades']
+    exits = [t for t in selected_trades if t['type'] == exit_type]
+    if not exits:
+        return None
+
+    profit = np.array([t.get('profit', 0) for t in exits], dtype=float)
+    profit_pct = np.array([t.get('profit_pct', 0) for t in exits], dtype=float)
+    total_profit = float(profit.sum())
+    initial_capital = results['initial_capital']
+    winning = int(np.count_nonzero(profit > 0))
+
+    results['trades'] = selected_trades
+    results['total_trades'] = len(exits)
+    results['selected_trades_count'] = len(selected_trades)
+    results['winning_trades'] = winning
+    results['losing_trades'] = int(np.count_nonzero(profit < 0))
+    results['win_rate'] = winning / len(exits) * 100
+    results['total_profit'] = total_profit
+    results['total_profit_pct'] = (total_profit / initial_capital) * 100 if initial_capital else 0
+    results['avg_profit'] = total_profit / len(exits)
+    results['avg_profit_pct'] = float(profit_pct.mean())
+    results['sell_reasons'] = dict(Counter(t.get('reason', 'UNKNOWN') for t in exits))
+    results['start_date'] = selection['time_start']
+    results['end_date'] = selection['time_end']
+    return results
+
+def trade_frame(trades, columns=FRAME_COLUMNS):
+    """
+    Trade log as a typed DataFrame sorted by time (stable); missing fields are 0 / ''
+
+    Parameters:
+    - trades: Trade log (list of dicts)
+    - columns: Fields kept (default FRAME_COLUMNS)
+    """
+    frame = pd.DataFrame.from_records(trades, columns=columns)
+    for name in columns:
+        if name == 'timestamp':
+            frame[name] = pd.to_datetime(frame[name])
+        elif name in ('type', 'reason'):
+            frame[name] = frame[name].fillna('').astype('category')
+        else:
+            frame[name] = pd.to_numeric(frame[name], errors='coerce').fillna(0.0)
+    return frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+def exit_cycles(frame, exit_type='SELL', entry_types=('BUY', 'DCA')):
+    """
+    Trades ordered as buy -> sell cycles: each exit preceded by the entries since the previous exit
+
+    An entry belongs to the first exit strictly after it; entries after the last exit are dropped.
+    Returns the rows of frame in cycle order with a 'cycle' column (exit number from 1).
+    """
+    is_exit = (frame['type'] == exit_type).to_numpy()
+    is_entry = frame['type'].isin(entry_types).to_numpy()
+    times = frame['timestamp'].to_numpy().astype('datetime64[ns]').view('int64')
+    exit_times = times[is_exit]
+
+    cycle = np.full(len(frame), -1, dtype=np.int64)
+    cycle[is_exit] = np.arange(len(exit_times))
+    cycle[is_entry] = np.searchsorted(exit_times, times[is_entry], side='right')
+    keep = np.flatnonzero((is_exit | is_entry) & (cycle < len(exit_times)))
+    order = keep[np.lexsort((keep, is_exit[keep], cycle[keep]))]
+
+    cycles = frame.take(order).reset_index(drop=True)
+    cycles['cycle'] = cycle[order] + 1
+    return cycles
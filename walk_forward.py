@@ -0,0 +1,257 @@
+"""
+Walk-forward optimization cho chiến lược RSI + DCA cải tiến
+- Chia dữ liệu thành các fold train/test cuộn theo thời gian
+- Tối ưu tham số trên train, đánh giá tham số đã chọn trên test (out-of-sample)
+- Chỉ báo tính một lần cho toàn bộ chuỗi rồi cắt theo fold (không tính lại mỗi cửa sổ)
+- Các fold chạy song song trên process pool (dữ liệu dùng chung qua shared memory)
+"""
+
+import argparse
+from itertools import product
+import numpy as np
+import pandas as pd
+from backtest_improved import ImprovedBacktestEngine, prepare_indicators
+from columnar_export import FORMATS, export_table
+from data_quality import QUALITY_MODES
+from ohlcv_schema import load_ohlcv_csv
+from parallel_grid import default_workers, imap_grid
+
+REAL_DATA_PAIRS = ['iBTCUSDM', 'iETHUSDM', 'ADAUSDM']
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+INDICATOR_WARMUP = 20  # Số nến đầu chưa đủ dữ liệu cho EMA20/volume MA
+
+# Grid tham số giống optimize_real_data.py
+DEFAULT_PARAM_GRID = {
+    'take_profit': [0.08, 0.10, 0.12],
+    'stop_loss': [0.03, 0.04, 0.05],
+    'rsi_buy': [22, 25, 28],
+    'rsi_sell': [75, 77, 80],
+    'position_size': [0.05, 0.07],
+    'max_dca': [2, 3],
+}
+
+BASE_PARAMS = {
+    'initial_capital': 10000,
+    'use_trend_filter': False,
+    'use_volume_filter': False
+}
+
+def expand_grid(grid):
+    """Chuyển dict {tham số: danh sách giá trị} thành danh sách dict tham số engine"""
+    names = list(grid)
+    return [dict(BASE_PARAMS, **dict(zip(names, values))) for values in product(*grid.values())]
+
+def make_folds(timestamps, train_days, test_days, step_days=None, anchored=False, warmup=INDICATOR_WARMUP):
+    """
+    Tạo các fold walk-forward theo thời gian
+
+    Parameters:
+    - timestamps: Mảng timestamp đã sắp xếp
+    - train_days, test_days: Độ dài cửa sổ train/test (ngày)
+    - step_days: Bước dịch cửa sổ (mặc định = test_days, các test không chồng nhau)
+    - anchored: True = train luôn bắt đầu từ đầu dữ liệu (cửa sổ mở rộng)
+    - warmup: Bỏ qua số nến đầu khi chỉ báo chưa ổn định
+
+    Returns: danh sách dict {'train': (start, stop), 'test': (start, stop)} theo vị trí dòng
+    """
+    stamps = np.asarray(timestamps).astype('datetime64[ns]').view('int64')
+    if len(stamps) <= warmup + 1:
+        return []
+
+    step = (step_days or test_days) * NS_PER_DAY
+    bar = int(np.median(np.diff(stamps)))
+    first = stamps[warmup]
+
+    folds = []
+    offset = 0
+    while True:
+        train_start = first if anchored else first + offset
+        train_end = first + offset + train_days * NS_PER_DAY
+        test_end = train_end + test_days * NS_PER_DAY
+        if test_end > stamps[-1] + bar:
+            break
+
+        a, b, d = np.searchsorted(stamps, [train_start, train_end, test_end], 'left')
+        if b > a and d > b:
+            folds.append({'train': (int(a), int(b)), 'test': (int(b), int(d))})
+        offset += step
+    return folds
+
+def backtest_slice(df, params, start, stop):
+    """Chạy engine trên một đoạn của DataFrame đã có chỉ báo"""
+    engine = ImprovedBacktestEngine(**params)
+    engine.run(df.iloc[start:stop], precomputed=True)
+    return engine.get_results()
+
+def score_results(results):
+    """Score giống optimize_real_data: lợi nhuận 70%, win rate 20%, số lệnh 10% (None nếu không có lệnh)"""
+    if not results or results['total_trades'] == 0:
+        return None
+    return (results['total_profit_pct'] * 0.7 + (results['win_rate'] / 100) * 20
+            + min(results['total_trades'] / 20, 1) * 10)
+
+def run_fold(frames, task):
+    """
+    Tối ưu trên đoạn train và đánh giá trên đoạn test của một fold (chạy trong worker)
+
+    Parameters:
+    - frames: dict {pair: DataFrame đã có chỉ báo}
+    - task: {'pair', 'fold', 'train', 'test', 'param_grid'}
+    """
+    df = frames[task['pair']]
+    stamps = df['timestamp']
+    (train_start, train_stop), (test_start, test_stop) = task['train'], task['test']
+
+    record = {
+        'fold': task['fold'],
+        'train_start': stamps.iloc[train_start],
+        'train_end': stamps.iloc[train_stop - 1],
+        'test_start': stamps.iloc[test_start],
+        'test_end': stamps.iloc[test_stop - 1],
+        'train_candles': train_stop - train_start,
+        'test_candles': test_stop - test_start,
+    }
+
+    best_params, best_results, best_score = None, None, -float('inf')
+    for params in task['param_grid']:
+        try:
+            results = backtest_slice(df, params, train_start, train_stop)
+        except Exception as e:
+            continue
+        score = score_results(results)
+        if score is not None and score > best_score:
+            best_params, best_results, best_score = params, results, score
+
+    if best_params is None:
+        return record
+
+    test_results = backtest_slice(df, best_params, test_start, test_stop)
+    record.update({name: best_params[name] for name in DEFAULT_PARAM_GRID if name in best_params})
+    record.update({
+        'is_score': best_score,
+        'is_profit_pct': best_results['total_profit_pct'],
+        'is_win_rate': best_results['win_rate'],
+        'is_trades': best_results['total_trades'],
+        'oos_profit_pct': test_results['total_profit_pct'] if test_results else 0.0,
+        'oos_win_rate': test_results['win_rate'] if test_results else 0.0,
+        'oos_trades': test_results['total_trades'] if test_results else 0,
+    })
+    return record
+
+def walk_forward(pair, df, param_grid=None, train_days=180, test_days=60, step_days=None,
+                 anchored=False, workers=None):
+    """
+    Chạy walk-forward optimization cho một cặp
+
+    Parameters:
+    - pair: Tên cặp token
+    - df: Dữ liệu OHLCV (đã sắp xếp theo timestamp)
+    - param_grid: dict {tham số: danh sách giá trị} (mặc định DEFAULT_PARAM_GRID)
+    - train_days, test_days, step_days, anchored: Cấu hình fold (xem make_folds)
+    - workers: Số process chạy song song các fold
+
+    Returns: (DataFrame kết quả từng fold, dict tổng hợp out-of-sample)
+    """
+    param_list = expand_grid(param_grid or DEFAULT_PARAM_GRID)
+
+    # Chỉ báo tính một lần cho toàn bộ chuỗi, các fold chỉ cắt ra
+    data = prepare_indicators(df)
+    folds = make_folds(data['timestamp'], train_days, test_days, step_days, anchored)
+    if not folds:
+        return pd.DataFrame(), {}
+
+    tasks = [
+        {'pair': pair, 'fold': i + 1, 'train': fold['train'], 'test': fold['test'], 'param_grid': param_list}
+        for i, fold in enumerate(folds)
+    ]
+
+    records = [None] * len(tasks)
+    for index, record in imap_grid(run_fold, tasks, {pair: data}, workers=workers):
+        records[index] = record
+        print(f"  ✓ Fold {record['fold']}/{len(tasks)} xong")
+
+    df_folds = pd.DataFrame(records)
+    summary = summarize_walk_forward(df_folds)
+    return df_folds, summary
+
+def summarize_walk_forward(df_folds):
+    """Tổng hợp kết quả out-of-sample của các fold"""
+    if 'oos_profit_pct' not in df_folds.columns:
+        return {'folds': len(df_folds), 'optimized_folds': 0}
+
+    valid = df_folds.dropna(subset=['oos_profit_pct'])
+    oos = valid['oos_profit_pct'].to_numpy() / 100
+    is_per_candle = (valid['is_profit_pct'] / valid['train_candles']).mean()
+    oos_per_candle = (valid['oos_profit_pct'] / valid['test_candles']).mean()
+
+    return {
+        'folds': len(df_folds),
+        'optimized_folds': len(valid),
+        'oos_compounded_pct': (np.prod(1 + oos) - 1) * 100,
+        'oos_avg_profit_pct': valid['oos_profit_pct'].mean(),
+        'oos_profitable_folds': int((valid['oos_profit_pct'] > 0).sum()),
+        'oos_trades': int(valid['oos_trades'].sum()),
+        'is_avg_profit_pct': valid['is_profit_pct'].mean(),
+        # Walk-forward efficiency: lợi nhuận/nến out-of-sample so với in-sample
+        'efficiency': oos_per_candle / is_per_candle if is_per_candle > 0 else float('nan'),
+    }
+
+def main():
+    """Walk-forward optimization cho các cặp có dữ liệu thực"""
+    parser = argparse.ArgumentParser(description='Walk-forward optimization')
+    parser.add_argument('--pairs', default=','.join(REAL_DATA_PAIRS))
+    parser.add_argument('--train-days', type=int, default=180)
+    parser.add_argument('--test-days', type=int, default=60)
+    parser.add_argument('--step-days', type=int, default=None)
+    parser.add_argument('--anchored', action='store_true', help='Cửa sổ train mở rộng từ đầu dữ liệu')
+    parser.add_argument('--workers', type=int, default=None, help='Số process (mặc định: số CPU)')
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help='Định dạng file kết quả (mặc định: RESULTS_FORMAT hoặc csv)')
+    parser.add_argument('--quality', choices=QUALITY_MODES, default=None,
+                        help='Xử lý gap/trùng/nến lỗi theo quality index (mặc định: giữ nguyên dữ liệu)')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("WALK-FORWARD OPTIMIZATION")
+    print("=" * 80)
+    print(f"Train: {args.train_days} ngày | Test: {args.test_days} ngày | "
+          f"Bước: {args.step_days or args.test_days} ngày | {'Anchored' if args.anchored else 'Rolling'}")
+    print(f"⚙️  {args.workers or default_workers()} process")
+
+    for pair in [p.strip() for p in args.pairs.split(',') if p.strip()]:
+        print(f"\n{'='*80}")
+        print(f"{pair}")
+        print(f"{'='*80}")
+
+        df = load_ohlcv_csv(f"data/{pair}_ohlcv.csv", quality=args.quality, timeframe='1D')
+        if df is None:
+            print(f"  ✗ Không tìm thấy dữ liệu cho {pair}")
+            continue
+
+        df_folds, summary = walk_forward(pair, df, train_days=args.train_days, test_days=args.test_days,
+                                         step_days=args.step_days, anchored=args.anchored,
+                                         workers=args.workers)
+        if df_folds.empty:
+            print("  ✗ Không đủ dữ liệu để tạo fold")
+            continue
+
+        for _, fold in df_folds.iterrows():
+            if pd.isna(fold.get('oos_profit_pct', np.nan)):
+                print(f"  Fold {fold['fold']:2d}: không có tham số nào tạo lệnh trên train")
+                continue
+            print(f"  Fold {fold['fold']:2d}: Test {fold['test_start']:%Y-%m-%d} → {fold['test_end']:%Y-%m-%d} | "
+                  f"IS {fold['is_profit_pct']:>6.2f}% | OOS {fold['oos_profit_pct']:>6.2f}% "
+                  f"({int(fold['oos_trades'])} lệnh)")
+
+        if summary.get('optimized_folds'):
+            print(f"\n  Lợi nhuận OOS cộng dồn: {summary['oos_compounded_pct']:.2f}%")
+            print(f"  Fold OOS có lãi: {summary['oos_profitable_folds']}/{summary['optimized_folds']}")
+            print(f"  Walk-forward efficiency: {summary['efficiency']:.2f}")
+
+        output = export_table(df_folds, f"walk_forward_{pair}.csv", args.format,
+                              partition={'pair': pair}, dataset='walk_forward.parquet')
+        print(f"\n✓ Đã lưu kết quả vào {output}")
+
+if __name__ == "__main__":
+    main()